@@ -1,8 +1,9 @@
+import json
 import time
 import threading
 import numpy as np
 from collections import deque
-from flask import Flask, render_template_string, jsonify
+from flask import Flask, Response, render_template_string, jsonify
 import webbrowser
 import myo
 
@@ -11,6 +12,7 @@ SAMPLE_RATE = 200  # Hz
 WINDOW_SIZE = 50   # Amostras para suavização
 MAX_ANGLE_MCP = 90
 MAX_ANGLE_IP = 80
+CONTROL_RATE = 60  # Hz, taxa de cálculo e envio dos ângulos
 
 # ===== CLASSE DE COLETA =====
 class EmgCollector(myo.DeviceListener):
@@ -31,37 +33,89 @@ class EmgCollector(myo.DeviceListener):
             self.ch6_buffer.append(ch6)
 
     def compute_angles(self):
+        # Copia os buffers sob o lock e calcula fora dele, para não
+        # bloquear a thread do Myo durante o cálculo
         with self.lock:
             if len(self.ch1_buffer) == 0 or len(self.ch6_buffer) == 0:
                 return {"MCP": 0, "IP": 0}
-            
-            # Calcula RMS dos dois canais
-            rms1 = np.sqrt(np.mean(np.square(self.ch1_buffer)))
-            rms6 = np.sqrt(np.mean(np.square(self.ch6_buffer)))
-
-            # Normaliza ambos (faixa 0–1)
-            norm1 = np.clip(rms1 / 50, 0, 1)
-            norm6 = np.clip(rms6 / 50, 0, 1)
-
-            # Diferença define direção do movimento
-            diff = norm6 - norm1
-
-            # Intensidade total suaviza o movimento
-            magnitude = abs(diff)
-
-            # Mapeia intensidade → ângulos
-            # flexão (diff > 0) → ângulo positivo
-            # extensão (diff < 0) → ângulo negativo, menor amplitude
-            if diff >= 0:
-                mcp = MAX_ANGLE_MCP * magnitude
-                ip = MAX_ANGLE_IP * magnitude
-            else:
-                mcp = -MAX_ANGLE_MCP * 0.6 * magnitude  # extensão menos intensa
-                ip = -MAX_ANGLE_IP * 0.6 * magnitude
-
-            self.current_angle["MCP"] = mcp
-            self.current_angle["IP"] = ip
-            return self.current_angle
+            ch1 = np.array(self.ch1_buffer, dtype=float)
+            ch6 = np.array(self.ch6_buffer, dtype=float)
+
+        # Calcula RMS dos dois canais
+        rms1 = np.sqrt(np.mean(np.square(ch1)))
+        rms6 = np.sqrt(np.mean(np.square(ch6)))
+
+        # Normaliza ambos (faixa 0–1)
+        norm1 = np.clip(rms1 / 50, 0, 1)
+        norm6 = np.clip(rms6 / 50, 0, 1)
+
+        # Diferença define direção do movimento
+        diff = norm6 - norm1
+
+        # Intensidade total suaviza o movimento
+        magnitude = abs(diff)
+
+        # Mapeia intensidade → ângulos
+        # flexão (diff > 0) → ângulo positivo
+        # extensão (diff < 0) → ângulo negativo, menor amplitude
+        if diff >= 0:
+            mcp = MAX_ANGLE_MCP * magnitude
+            ip = MAX_ANGLE_IP * magnitude
+        else:
+            mcp = -MAX_ANGLE_MCP * 0.6 * magnitude  # extensão menos intensa
+            ip = -MAX_ANGLE_IP * 0.6 * magnitude
+
+        # Novo dicionário a cada cálculo: quem já recebeu o anterior
+        # (clientes do stream) não o vê mudar
+        self.current_angle = {"MCP": float(mcp), "IP": float(ip)}
+        return self.current_angle
+
+# ===== DIFUSÃO DOS ÂNGULOS =====
+class AngleBroadcaster:
+    """Guarda o último valor calculado e acorda os clientes do stream.
+
+    Cada cliente recebe sempre apenas o valor mais recente: um cliente
+    lento pula valores intermediários em vez de acumular uma fila.
+    """
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.version = 0
+        self.angles = {"MCP": 0, "IP": 0}
+
+    def publish(self, angles):
+        with self.cond:
+            self.version += 1
+            self.angles = angles
+            self.cond.notify_all()
+
+    def latest(self):
+        with self.cond:
+            return self.angles
+
+    def wait_newer(self, version, timeout=None):
+        with self.cond:
+            self.cond.wait_for(lambda: self.version != version, timeout)
+            return self.version, self.angles
+
+
+def control_loop(collector, broadcaster, rate=CONTROL_RATE):
+    """Calcula os ângulos em taxa fixa, com prazos sem deriva."""
+    period = 1.0 / rate
+    deadline = time.perf_counter()
+    last = None
+    while True:
+        angles = collector.compute_angles()
+        if angles != last:  # só envia quando o valor muda
+            broadcaster.publish(angles)
+            last = angles
+        deadline += period
+        delay = deadline - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            # Atrasado: pula os ciclos perdidos em vez de correr atrás
+            deadline = time.perf_counter()
+
 
 # ===== TEMPLATE HTML =====
 HTML_TEMPLATE = '''
@@ -125,16 +179,18 @@ HTML_TEMPLATE = '''
         camera.position.set(2, 2, 3);
         camera.lookAt(0, 0, 0);
 
+        // O servidor envia os ângulos (Server-Sent Events); cada quadro
+        // desenha apenas o valor mais recente, sem requisições por quadro
+        let latest = { MCP: 0, IP: 0 };
+        const source = new EventSource('/stream');
+        source.onmessage = (msg) => { latest = JSON.parse(msg.data); };
+
         function animate() {
             requestAnimationFrame(animate);
-            fetch('/get_angles')
-                .then(res => res.json())
-                .then(data => {
-                    document.getElementById('angleMCP').textContent = data.MCP.toFixed(1) + '°';
-                    document.getElementById('angleIP').textContent  = data.IP.toFixed(1) + '°';
-                    proxGroup.rotation.z = -THREE.MathUtils.degToRad(data.MCP);
-                    distGroup.rotation.z = -THREE.MathUtils.degToRad(data.IP);
-                });
+            document.getElementById('angleMCP').textContent = latest.MCP.toFixed(1) + '°';
+            document.getElementById('angleIP').textContent  = latest.IP.toFixed(1) + '°';
+            proxGroup.rotation.z = -THREE.MathUtils.degToRad(latest.MCP);
+            distGroup.rotation.z = -THREE.MathUtils.degToRad(latest.IP);
             renderer.render(scene, camera);
         }
         animate();
@@ -146,6 +202,7 @@ HTML_TEMPLATE = '''
 # ===== FLASK SERVER =====
 app = Flask(__name__)
 collector = None
+broadcaster = AngleBroadcaster()
 
 @app.route('/')
 def index():
@@ -153,9 +210,21 @@ def index():
 
 @app.route('/get_angles')
 def get_angles():
-    if collector:
-        return collector.compute_angles()
-    return {"MCP": 0, "IP": 0}
+    return broadcaster.latest()
+
+@app.route('/stream')
+def stream():
+    def events():
+        version = 0
+        while True:
+            new_version, angles = broadcaster.wait_newer(version, timeout=15)
+            if new_version == version:
+                yield ': keepalive\n\n'
+                continue
+            version = new_version
+            yield 'data: ' + json.dumps(angles) + '\n\n'
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
 
 # ===== EXECUÇÃO =====
 def main():
@@ -167,9 +236,12 @@ def main():
     # Executa leitura do Myo em thread separada
     threading.Thread(target=lambda: hub.run_forever(collector), daemon=True).start()
 
+    # Calcula os ângulos em taxa fixa e envia a todos os clientes
+    threading.Thread(target=control_loop, args=(collector, broadcaster), daemon=True).start()
+
     # Abre navegador
     webbrowser.open('http://localhost:5000', new=2)
-    app.run(port=5000, debug=False)
+    app.run(port=5000, debug=False, threaded=True)
 
 if __name__ == "__main__":
     print("Iniciando controle com flexão/extensão")
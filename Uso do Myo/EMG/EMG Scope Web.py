@@ -0,0 +1,310 @@
+import struct
+import threading
+import time
+import webbrowser
+
+import numpy as np
+from flask import Flask, Response, jsonify, render_template_string, request
+
+import myo
+from myo.plot import decimate_minmax
+
+# ===== CONFIGURAÇÕES =====
+SAMPLE_RATE = 200      # Hz
+CHANNELS = 8
+WINDOW = 512           # Amostras exibidas (~2.5 s)
+HISTORY = 4 * WINDOW   # Capacidade do buffer circular
+QUEUE_FRAMES = 2       # Quadros pendentes por cliente antes de descartar
+MAX_WIDTH = 4096
+MAX_FPS = 60
+
+# Cabeçalho de cada quadro: sequência, largura, canais, reservado.
+# Em seguida vêm CHANNELS * largura pares (mínimo, máximo) em int8.
+FRAME_HEADER = struct.Struct('<IHBB')
+LENGTH = struct.Struct('<I')
+
+
+# ===== CLASSE DE COLETA =====
+class EmgCollector(myo.DeviceListener):
+    """Guarda as amostras em um buffer circular pré-alocado.
+
+    A thread do Myo só copia 8 bytes por amostra sob o lock; todo o resto
+    (decimação, envio) acontece nas threads do servidor.
+    """
+    def __init__(self, capacity=HISTORY):
+        self.lock = threading.Lock()
+        self.capacity = capacity
+        self.buffer = np.zeros((capacity, CHANNELS), dtype=np.int8)
+        self.total = 0
+
+    def on_connected(self, event):
+        event.device.stream_emg(True)
+
+    def on_emg(self, event):
+        with self.lock:
+            self.buffer[self.total % self.capacity] = event.emg
+            self.total += 1
+
+    def snapshot(self, n):
+        """Retorna (total, as últimas n amostras em ordem cronológica)."""
+        with self.lock:
+            total = self.total
+            end = total % self.capacity
+            if end >= n:
+                data = self.buffer[end - n:end].copy()
+            else:
+                data = np.concatenate([self.buffer[end - n:], self.buffer[:end]])
+        if total < n:
+            data[:n - total] = 0
+        return total, data
+
+
+# ===== CLIENTES E GRUPOS =====
+class ScopeClient:
+    """Fila limitada de um visualizador.
+
+    Quando a fila está cheia, o quadro mais antigo é descartado: um cliente
+    lento perde quadros, mas nunca segura a aquisição nem os outros.
+    """
+    def __init__(self, key):
+        self.key = key
+        self.cond = threading.Condition()
+        self.frames = []
+        self.sent = 0
+        self.dropped = 0
+
+    def push(self, frame):
+        with self.cond:
+            if len(self.frames) >= QUEUE_FRAMES:
+                del self.frames[0]
+                self.dropped += 1
+            self.frames.append(frame)
+            self.cond.notify()
+
+    def pop(self, timeout):
+        with self.cond:
+            if not self.frames:
+                self.cond.wait(timeout)
+            if not self.frames:
+                return None
+            self.sent += 1
+            return self.frames.pop(0)
+
+
+class ScopeGroup:
+    """Clientes com a mesma largura e taxa compartilham o mesmo quadro.
+
+    A decimação é feita uma vez por quadro e grupo, não por cliente; o
+    custo por cliente é só colocar uma referência na sua fila.
+    """
+    def __init__(self, server, width, fps):
+        self.server = server
+        self.width = width
+        self.fps = fps
+        self.clients = []
+        self.seq = 0
+        # Mínimo e máximo de cada coluna, intercalados (ver myo.plot.decimate_minmax).
+        self.columns = np.empty((2 * min(width, WINDOW), CHANNELS), dtype=np.int8)
+
+    def run(self):
+        period = 1.0 / self.fps
+        deadline = time.perf_counter()
+        last_total = -1
+        while True:
+            with self.server.lock:
+                clients = list(self.clients)
+            if not clients:
+                return
+            total, data = self.server.collector.snapshot(WINDOW)
+            if total != last_total:  # sem amostras novas, nada a enviar
+                last_total = total
+                self.seq += 1
+                columns = decimate_minmax(data, len(self.columns) // 2, out=self.columns)
+                frame = self.encode(columns)
+                for client in clients:
+                    client.push(frame)
+            deadline += period
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                deadline = time.perf_counter()
+
+    def encode(self, columns):
+        width, channels = len(columns) // 2, columns.shape[1]
+        payload = FRAME_HEADER.pack(self.seq & 0xffffffff, width, channels, 0)
+        # O navegador espera, para cada canal, os pares (mínimo, máximo) das colunas.
+        payload += columns.reshape(width, 2, channels).transpose(2, 0, 1).tobytes()
+        return LENGTH.pack(len(payload)) + payload
+
+
+class ScopeServer:
+    def __init__(self, collector):
+        self.collector = collector
+        self.lock = threading.Lock()
+        self.groups = {}
+
+    def subscribe(self, width, fps):
+        key = (width, fps)
+        client = ScopeClient(key)
+        with self.lock:
+            group = self.groups.get(key)
+            start = group is None
+            if start:
+                group = self.groups[key] = ScopeGroup(self, width, fps)
+            group.clients.append(client)
+        if start:
+            threading.Thread(target=group.run, daemon=True).start()
+        return client
+
+    def unsubscribe(self, client):
+        with self.lock:
+            group = self.groups.get(client.key)
+            if group is None:
+                return
+            group.clients.remove(client)
+            if not group.clients:
+                # A thread do grupo encerra ao ver a lista vazia
+                del self.groups[client.key]
+
+    def stats(self):
+        with self.lock:
+            return {
+                'samples': self.collector.total,
+                'groups': [
+                    {'width': g.width, 'fps': g.fps, 'frames': g.seq,
+                     'clients': [{'sent': c.sent, 'dropped': c.dropped}
+                                 for c in g.clients]}
+                    for g in self.groups.values()
+                ],
+            }
+
+
+# ===== TEMPLATE HTML =====
+HTML_TEMPLATE = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <title>EMG Scope</title>
+    <style>
+        body { margin: 0; background: #111; color: #ccc; font-family: Arial; }
+        canvas { display: block; width: 100vw; height: 100vh; }
+        #info { position: absolute; top: 5px; right: 10px; font-size: 12px; }
+    </style>
+</head>
+<body>
+    <div id="info"></div>
+    <canvas id="scope"></canvas>
+    <script>
+        const colors = ['#36f', '#3c3', '#f33', '#3cc', '#c3c', '#cc3', 'orange', 'purple'];
+        const canvas = document.getElementById('scope');
+        const ctx = canvas.getContext('2d');
+        canvas.width = window.innerWidth;
+        canvas.height = window.innerHeight;
+        const fps = {{ fps }};
+
+        function draw(view) {
+            const width = view.getUint16(4, true);
+            const channels = view.getUint8(6);
+            const data = new Int8Array(view.buffer, view.byteOffset + 8);
+            const h = canvas.height / channels;
+            const sx = canvas.width / width;
+            ctx.fillStyle = '#111';
+            ctx.fillRect(0, 0, canvas.width, canvas.height);
+            for (let c = 0; c < channels; c++) {
+                const mid = h * (c + 0.5);
+                const sy = h / 256;
+                ctx.strokeStyle = colors[c % colors.length];
+                ctx.beginPath();
+                for (let x = 0; x < width; x++) {
+                    const i = 2 * (c * width + x);
+                    ctx.moveTo(x * sx, mid - data[i + 1] * sy);
+                    ctx.lineTo(x * sx, mid - data[i] * sy + 1);
+                }
+                ctx.stroke();
+            }
+            document.getElementById('info').textContent = 'quadro ' + view.getUint32(0, true);
+        }
+
+        // Quadros binários com prefixo de tamanho em um único fetch
+        async function run() {
+            const url = '/stream?width=' + canvas.width + '&fps=' + fps;
+            const reader = (await fetch(url)).body.getReader();
+            let pending = new Uint8Array(0);
+            let latest = null;
+            requestAnimationFrame(function paint() {
+                if (latest) { draw(latest); latest = null; }
+                requestAnimationFrame(paint);
+            });
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                const merged = new Uint8Array(pending.length + value.length);
+                merged.set(pending);
+                merged.set(value, pending.length);
+                let offset = 0;
+                while (merged.length - offset >= 4) {
+                    const size = new DataView(merged.buffer, offset, 4).getUint32(0, true);
+                    if (merged.length - offset - 4 < size) break;
+                    latest = new DataView(merged.buffer, offset + 4, size);
+                    offset += 4 + size;
+                }
+                pending = merged.slice(offset);
+            }
+        }
+        run();
+    </script>
+</body>
+</html>
+'''
+
+# ===== FLASK SERVER =====
+app = Flask(__name__)
+scope = None
+
+@app.route('/')
+def index():
+    fps = min(max(request.args.get('fps', 30, type=int), 1), MAX_FPS)
+    return render_template_string(HTML_TEMPLATE, fps=fps)
+
+@app.route('/stream')
+def stream():
+    width = min(max(request.args.get('width', 800, type=int), 16), MAX_WIDTH)
+    fps = min(max(request.args.get('fps', 30, type=int), 1), MAX_FPS)
+    client = scope.subscribe(width, fps)
+
+    def frames():
+        try:
+            while True:
+                frame = client.pop(timeout=1.0)
+                if frame is not None:
+                    yield frame
+        finally:
+            # Chamado quando o navegador fecha a conexão
+            scope.unsubscribe(client)
+
+    return Response(frames(), mimetype='application/octet-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
+@app.route('/stats')
+def stats():
+    return jsonify(scope.stats())
+
+# ===== EXECUÇÃO =====
+def main():
+    global scope
+    myo.init()
+    hub = myo.Hub()
+    collector = EmgCollector()
+    scope = ScopeServer(collector)
+
+    # Executa leitura do Myo em thread separada
+    threading.Thread(target=lambda: hub.run_forever(collector), daemon=True).start()
+
+    webbrowser.open('http://localhost:5001', new=2)
+    # host 0.0.0.0 para que outras máquinas da rede possam assistir
+    app.run(host='0.0.0.0', port=5001, debug=False, threaded=True)
+
+if __name__ == "__main__":
+    print("Iniciando EMG Scope em http://localhost:5001")
+    main()
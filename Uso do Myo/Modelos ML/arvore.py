@@ -2,11 +2,8 @@ import pandas as pd
 import numpy as np
 from sklearn.tree import DecisionTreeClassifier
 
-from matplotlib import pyplot as plt
-from matplotlib.animation import FuncAnimation
-from collections import deque
-from threading import Lock
 import myo
+from myo.plot import BlitScope, RingBuffer
 
 # ==============================================================
 #  TREINO DO MODELO A PARTIR DO DATAFRAME (df)
@@ -35,19 +32,14 @@ print("Modelo de Árvore de Decisão treinado com todo o dataset (sem split).")
 class EmgCollector(myo.DeviceListener):
     def __init__(self, n):
         self.n = n
-        self.lock = Lock()
-        self.emg_data_queue = deque(maxlen=n)
-
-    def get_emg_data(self):
-        with self.lock:
-            return list(self.emg_data_queue)
+        # Buffer circular pré-alocado: cada evento grava só a nova amostra
+        self.buffer = RingBuffer(4 * n, 8)
 
     def on_connected(self, event):
         event.device.stream_emg(True)
 
     def on_emg(self, event):
-        with self.lock:
-            self.emg_data_queue.append((event.timestamp, event.emg))
+        self.buffer.append(event.emg)
 
 
 class Plot:
@@ -57,47 +49,26 @@ class Plot:
         self.model = model
         self.last_prediction = "Aguardando sinais..."
 
-        self.colors = ['b', 'g', 'r', 'c', 'm', 'y', 'orange', 'purple']
-
-        self.fig, self.axes = plt.subplots(8, 1, figsize=(10, 12), sharex=True)
-        for ax in self.axes:
-            ax.set_ylim([-100, 100])
-            ax.set_ylabel("EMG")
-            ax.grid(True)
-        self.graphs = [
-            ax.plot(np.arange(self.n), np.zeros(self.n), color=color)[0]
-            for ax, color in zip(self.axes, self.colors)
-        ]
-        self.fig.tight_layout(rect=[0, 0, 1, 0.96])
-        self.fig.suptitle(f"Predição: {self.last_prediction}", fontsize=16)
-
-    def update_plot(self, frame):
-        emg_data = self.listener.get_emg_data()
-        if not emg_data:
-            return self.graphs
-
-        emg_data = np.array([x[1] for x in emg_data]).T  # shape (8, n)
-
-        # Atualiza gráficos
-        for g, data in zip(self.graphs, emg_data):
-            if len(data) < self.n:
-                data = np.concatenate([np.zeros(self.n - len(data)), data])
-            g.set_ydata(data)
+        # Desenha só as linhas sobre o fundo em cache (blitting)
+        self.scope = BlitScope(listener.buffer, window=self.n, ylim=(-100, 100),
+                               ylabel="EMG")
+        self.scope.set_title(f"Predição: {self.last_prediction}")
+        self.scope.add_callback(self.predict)
 
+    def predict(self, scope):
         # Se já temos uma janela cheia (512 amostras), faz predição
-        if emg_data.shape[1] == self.n:
-            features = emg_data.mean(axis=1).reshape(1, -1)  # médias dos 8 canais
-            self.last_prediction = self.model.predict(features)[0]
-            print("Movimento detectado:", self.last_prediction)
-
-            # Atualiza título da figura com a predição
-            self.fig.suptitle(f"Predição: {self.last_prediction}", fontsize=16)
-
-        return self.graphs
+        if self.listener.buffer.total < self.n:
+            return
+        window = self.listener.buffer.latest(self.n)  # shape (n, 8)
+        features = window.mean(axis=0).reshape(1, -1)  # médias dos 8 canais
+        prediction = self.model.predict(features)[0]
+        if prediction != self.last_prediction:
+            print("Movimento detectado:", prediction)
+            self.last_prediction = prediction
+            scope.set_title(f"Predição: {self.last_prediction}")
 
     def main(self):
-        ani = FuncAnimation(self.fig, self.update_plot, interval=33, blit=False)
-        plt.show()
+        self.scope.show()
 
 
 def main():
@@ -1,111 +1,137 @@
+import sys
+
 import pandas as pd
 import numpy as np
 from sklearn.neighbors import KNeighborsClassifier
 
-from matplotlib import pyplot as plt
-from matplotlib.animation import FuncAnimation
-from collections import deque
-from threading import Lock
 import myo
+from myo.latency import LatencyTracer
+from myo.plot import BlitScope, RingBuffer
+from myo.registry import ModelRegistry
 
 # ==============================================================
-#  TREINO DO MODELO A PARTIR DO DATAFRAME (df)
+#  TREINO DOS MODELOS POR USUÁRIO
 # ==============================================================
 
-# Carrega seu DataFrame (ajuste o caminho se necessário)
-df = pd.read_csv("emg_protocol.csv", encoding='latin-1')
+# Dados de cada pessoa (ajuste os caminhos se necessário)
+DADOS = {
+    "padrao": "emg_protocol.csv",
+    "david": "emg_protocol_dados_david.csv",
+    "gabriel": "emg_protocol_dados_gabriel2.csv",
+}
+
+# MAC da pulseira -> usuário; ao conectar, o modelo do usuário é escolhido
+USUARIOS_POR_MAC = {}
+
+
+def treinar(caminho):
+    df = pd.read_csv(caminho, encoding='latin-1')
+
+    # Cria dataset com médias por dedo/movimento/repetição
+    dataset = df.groupby(["Dedo", "Movimento", "Repetição"])[[f"Canal{i}" for i in range(1, 9)]].mean().reset_index()
+    dataset["Label"] = dataset["Dedo"].astype(str) + "_" + dataset["Movimento"]
 
-# Cria dataset com médias por dedo/movimento/repetição
-dataset = df.groupby(["Dedo", "Movimento", "Repetição"])[[f"Canal{i}" for i in range(1, 9)]].mean().reset_index()
-dataset["Label"] = dataset["Dedo"].astype(str) + "_" + dataset["Movimento"]
+    X = dataset[[f"Canal{i}" for i in range(1, 9)]].values
+    y = dataset["Label"].values
 
-X = dataset[[f"Canal{i}" for i in range(1, 9)]].values
-y = dataset["Label"].values
+    # Treina o KNN com todo o dataset
+    knn = KNeighborsClassifier(n_neighbors=1)
+    knn.fit(X, y)
+    print(f"Modelo treinado com {caminho} (sem split).")
+    return knn
 
-# Treina o KNN com todo o dataset
-knn = KNeighborsClassifier(n_neighbors=1)
-knn.fit(X, y)
 
-print("Modelo treinado com todo o dataset (sem split).")
+# Os modelos treinados ficam salvos em "modelos/"; nas próximas execuções
+# são só carregados do disco, sem treinar de novo. Se o CSV mudar (novas
+# repetições gravadas pelo mapping.py), o modelo é treinado outra vez
+registry = ModelRegistry(cache_dir="modelos")
+for usuario, caminho in DADOS.items():
+    registry.register(usuario, lambda caminho=caminho: treinar(caminho),
+                      features={"janela": 512, "feature": "media"},
+                      sources=[caminho])
+for mac, usuario in USUARIOS_POR_MAC.items():
+    registry.bind(mac, usuario)
+
+# Avisa quando o p99 da latência ponta a ponta passa de 100 ms
+tracer = LatencyTracer(budget=0.1)
 
 # ==============================================================
 #  COLETA DE SINAL DO MYO
 # ==============================================================
 
 class EmgCollector(myo.DeviceListener):
-    def __init__(self, n):
+    def __init__(self, n, usuario):
         self.n = n
-        self.lock = Lock()
-        self.emg_data_queue = deque(maxlen=n)
-
-    def get_emg_data(self):
-        with self.lock:
-            return list(self.emg_data_queue)
+        self.usuario = usuario
+        # Buffer circular pré-alocado: cada evento grava só a nova amostra
+        self.buffer = RingBuffer(4 * n, 8)
+        self.span = None
 
     def on_connected(self, event):
         event.device.stream_emg(True)
+        # Troca para o modelo do dono da pulseira, se o MAC for conhecido
+        try:
+            self.usuario = registry.resolve(event.mac_address)
+        except KeyError:
+            pass
+        print("Usuário:", self.usuario)
 
     def on_emg(self, event):
-        with self.lock:
-            self.emg_data_queue.append((event.timestamp, event.emg))
+        self.buffer.append(event.emg)
+        # Latência: do timestamp do Myo até a predição, para a amostra mais nova
+        self.span = tracer.begin(event.timestamp)
 
 
 class Plot:
-    def __init__(self, listener, model):
+    def __init__(self, listener):
         self.n = listener.n
         self.listener = listener
-        self.model = model
         self.last_prediction = "Aguardando sinais..."
 
-        self.colors = ['b', 'g', 'r', 'c', 'm', 'y', 'orange', 'purple']
-
-        self.fig, self.axes = plt.subplots(8, 1, figsize=(10, 12), sharex=True)
-        for ax in self.axes:
-            ax.set_ylim([-100, 100])
-            ax.set_ylabel("EMG")
-            ax.grid(True)
-        self.graphs = [
-            ax.plot(np.arange(self.n), np.zeros(self.n), color=color)[0]
-            for ax, color in zip(self.axes, self.colors)
-        ]
-        self.fig.tight_layout(rect=[0, 0, 1, 0.96])
-        self.fig.suptitle(f"Predição: {self.last_prediction}", fontsize=16)
-
-    def update_plot(self, frame):
-        emg_data = self.listener.get_emg_data()
-        if not emg_data:
-            return self.graphs
-
-        emg_data = np.array([x[1] for x in emg_data]).T  # shape (8, n)
-
-        # Atualiza gráficos
-        for g, data in zip(self.graphs, emg_data):
-            if len(data) < self.n:
-                data = np.concatenate([np.zeros(self.n - len(data)), data])
-            g.set_ydata(data)
+        # Desenha só as linhas sobre o fundo em cache (blitting)
+        self.scope = BlitScope(listener.buffer, window=self.n, ylim=(-100, 100),
+                               ylabel="EMG")
+        self.scope.set_title(f"Predição: {self.last_prediction}")
+        self.scope.add_callback(self.predict)
 
+    def predict(self, scope):
         # Se já temos uma janela cheia (512 amostras), faz predição
-        if emg_data.shape[1] == self.n:
-            features = emg_data.mean(axis=1).reshape(1, -1)  # médias dos 8 canais
-            self.last_prediction = self.model.predict(features)[0]
-            print("Movimento detectado:", self.last_prediction)
-
-            # Atualiza título da figura com a predição
-            self.fig.suptitle(f"Predição: {self.last_prediction}", fontsize=16)
-
-        return self.graphs
+        span = self.listener.span
+        if self.listener.buffer.total < self.n or span is None or span.finished:
+            return
+        window = self.listener.buffer.latest(self.n)  # shape (n, 8)
+        span.mark('buffer')
+        features = window.mean(axis=0).reshape(1, -1)  # médias dos 8 canais
+        span.mark('feature')
+        # Modelo já carregado: só uma consulta ao LRU do registry
+        model = registry.get(self.listener.usuario).model
+        prediction = model.predict(features)[0]
+        span.mark('prediction')
+        if prediction != self.last_prediction:
+            print("Movimento detectado:", prediction)
+            self.last_prediction = prediction
+            scope.set_title(f"Predição: {self.last_prediction}")
+        span.mark('consumer')
+        span.finish()
 
     def main(self):
-        ani = FuncAnimation(self.fig, self.update_plot, interval=33, blit=False)
-        plt.show()
+        self.scope.show()
 
 
 def main():
+    usuario = sys.argv[1] if len(sys.argv) > 1 else "padrao"
+    # Carrega em segundo plano os modelos de quem deve usar a estação
+    registry.preload(DADOS)
+    registry.get(usuario)
+
     myo.init()
     hub = myo.Hub()
-    listener = EmgCollector(512)
+    listener = EmgCollector(512, usuario)
     with hub.run_in_background(listener.on_event):
-        Plot(listener, knn).main()
+        Plot(listener).main()
+    registry.close()
+    print("Latência por etapa (ms):")
+    print(tracer.report())
 
 
 if __name__ == '__main__':
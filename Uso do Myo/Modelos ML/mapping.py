@@ -1,10 +1,10 @@
-import time
 import csv
 from collections import deque
-from threading import Lock
+from threading import Event, Lock
 
 import myo
 import numpy as np
+from myo.utils import Scheduler
 
 
 class EmgCollector(myo.DeviceListener):
@@ -18,6 +18,13 @@ class EmgCollector(myo.DeviceListener):
         with self.lock:
             return list(self.emg_data_queue)
 
+    def pop_emg_data(self):
+        """Retorna e remove as amostras da fila."""
+        with self.lock:
+            data = list(self.emg_data_queue)
+            self.emg_data_queue.clear()
+            return data
+
     def on_connected(self, event):
         event.device.stream_emg(True)
 
@@ -26,7 +33,33 @@ class EmgCollector(myo.DeviceListener):
             self.emg_data_queue.append((event.timestamp, event.emg))
 
 
-def run_protocol(listener, duration=10, fingers=5, repetitions=5):
+def collect_window(listener, scheduler, duration, drain_interval=0.25):
+    """Coleta as amostras de EMG de uma janela de `duration` segundos.
+
+    A fila do listener é esvaziada a cada `drain_interval` segundos, então
+    janelas maiores que a fila não perdem amostras. O fim da janela e os
+    esvaziamentos são tarefas do Scheduler, com prazos fixos a partir do
+    início (sem deriva), e rodam todos na mesma thread.
+    """
+    samples = []
+    done = Event()
+    listener.pop_emg_data()  # descarta dados antigos
+
+    def drain():
+        samples.extend(listener.pop_emg_data())
+
+    def finish():
+        drain_task.cancel()
+        drain()
+        done.set()
+
+    drain_task = scheduler.every(drain_interval, drain)
+    scheduler.after(duration, finish)
+    done.wait()
+    return samples
+
+
+def run_protocol(listener, scheduler, duration=10, fingers=5, repetitions=5):
     all_data = []
 
     for finger in range(1, fingers + 1):
@@ -34,13 +67,8 @@ def run_protocol(listener, duration=10, fingers=5, repetitions=5):
         for movement in ['Extensão', 'Flexão']:
             for rep in range(1, repetitions + 1):
                 input(f"\nDedo {finger} - {movement} (Repetição {rep}/{repetitions}). Pressione Enter para iniciar...")
-                listener.emg_data_queue.clear()
-
-                start_time = time.time()
-                while time.time() - start_time < duration:
-                    time.sleep(0.01)
-
-                emg_data = listener.get_emg_data()
+                # O listener coleta na thread do hub; o Scheduler marca a janela.
+                emg_data = collect_window(listener, scheduler, duration)
                 for row in emg_data:
                     all_data.append([finger, movement, rep, row[0]] + list(row[1]))
 
@@ -60,8 +88,13 @@ def main():
     myo.init()
     hub = myo.Hub()
     listener = EmgCollector(512)
-    with hub.run_in_background(listener.on_event):
-        run_protocol(listener, duration=1, fingers=5, repetitions=30)
+    scheduler = Scheduler()
+    scheduler.start()
+    try:
+        with hub.run_in_background(listener.on_event):
+            run_protocol(listener, scheduler, duration=1, fingers=5, repetitions=30)
+    finally:
+        scheduler.stop()
 
 
 if __name__ == "__main__":
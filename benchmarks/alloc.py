@@ -0,0 +1,384 @@
+"""
+Allocation checks for the per-event path. Drives synthetic events from the
+fake libmyo (see fakemyo.py) through the #myo.Hub callback and a number of
+handlers and listeners with #tracemalloc enabled, and reports per event
+and stage:
+
+* dispatch: the memory that the hub callback allocates before the handler
+  is entered (the #myo.Event wrapper and what libmyo hands back),
+* handler: the memory the handler allocates on top of that while it runs,
+* retained: the memory that is still allocated after the run (growing
+  buffers, caches, leaks), and the number of blocks behind it.
+
+The dispatch and handler figures are high-water marks in bytes, measured
+around every single event. Memory that is freed again within the event
+still counts, so a path that allocates and frees a list per event does
+not look allocation-free.
+
+    $ python benchmarks/alloc.py
+    $ python benchmarks/alloc.py --filter emg --events 50000 --output alloc.json
+    $ python benchmarks/alloc.py --budget budgets.json
+
+The exit code is 1 if a stage exceeds its budget. On Python before 3.9
+(no `tracemalloc.reset_peak()`), only the retained budgets are checked. The budgets are the
+mean bytes per event, `{stage: {"dispatch": ..., "handler": ..., "retained":
+...}}`; the defaults are in #BUDGETS and a `--budget` file overrides them
+per stage and key.
+"""
+
+import argparse
+import collections
+import gc
+import itertools
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import myo
+from myo.math import Quaternion, Vector
+
+#: name -> function that receives the #myo.Hub and returns the handler.
+STAGES = collections.OrderedDict()
+
+#: Default budgets in bytes per event. Stages without an entry are only
+#: reported. The #myo.Event wrapper is budgeted once, in `hub.dispatch`.
+#: The EMG values are Python ints, and the ones outside of the small-int
+#: cache (-5 to 256) are allocated, so even `emg_into()` is not free.
+BUDGETS = {
+  'hub.dispatch': {'dispatch': 256, 'handler': 0, 'retained': 1},
+  'hub.event_emg': {'handler': 400, 'retained': 1},
+  'hub.event_emg_into': {'handler': 100, 'retained': 1},
+  'hub.event_orientation_into': {'handler': 16, 'retained': 1},
+  'hub.listener_dispatch': {'handler': 64, 'retained': 1},
+  'hub.api_listener': {'handler': 512, 'retained': 1},
+  'hub.metrics': {'handler': 256, 'retained': 1},
+  'plot.ring_buffer': {'handler': 160, 'retained': 1},
+  'math.inplace': {'dispatch': 256, 'handler': 0, 'retained': 1},
+}
+
+
+class Skip(Exception):
+  pass
+
+
+def stage(name):
+  def decorator(make_handler):
+    STAGES[name] = make_handler
+    return make_handler
+  return decorator
+
+
+# The handlers must not return the accessed values; Hub.run() would
+# interpret them as a HandlerResult.
+
+@stage('hub.dispatch')
+def _(hub):
+  return lambda event: None
+
+
+@stage('hub.event_emg')
+def _(hub):
+  emg = myo.EventType.emg
+  def handler(event):
+    if event.type == emg:
+      event.emg
+  return handler
+
+
+@stage('hub.event_emg_into')
+def _(hub):
+  emg = myo.EventType.emg
+  out = [0] * 8
+  def handler(event):
+    if event.type == emg:
+      event.emg_into(out)
+  return handler
+
+
+@stage('hub.event_orientation_into')
+def _(hub):
+  orientation = myo.EventType.orientation
+  quat, accel, gyro = Quaternion.identity(), Vector(0, 0, 0), Vector(0, 0, 0)
+  def handler(event):
+    if event.type == orientation:
+      event.orientation_into(quat)
+      event.acceleration_into(accel)
+      event.gyroscope_into(gyro)
+  return handler
+
+
+@stage('hub.listener_dispatch')
+def _(hub):
+  class Listener(myo.DeviceListener):
+    def on_emg(self, event):
+      pass
+    def on_orientation(self, event):
+      pass
+  return Listener()
+
+
+@stage('hub.api_listener')
+def _(hub):
+  return myo.ApiDeviceListener()
+
+
+@stage('hub.metrics')
+def _(hub):
+  # What Hub.run() calls after the handler when Hub.metrics is set.
+  from myo.metrics import HubMetrics
+  metrics = HubMetrics()
+  def handler(event):
+    metrics.record(event, 1.0, 1.0001)
+  return handler
+
+
+@stage('plot.ring_buffer')
+def _(hub):
+  # The EmgCollector of the scripts, without the per-event list.
+  try:
+    from myo.plot import RingBuffer
+  except ImportError as exc:
+    raise Skip(exc)
+  buffer = RingBuffer(512, 8)
+  emg = myo.EventType.emg
+  row = [0] * 8
+  def handler(event):
+    if event.type == emg:
+      buffer.append(event.emg_into(row))
+  return handler
+
+
+@stage('math.inplace')
+def _(hub):
+  # The steady-state orientation loop of the in-place math API: integrate
+  # a rotation step, rotate a vector and accumulate it. It does not use the
+  # event and must not allocate at all.
+  quat = Quaternion.identity()
+  step = Quaternion.rotation_of(Vector(1, 0, 0), Vector(0.999, 0.0447, 0))
+  accel, world, total = Vector(0, 0, -1), Vector(0, 0, 0), Vector(0, 0, 0)
+  def handler(event):
+    quat.imul(step).inormalize()
+    quat.rotate_into(accel, world)
+    total.iadd(world).iscale(0.5)
+    accel.set(world.x, world.y, -1.0).inormalize()
+  return handler
+
+
+# Measurement
+# ===========
+
+#: tracemalloc.reset_peak() is new in Python 3.9. Without it, every call
+#: is measured in a tracing window of its own (which drops the traces, so
+#: the retained memory is measured in a separate pass).
+_RESET_PEAK = hasattr(tracemalloc, 'reset_peak')
+
+
+def _measure(func, *args):
+  # The int that holds *current* is allocated after the value is read and
+  # counts into the peak; the calibrated overhead is subtracted for that.
+  if not _RESET_PEAK:
+    tracemalloc.stop()
+    tracemalloc.start()
+    result = func(*args)
+    return result, tracemalloc.get_traced_memory()[1]
+  current = tracemalloc.get_traced_memory()[0]
+  tracemalloc.reset_peak()
+  result = func(*args)
+  return result, tracemalloc.get_traced_memory()[1] - current
+
+
+def _calibrate(n=1000):
+  started = tracemalloc.is_tracing()
+  if not started:
+    tracemalloc.start()
+  try:
+    return min(_measure(_noop, None)[1] for _ in itertools.repeat(None, n))
+  finally:
+    if not started:
+      tracemalloc.stop()
+
+
+def _noop(*args):
+  pass
+
+
+class Probe(object):
+  """
+  Wraps a handler and measures the tracemalloc high-water mark of every
+  call (handler). The dispatch figure is measured by constructing a second
+  #myo.Event for the same libmyo event, which is what the hub callback does
+  before it calls the handler.
+  """
+
+  def __init__(self, handler):
+    if not callable(handler):
+      handler = handler.on_event
+    self.handler = handler
+    self.overhead = _calibrate()
+    self.reset()
+
+  def reset(self):
+    self.events = 0
+    self.dispatch = 0
+    self.dispatch_max = 0
+    self.handler_bytes = 0
+    self.handler_max = 0
+
+  def __call__(self, event):
+    _, used = _measure(myo.Event, event.handle)
+    used -= self.overhead
+    self.dispatch += used
+    if used > self.dispatch_max:
+      self.dispatch_max = used
+    result, used = _measure(self.handler, event)
+    used -= self.overhead
+    self.events += 1
+    self.handler_bytes += used
+    if used > self.handler_max:
+      self.handler_max = used
+    return result
+
+
+def _filters():
+  return [tracemalloc.Filter(False, tracemalloc.__file__),
+          tracemalloc.Filter(False, __file__)]
+
+
+def measure(name, events, warmup=1000):
+  """
+  Measures the stage *name* over *events* events and returns a dictionary
+  with the mean and maximum bytes per event.
+  """
+
+  hub = myo.Hub()
+  handler = STAGES[name](hub)
+  hub.run(handler, 2)   # paired and connected
+  probe = Probe(handler)
+  hub.run(probe, warmup)   # not traced, fills caches and free lists
+  gc.collect()
+  gc.disable()
+  tracemalloc.start()
+  try:
+    # A traced warm-up, so that one-time allocations (the first traced
+    # calls, the regexes that the snapshot filters compile) are not
+    # charged to the stage, whatever the number of events.
+    hub.run(probe, warmup)
+    tracemalloc.take_snapshot().filter_traces(_filters())
+    probe.reset()
+    if _RESET_PEAK:
+      before = tracemalloc.take_snapshot().filter_traces(_filters())
+      hub.run(probe, events)
+    else:
+      hub.run(probe, events)
+      tracemalloc.stop()
+      tracemalloc.start()
+      before = tracemalloc.take_snapshot().filter_traces(_filters())
+      hub.run(probe.handler, events)
+    after = tracemalloc.take_snapshot().filter_traces(_filters())
+  finally:
+    tracemalloc.stop()
+    gc.enable()
+
+  diff = after.compare_to(before, 'lineno')
+  retained = sum(d.size_diff for d in diff)
+  blocks = sum(d.count_diff for d in diff)
+  n = max(1, probe.events)
+  return collections.OrderedDict([
+    ('events', probe.events),
+    ('dispatch', probe.dispatch / n),
+    ('dispatch_max', probe.dispatch_max),
+    ('handler', probe.handler_bytes / n),
+    ('handler_max', probe.handler_max),
+    ('retained', retained / n),
+    ('retained_blocks', blocks / n),
+    ('sites', ['{}: {:+d} B'.format(d.traceback, d.size_diff)
+               for d in diff[:3] if d.size_diff > 0]),
+  ])
+
+
+def check(results, budgets):
+  """
+  Returns a list of `(stage, key, value, budget)` for every budget that is
+  exceeded.
+  """
+
+  failures = []
+  for name, result in results.items():
+    for key, budget in budgets.get(name, {}).items():
+      if result[key] > budget:
+        failures.append((name, key, result[key], budget))
+  return failures
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--filter', action='append', default=[],
+                      help='only run stages whose name contains this string')
+  parser.add_argument('--events', type=int, default=20000)
+  parser.add_argument('--budget', help='JSON file with budgets that override the defaults')
+  parser.add_argument('--output', help='write the results to this JSON file')
+  parser.add_argument('--list', action='store_true')
+  args = parser.parse_args(argv)
+
+  names = [n for n in STAGES if not args.filter or any(f in n for f in args.filter)]
+  if args.list:
+    print('\n'.join(names))
+    return 0
+
+  budgets = {k: dict(v) for k, v in BUDGETS.items()}
+  if args.budget:
+    with open(args.budget) as fp:
+      for name, values in json.load(fp).items():
+        budgets.setdefault(name, {}).update(values)
+
+  try:
+    import fakemyo
+    fakemyo.init(devices=1)
+  except Exception as exc:
+    print('fake libmyo not available: {}'.format(exc))
+    return 2
+
+  results = collections.OrderedDict()
+  print('{:<28} {:>10} {:>10} {:>10} {:>10} {:>10}'.format(
+    'stage (B/event)', 'dispatch', 'max', 'handler', 'max', 'retained'))
+  for name in names:
+    try:
+      result = results[name] = measure(name, args.events)
+    except Skip as exc:
+      print('{:<28} skipped ({})'.format(name, exc))
+      continue
+    print('{:<28} {:>10.1f} {:>10d} {:>10.1f} {:>10d} {:>10.2f}'.format(
+      name, result['dispatch'], result['dispatch_max'], result['handler'],
+      result['handler_max'], result['retained']))
+
+  if args.output:
+    with open(args.output, 'w') as fp:
+      json.dump({'events': args.events, 'budgets': budgets, 'results': results}, fp, indent=2)
+
+  if not _RESET_PEAK:
+    # Without tracemalloc.reset_peak(), a tracing window per call does not
+    # see the frees of older objects, so a handler that replaces an object
+    # is charged for the new one. Those figures are upper bounds.
+    print()
+    print('note: Python < 3.9, dispatch and handler are upper bounds; only '
+          'the retained budgets are checked')
+    budgets = {k: {key: v for key, v in values.items() if key == 'retained'}
+               for k, values in budgets.items()}
+  failures = check(results, budgets)
+  if failures:
+    print()
+    for name, key, value, budget in failures:
+      print('{}: {} {:.1f} B/event exceeds the budget of {} B/event'.format(
+        name, key, value, budget))
+      if key == 'retained':
+        for site in results[name]['sites']:
+          print('  ' + site)
+    return 1
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Benchmarks #myo.aggregate.EmgAggregator with 4 and more devices.
+
+The first table runs the hub (with the synthetic libmyo from fakemyo.py)
+with the aggregator as handler and reports the cost per event. The second
+replays the streams of #myo.loadgen.LoadGenerator with packet loss,
+timestamp jitter and a delivery skew between the devices (device *i*
+arrives *i* times `--skew` seconds late) and reports how many samples had
+to be filled in or were dropped as late, and the age of the rows when
+they were emitted (delivery time minus tick timestamp). Devices that are
+skewed by more than `--max-delay` lose their samples as late.
+
+    $ python benchmarks/bench_aggregate.py --devices 4,8,16
+    $ python benchmarks/bench_aggregate.py --loss 0.05 --skew 0.01 --max-delay 0.05
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import myo
+from myo.aggregate import EmgAggregator
+from myo.loadgen import LoadGenerator, deliver
+from myo.metrics import LogHistogram
+
+
+def bench_hub(num_devices, events, max_delay):
+  import fakemyo
+  fakemyo.set_devices(num_devices)
+  hub = myo.Hub()
+  aggregator = EmgAggregator(num_devices, max_delay=max_delay, max_rows=1024)
+  state = {'count': 0}
+
+  def handler(event):
+    aggregator.on_event(event)
+    state['count'] += 1
+    if state['count'] % 512 == 0:
+      aggregator.pop_rows()
+
+  start = time.perf_counter()
+  hub.run(handler, events)
+  elapsed = time.perf_counter() - start
+  return elapsed / events, aggregator.rows / elapsed
+
+
+def bench_alignment(num_devices, duration, loss, jitter, skew, max_delay):
+  gen = LoadGenerator(num_devices, loss=loss, jitter=jitter, seed=num_devices,
+                      start_timestamp=1000000)
+  events = gen.events(duration)
+  # Deliver every device late by index * skew (as seen by the hub thread).
+  events.sort(key=lambda e: e.timestamp + int(e.device.index * skew * 1e6))
+  lag = LogHistogram()
+  current = [0]
+
+  def on_rows(rows):
+    for timestamp in rows.timestamps:
+      lag.record((current[0] - timestamp) * 1e-6)
+
+  aggregator = EmgAggregator(num_devices, max_delay=max_delay, on_rows=on_rows)
+
+  def handler(event):
+    current[0] = event.timestamp + int(event.device.index * skew * 1e6)
+    aggregator.on_event(event)
+
+  deliver(events, handler)
+  stats = aggregator.stats()
+  emg = sum(1 for e in events if e.type == myo.EventType.emg)
+  missing = sum(d['missing'] for d in stats['devices'])
+  late = sum(d['late'] for d in stats['devices'])
+  return {
+    'rows': stats['rows'],
+    'missing': missing / float(stats['rows'] * num_devices or 1),
+    'late': late / float(emg or 1),
+    'lag': lag.snapshot(),
+  }
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--devices', type=lambda s: [int(x) for x in s.split(',')],
+                      default=[4, 8, 16])
+  parser.add_argument('--events', type=int, default=200000)
+  parser.add_argument('--duration', type=float, default=20.0,
+                      help='seconds of generated data for the alignment test')
+  parser.add_argument('--loss', type=float, default=0.02)
+  parser.add_argument('--jitter', type=float, default=0.001)
+  parser.add_argument('--skew', type=float, default=0.002)
+  parser.add_argument('--max-delay', type=float, default=0.05)
+  args = parser.parse_args(argv)
+
+  import fakemyo
+  fakemyo.init(devices=max(args.devices))
+
+  print('{:<8} {:>12} {:>12}'.format('devices', 'us/event', 'rows/s'))
+  for n in args.devices:
+    per_event, rows = bench_hub(n, args.events, args.max_delay)
+    print('{:<8} {:>12.2f} {:>12.0f}'.format(n, per_event * 1e6, rows))
+
+  print()
+  print('{:<8} {:>8} {:>9} {:>9} {:>9} {:>9} {:>9}'.format(
+    'devices', 'rows', 'missing', 'late', 'lag p50', 'lag p99', 'lag max'))
+  for n in args.devices:
+    result = bench_alignment(n, args.duration, args.loss, args.jitter,
+                             args.skew, args.max_delay)
+    lag = result['lag']
+    print('{:<8} {:>8d} {:>8.2f}% {:>8.2f}% {:>7.1f}ms {:>7.1f}ms {:>7.1f}ms'.format(
+      n, result['rows'], result['missing'] * 100, result['late'] * 100,
+      lag['p50'] * 1e3, lag['p99'] * 1e3, lag['max'] * 1e3))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,42 @@
+"""
+Measures the offline throughput of the #myo.fusion filters.
+
+    $ python benchmarks/bench_fusion.py --samples 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+from myo import fusion
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--samples', type=int, default=1000000)
+  parser.add_argument('--block', type=int, default=0,
+                      help='feed the filter in blocks of this size (0 = all at once)')
+  args = parser.parse_args(argv)
+
+  rng = np.random.RandomState(0)
+  gyro = rng.normal(scale=30.0, size=(args.samples, 3))
+  accel = rng.normal(scale=0.1, size=(args.samples, 3)) + (0.0, 0.0, 1.0)
+  block = args.block or args.samples
+
+  print('compiled kernels:', fusion._jit is not None)
+  for cls in (fusion.MadgwickFilter, fusion.ComplementaryFilter):
+    filt = cls()
+    filt.update(gyro[:10], accel[:10])  # warm up / compile
+    start = time.perf_counter()
+    for i in range(0, args.samples, block):
+      filt.update(gyro[i:i + block], accel[i:i + block])
+    elapsed = time.perf_counter() - start
+    print('{:<20} {:>10.2f} M samples/s'.format(cls.__name__, args.samples / elapsed / 1e6))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,119 @@
+"""
+Throughput and latency of #myo.inference.InferenceServer as the number of
+user streams grows, compared with one `model.predict()` call per stream
+and frame (the pattern of knn.py and arvore.py).
+
+Every stream submits one feature vector (the 8 channel means of a window)
+per frame at `--rate` frames per second. The *direct* columns give the
+cost of a `(1, 8)` predict call and the fraction of the frame period that
+N such calls take (above 100% the streams cannot be served in real time).
+The *batched* columns give the achieved predictions per second, the
+latency from submit to result and the mean batch size.
+
+    $ python benchmarks/bench_inference.py --streams 1,4,16,64,256
+    $ python benchmarks/bench_inference.py --model tree --max-delay 0.002
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from myo.inference import InferenceServer
+
+
+def make_model(kind, seed=0):
+  rnd = np.random.RandomState(seed)
+  centers = rnd.uniform(-40, 40, (10, 8))
+  X = np.concatenate([c + rnd.normal(0, 5, (20, 8)) for c in centers])
+  y = np.repeat(['class{}'.format(i) for i in range(10)], 20)
+  if kind == 'knn':
+    from sklearn.neighbors import KNeighborsClassifier
+    model = KNeighborsClassifier(n_neighbors=1)
+  else:
+    from sklearn.tree import DecisionTreeClassifier
+    model = DecisionTreeClassifier(random_state=seed)
+  return model.fit(X, y), centers
+
+
+def bench_direct(model, features, calls=300):
+  start = time.perf_counter()
+  for i in range(calls):
+    model.predict(features[i % len(features)].reshape(1, -1))
+  return (time.perf_counter() - start) / calls
+
+
+def bench_batched(model, features, streams, rate, duration, max_delay):
+  server = InferenceServer(max_delay=max_delay)
+  period = 1.0 / rate
+  stop = threading.Event()
+
+  def produce():
+    deadline = time.perf_counter()
+    frame = 0
+    while not stop.is_set():
+      for stream in range(streams):
+        server.submit(model, features[(frame + stream) % len(features)], key=stream)
+      frame += 1
+      deadline += period
+      delay = deadline - time.perf_counter()
+      if delay > 0:
+        time.sleep(delay)
+
+  with server.run_in_background():
+    producer = threading.Thread(target=produce)
+    producer.start()
+    time.sleep(0.5)  # warmup
+    server.latency.reset()
+    predictions = server.predictions
+    batches = server.batches
+    start = time.perf_counter()
+    time.sleep(duration)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    producer.join()
+    snapshot = server.snapshot()
+  count = snapshot['predictions'] - predictions
+  return {
+    'throughput': count / elapsed,
+    'latency': snapshot['latency'],
+    'batch': count / float(snapshot['batches'] - batches or 1),
+    'superseded': snapshot['superseded'],
+  }
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--streams', type=lambda s: [int(x) for x in s.split(',')],
+                      default=[1, 4, 16, 64, 256])
+  parser.add_argument('--model', choices=['knn', 'tree'], default='knn')
+  parser.add_argument('--rate', type=float, default=50.0, help='frames per second and stream')
+  parser.add_argument('--duration', type=float, default=3.0)
+  parser.add_argument('--max-delay', type=float, default=0.005)
+  args = parser.parse_args(argv)
+
+  model, centers = make_model(args.model)
+  features = centers + np.random.RandomState(1).normal(0, 5, centers.shape)
+  per_call = bench_direct(model, features)
+
+  print('model: {}, {:.0f} frames/s per stream, max_delay {:.1f} ms, direct predict '
+        '{:.0f} us/call'.format(args.model, args.rate, args.max_delay * 1e3, per_call * 1e6))
+  print('{:<8} {:>10} {:>12} {:>10} {:>10} {:>8} {:>10}'.format(
+    'streams', 'direct', 'batched/s', 'p50 ms', 'p99 ms', 'batch', 'superseded'))
+  for streams in args.streams:
+    load = streams * per_call * args.rate
+    result = bench_batched(model, features, streams, args.rate, args.duration,
+                           args.max_delay)
+    latency = result['latency']
+    print('{:<8} {:>9.0f}% {:>12.0f} {:>10.2f} {:>10.2f} {:>8.1f} {:>10d}'.format(
+      streams, load * 100, result['throughput'], (latency['p50'] or 0) * 1e3,
+      (latency['p99'] or 0) * 1e3, result['batch'], result['superseded']))
+
+
+if __name__ == '__main__':
+  main()
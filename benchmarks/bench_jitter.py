@@ -0,0 +1,93 @@
+"""
+Measures the inter-callback jitter of the hub thread with and without
+#myo.realtime.LowJitter, using the synthetic libmyo from fakemyo.py. The
+handler produces some cyclic garbage per event and the process holds a
+large heap of long-lived objects (like a loaded model), so the automatic
+full collections show up as pauses between two callbacks.
+
+    $ python benchmarks/bench_jitter.py --events 300000 --heap 2000000
+    $ python benchmarks/bench_jitter.py --hub-cpus 2 --nice -5
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import myo
+from myo.metrics import HubMetrics, LogHistogram
+from myo.realtime import LowJitter
+
+
+def run(events, realtime, duration_ms=1000):
+  hub = myo.Hub()
+  hub.metrics = HubMetrics()
+  hub.realtime = realtime
+  pauses = LogHistogram()
+  started = []
+
+  def on_gc(phase, info):
+    if phase == 'start':
+      started.append(time.perf_counter())
+    elif started:
+      pauses.record(time.perf_counter() - started.pop())
+
+  state = {'count': 0, 'kept': []}
+  def handler(event):
+    node = {'event': event.type}
+    node['self'] = node  # cyclic garbage
+    state['count'] += 1
+    if state['count'] % 1000 == 0:
+      state['kept'].append([0] * 100)
+    if state['count'] >= events:
+      hub.stop()
+
+  if realtime is not None:
+    realtime.start()  # the initial collection and freeze are not measured
+  gc.callbacks.append(on_gc)
+  try:
+    hub.run_forever(handler, duration_ms)
+  finally:
+    gc.callbacks.remove(on_gc)
+    if realtime is not None:
+      realtime.stop()
+  series = hub.metrics.snapshot()['events']['emg']['0']
+  return series['interval'], pauses.snapshot()
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--events', type=int, default=300000)
+  parser.add_argument('--heap', type=int, default=2000000,
+                      help='number of long-lived objects in the process')
+  parser.add_argument('--gc-interval', type=float, default=0.1)
+  parser.add_argument('--hub-cpus', type=lambda s: {int(x) for x in s.split(',')})
+  parser.add_argument('--nice', type=int)
+  args = parser.parse_args(argv)
+
+  import fakemyo
+  fakemyo.init(devices=1)
+  heap = [(i, [i]) for i in range(args.heap // 2)]
+
+  modes = [
+    ('default', None),
+    ('low-jitter', LowJitter(gc_interval=args.gc_interval, hub_cpus=args.hub_cpus,
+                             nice=args.nice)),
+  ]
+  print('{:<12} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9}'.format(
+    'interval us', 'p50', 'p99', 'p99.9', 'max', 'gc runs', 'gc max'))
+  for name, realtime in modes:
+    interval, pauses = run(args.events, realtime)
+    print('{:<12} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f} {:>9d} {:>9.1f}'.format(
+      name, interval['p50'] * 1e6, interval['p99'] * 1e6, interval['p999'] * 1e6,
+      interval['max'] * 1e6, pauses['count'], (pauses['max'] or 0.0) * 1e6))
+    if realtime is not None and realtime.applied['hub']:
+      print('{:<12} applied: {}'.format('', ', '.join(realtime.applied['hub'])))
+  del heap
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,87 @@
+"""
+Compares the scalar #myo.math classes against the NumPy-backed batch
+counterparts on a recorded-orientation-sized workload.
+
+    $ python benchmarks/bench_math.py --samples 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+from myo.math import Quaternion, Vector, QuaternionArray, VectorArray
+
+
+def make_data(samples, seed=0):
+  rng = np.random.RandomState(seed)
+  quats = rng.normal(size=(samples, 4))
+  quats /= np.linalg.norm(quats, axis=1)[:, None]
+  vecs = rng.normal(size=(samples, 3))
+  return quats, vecs
+
+
+def bench_scalar(quats, vecs):
+  quats = [Quaternion(*q) for q in quats.tolist()]
+  vecs = [Vector(*v) for v in vecs.tolist()]
+  results = {}
+
+  start = time.perf_counter()
+  for q, v in zip(quats, vecs):
+    q.rotate(v)
+  results['rotate'] = time.perf_counter() - start
+
+  start = time.perf_counter()
+  for q in quats:
+    q * q
+  results['multiply'] = time.perf_counter() - start
+
+  start = time.perf_counter()
+  for q in quats:
+    q.rpy
+  results['rpy'] = time.perf_counter() - start
+
+  return results
+
+
+def bench_array(quats, vecs):
+  qa = QuaternionArray(quats)
+  va = VectorArray(vecs)
+  results = {}
+
+  start = time.perf_counter()
+  qa.rotate(va)
+  results['rotate'] = time.perf_counter() - start
+
+  start = time.perf_counter()
+  qa * qa
+  results['multiply'] = time.perf_counter() - start
+
+  start = time.perf_counter()
+  qa.rpy
+  results['rpy'] = time.perf_counter() - start
+
+  return results
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--samples', type=int, default=1000000)
+  args = parser.parse_args(argv)
+
+  quats, vecs = make_data(args.samples)
+  scalar = bench_scalar(quats, vecs)
+  array = bench_array(quats, vecs)
+
+  print('{:<10} {:>14} {:>14} {:>9}'.format('op', 'scalar us/smp', 'array us/smp', 'speedup'))
+  for name in scalar:
+    s = scalar[name] / args.samples * 1e6
+    a = array[name] / args.samples * 1e6
+    print('{:<10} {:>14.3f} {:>14.4f} {:>8.1f}x'.format(name, s, a, s / a))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,72 @@
+"""
+Measures the throughput and added latency of #myo.net streaming on the
+loopback interface, driven by the synthetic load generator.
+
+    $ python benchmarks/bench_net.py --mode udp --devices 4 --duration 5
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from myo import net
+from myo.loadgen import LoadGenerator, deliver
+
+
+def percentile(values, q):
+  values = sorted(values)
+  if not values:
+    return float('nan')
+  return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--mode', choices=['udp', 'tcp'], default='udp')
+  parser.add_argument('--devices', type=int, default=4)
+  parser.add_argument('--duration', type=float, default=5.0)
+  parser.add_argument('--batch-size', type=int, default=16)
+  parser.add_argument('--max-delay', type=float, default=0.01)
+  parser.add_argument('--flood', action='store_true',
+                      help='send as fast as possible instead of in real time')
+  args = parser.parse_args(argv)
+
+  server = net.StreamServer(('127.0.0.1', 0), args.mode, args.batch_size, args.max_delay)
+  client = net.StreamClient(server.address, args.mode)
+  latencies = []
+  counter = [0]
+
+  def on_event(event):
+    counter[0] += 1
+    if event.type.name in ('emg', 'orientation'):
+      latencies.append(time.time() * 1e6 - event.timestamp)
+
+  gen = LoadGenerator(num_devices=args.devices, seed=0, start_timestamp=0)
+  events = gen.events(args.duration)
+  with client.run_in_background(on_event, duration_ms=100) as thread:
+    time.sleep(0.5)  # Give the subscription time to arrive.
+    base = int(time.time() * 1e6)
+    for event in events:
+      event.timestamp += base
+    report = deliver(events, server, realtime=not args.flood)
+    server.flush()
+    time.sleep(0.5)
+  thread.join()
+  server.close()
+  client.close()
+
+  print('sent:     {} events in {:.2f}s ({:.0f} events/s), {} packets, {} bytes'.format(
+    report.events, report.elapsed, report.event_rate, server.packets_sent, server.bytes_sent))
+  print('received: {} events, {} packets, {} packets lost'.format(
+    counter[0], client.packets_received, client.packets_lost))
+  if not args.flood:
+    print('added latency (ms): p50 {:.2f}  p90 {:.2f}  p99 {:.2f}  max {:.2f}'.format(
+      *[percentile(latencies, q) / 1000.0 for q in (0.5, 0.9, 0.99, 1.0)]))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,96 @@
+"""
+Time to add one protocol repetition to a model: a full `fit()` of the
+scikit-learn classifiers on all the data (what the scripts do) against
+`partial_fit()` of #myo.online.IncrementalKNN and #myo.online.OnlineLDA
+with the new windows only. The update time of the online models includes
+the first prediction after the update (OnlineLDA solves its discriminant
+lazily). The accuracy is measured on held-out windows after the update.
+
+The data is synthetic: 10 classes (5 fingers, flexion and extension) of
+8-channel window means with per-class centers.
+
+    $ python benchmarks/bench_online.py --repetitions 30 --windows 64
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from myo.online import IncrementalKNN, OnlineLDA
+
+
+def make_data(rnd, centers, repetitions, windows):
+  labels = np.repeat(np.arange(len(centers)), repetitions * windows)
+  X = centers[labels] + rnd.normal(0, 12, (len(labels), centers.shape[1]))
+  y = np.array(['{}_{}'.format(l // 2 + 1, 'Flexao' if l % 2 else 'Extensao')
+                for l in labels])
+  return X, y
+
+
+def timed(func, repeat=3):
+  best = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--repetitions', type=int, default=30,
+                      help='repetitions per class that are already trained')
+  parser.add_argument('--windows', type=int, default=64,
+                      help='windows per repetition')
+  args = parser.parse_args(argv)
+
+  from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
+  from sklearn.neighbors import KNeighborsClassifier
+  from sklearn.tree import DecisionTreeClassifier
+
+  rnd = np.random.RandomState(0)
+  centers = rnd.uniform(-40, 40, (10, 8))
+  X, y = make_data(rnd, centers, args.repetitions, args.windows)
+  X_new, y_new = make_data(rnd, centers, 1, args.windows)
+  X_test, y_test = make_data(rnd, centers, 2, args.windows)
+  X_all, y_all = np.concatenate([X, X_new]), np.concatenate([y, y_new])
+
+  print('{} samples trained, {} new samples'.format(len(X), len(X_new)))
+  print('{:<28} {:>12} {:>10}'.format('model', 'update ms', 'accuracy'))
+
+  refits = [
+    ('KNeighborsClassifier.fit', lambda: KNeighborsClassifier(n_neighbors=1)),
+    ('DecisionTreeClassifier.fit', lambda: DecisionTreeClassifier(random_state=0)),
+    ('LinearDiscriminant.fit', LinearDiscriminantAnalysis),
+  ]
+  for name, factory in refits:
+    model = factory()
+    # A fitted KNN defers the work to the first prediction, so include it.
+    seconds = timed(lambda: model.fit(X_all, y_all).predict(X_test[:1]))
+    accuracy = (model.predict(X_test) == y_test).mean()
+    print('{:<28} {:>12.2f} {:>9.1f}%'.format(name, seconds * 1e3, accuracy * 100))
+
+  online = [
+    ('IncrementalKNN.partial_fit', lambda: IncrementalKNN(n_neighbors=1)),
+    ('OnlineLDA.partial_fit', OnlineLDA),
+  ]
+  for name, factory in online:
+    models = [factory().fit(X, y) for _ in range(3)]
+    it = iter(models)
+
+    def step():
+      model = next(it)
+      model.partial_fit(X_new, y_new).predict(X_test[:1])
+    seconds = timed(step)
+    accuracy = (models[0].predict(X_test) == y_test).mean()
+    print('{:<28} {:>12.2f} {:>9.1f}%'.format(name, seconds * 1e3, accuracy * 100))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,217 @@
+/*
+ * A stand-in for libmyo that produces synthetic events, so that the Python
+ * side of the callback path can be benchmarked without hardware. It
+ * implements the functions declared in myo/libmyo.h; see fakemyo.py.
+ *
+ * libmyo_run() does not wait: it delivers *duration_ms* events and returns.
+ * The first run of a hub starts with a paired and a connected event for
+ * every device. After that, every 5 ms of event time carries one EMG event
+ * per device and every fourth of them also an orientation event per device
+ * (200 Hz and 50 Hz, like the Myo). The number of devices is read from the
+ * FAKEMYO_DEVICES environment variable (default 1).
+ */
+
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#define MAX_DEVICES 256
+
+enum {
+  EV_PAIRED = 0, EV_CONNECTED = 2, EV_ORIENTATION = 6, EV_EMG = 11
+};
+
+typedef struct {
+  uint64_t mac_address;
+  int stream_emg;
+} fake_device;
+
+typedef struct {
+  uint32_t type;
+  uint64_t timestamp;
+  fake_device* device;
+  int8_t emg[8];
+  float orientation[4];
+  float accelerometer[3];
+  float gyroscope[3];
+} fake_event;
+
+typedef struct {
+  int num_devices;
+  int started;
+  uint64_t tick;
+  int device;
+  int orientation_pending;
+  uint32_t seed;
+  fake_device devices[MAX_DEVICES];
+} fake_hub;
+
+typedef int (*handler_t)(void*, const void*);
+
+/* Errors are never produced. */
+const char* libmyo_error_cstring(void* e) { return ""; }
+int libmyo_error_kind(void* e) { return 0; }
+void libmyo_free_error_details(void* e) {}
+
+const char* libmyo_string_c_str(void* s) { return (const char*) s; }
+void libmyo_string_free(void* s) { free(s); }
+
+void* libmyo_mac_address_to_string(uint64_t mac) {
+  char* s = malloc(18);
+  snprintf(s, 18, "%02x-%02x-%02x-%02x-%02x-%02x",
+           (unsigned) (mac >> 40) & 0xff, (unsigned) (mac >> 32) & 0xff,
+           (unsigned) (mac >> 24) & 0xff, (unsigned) (mac >> 16) & 0xff,
+           (unsigned) (mac >> 8) & 0xff, (unsigned) mac & 0xff);
+  return s;
+}
+
+uint64_t libmyo_string_to_mac_address(const char* s) {
+  unsigned int b[6];
+  if (sscanf(s, "%x-%x-%x-%x-%x-%x", b, b + 1, b + 2, b + 3, b + 4, b + 5) != 6)
+    return 0;
+  uint64_t mac = 0;
+  for (int i = 0; i < 6; ++i) mac = (mac << 8) | b[i];
+  return mac;
+}
+
+int libmyo_init_hub(void** out_hub, const char* application_identifier, void** out_error) {
+  fake_hub* hub = calloc(1, sizeof(fake_hub));
+  const char* env = getenv("FAKEMYO_DEVICES");
+  hub->num_devices = env ? atoi(env) : 1;
+  if (hub->num_devices < 1) hub->num_devices = 1;
+  if (hub->num_devices > MAX_DEVICES) hub->num_devices = MAX_DEVICES;
+  hub->seed = 12345;
+  for (int i = 0; i < hub->num_devices; ++i)
+    hub->devices[i].mac_address = 0xD0C0FFEE0000ull + i;
+  *out_hub = hub;
+  if (out_error) *out_error = NULL;
+  return 0;
+}
+
+int libmyo_shutdown_hub(void* hub, void** out_error) {
+  free(hub);
+  if (out_error) *out_error = NULL;
+  return 0;
+}
+
+int libmyo_set_locking_policy(void* hub, int policy, void** out_error) {
+  if (out_error) *out_error = NULL;
+  return 0;
+}
+
+uint64_t libmyo_get_mac_address(void* myo) { return ((fake_device*) myo)->mac_address; }
+
+#define NOOP_COMMAND(name, ...) \
+  int name(void* myo, ##__VA_ARGS__, void** out_error) { \
+    if (out_error) *out_error = NULL; \
+    return 0; \
+  }
+
+NOOP_COMMAND(libmyo_vibrate, int type)
+NOOP_COMMAND(libmyo_myo_unlock, int type)
+NOOP_COMMAND(libmyo_myo_notify_user_action, int type)
+
+int libmyo_request_rssi(void* myo, void** out_error) {
+  if (out_error) *out_error = NULL;
+  return 0;
+}
+
+int libmyo_request_battery_level(void* myo, void** out_error) {
+  if (out_error) *out_error = NULL;
+  return 0;
+}
+
+int libmyo_myo_lock(void* myo, void** out_error) {
+  if (out_error) *out_error = NULL;
+  return 0;
+}
+
+int libmyo_set_stream_emg(void* myo, int emg, void** out_error) {
+  ((fake_device*) myo)->stream_emg = emg;
+  if (out_error) *out_error = NULL;
+  return 0;
+}
+
+#define EV(e) ((const fake_event*) (e))
+
+uint32_t libmyo_event_get_type(const void* e) { return EV(e)->type; }
+uint64_t libmyo_event_get_timestamp(const void* e) { return EV(e)->timestamp; }
+void* libmyo_event_get_myo(const void* e) { return EV(e)->device; }
+uint64_t libmyo_event_get_mac_address(const void* e) { return EV(e)->device->mac_address; }
+
+void* libmyo_event_get_myo_name(const void* e) {
+  char* s = malloc(16);
+  snprintf(s, 16, "Fake Myo");
+  return s;
+}
+
+unsigned int libmyo_event_get_firmware_version(const void* e, int component) {
+  static const unsigned int version[4] = {1, 5, 1970, 2};
+  return (component >= 0 && component < 4) ? version[component] : 0;
+}
+
+int libmyo_event_get_arm(const void* e) { return 0; }
+int libmyo_event_get_x_direction(const void* e) { return 0; }
+int libmyo_event_get_warmup_state(const void* e) { return 2; }
+int libmyo_event_get_warmup_result(const void* e) { return 1; }
+float libmyo_event_get_rotation_on_arm(const void* e) { return 0.0f; }
+float libmyo_event_get_orientation(const void* e, int index) { return EV(e)->orientation[index & 3]; }
+float libmyo_event_get_accelerometer(const void* e, unsigned int index) { return EV(e)->accelerometer[index % 3]; }
+float libmyo_event_get_gyroscope(const void* e, unsigned int index) { return EV(e)->gyroscope[index % 3]; }
+int libmyo_event_get_pose(const void* e) { return 0; }
+int8_t libmyo_event_get_rssi(const void* e) { return -60; }
+uint8_t libmyo_event_get_battery_level(const void* e) { return 100; }
+int8_t libmyo_event_get_emg(const void* e, unsigned int sensor) { return EV(e)->emg[sensor & 7]; }
+
+static uint32_t next_random(fake_hub* hub) {
+  hub->seed = hub->seed * 1664525u + 1013904223u;
+  return hub->seed >> 16;
+}
+
+/* Fills *ev* with the next event of the stream. */
+static void next_event(fake_hub* hub, fake_event* ev) {
+  memset(ev, 0, sizeof(*ev));
+  if (hub->started < 2 * hub->num_devices) {
+    int i = hub->started++;
+    ev->type = (i % 2) ? EV_CONNECTED : EV_PAIRED;
+    ev->device = &hub->devices[i / 2];
+    ev->timestamp = 1000000;
+    return;
+  }
+  ev->device = &hub->devices[hub->device];
+  ev->timestamp = 1000000 + hub->tick * 5000;
+  if (hub->orientation_pending) {
+    ev->type = EV_ORIENTATION;
+    ev->orientation[3] = 1.0f;
+    ev->accelerometer[2] = -1.0f;
+    ev->gyroscope[0] = (float) (next_random(hub) % 100) / 10.0f;
+  } else {
+    ev->type = EV_EMG;
+    for (int i = 0; i < 8; ++i)
+      ev->emg[i] = (int8_t) (next_random(hub) % 64) - 32;
+  }
+  /* Advance: EMG, then (every fourth tick) orientation, then next device. */
+  if (!hub->orientation_pending && hub->tick % 4 == 0) {
+    hub->orientation_pending = 1;
+    return;
+  }
+  hub->orientation_pending = 0;
+  if (++hub->device == hub->num_devices) {
+    hub->device = 0;
+    hub->tick++;
+  }
+}
+
+int libmyo_run(void* hub_opq, unsigned int duration_ms, handler_t handler,
+               void* user_data, void** out_error) {
+  fake_hub* hub = hub_opq;
+  fake_event ev;
+  if (out_error) *out_error = NULL;
+  for (unsigned int i = 0; i < duration_ms; ++i) {
+    next_event(hub, &ev);
+    if (handler(user_data, &ev) != 0)
+      break;
+  }
+  return 0;
+}
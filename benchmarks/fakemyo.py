@@ -0,0 +1,56 @@
+"""
+Builds and loads the synthetic libmyo in fakelibmyo.c, so that #myo.Hub
+and #myo.Event can be exercised on Linux without the Myo SDK or hardware.
+Requires a C compiler (`cc`, or the one in `$CC`).
+
+    import fakemyo
+    fakemyo.init(devices=2)
+    hub = myo.Hub()
+    hub.run(listener, 10000)   # delivers 10000 events and returns
+"""
+
+import hashlib
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import myo
+
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fakelibmyo.c')
+
+
+def build():
+  """
+  Compiles the fake library (once per source version) and returns its path.
+  """
+
+  with open(SOURCE, 'rb') as fp:
+    digest = hashlib.sha1(fp.read()).hexdigest()[:12]
+  path = os.path.join(tempfile.gettempdir(), 'fakelibmyo-{}.so'.format(digest))
+  if not os.path.isfile(path):
+    compiler = os.environ.get('CC', 'cc')
+    tmp = path + '.{}.tmp'.format(os.getpid())
+    subprocess.check_call([compiler, '-O2', '-shared', '-fPIC', '-o', tmp, SOURCE])
+    os.rename(tmp, path)
+  return path
+
+
+def init(devices=1):
+  """
+  Loads the fake library with #myo.init(). *devices* is the number of
+  devices every new #myo.Hub reports.
+  """
+
+  os.environ['FAKEMYO_DEVICES'] = str(devices)
+  myo.init(lib_name=build())
+
+
+def set_devices(devices):
+  """
+  Changes the number of devices reported by hubs created after this call.
+  """
+
+  os.environ['FAKEMYO_DEVICES'] = str(devices)
@@ -0,0 +1,410 @@
+"""
+Benchmarks of the per-event hot path and of the data paths of the scripts,
+with JSON results and a regression check against a baseline. The hub
+benchmarks run against the synthetic libmyo from fakemyo.py, so no Myo SDK
+or hardware is needed (but a C compiler is).
+
+    $ python benchmarks/suite.py --output baseline.json
+    $ python benchmarks/suite.py --baseline baseline.json --threshold 0.15
+
+Every benchmark runs *--repeat* times, interleaved with the others, and
+the JSON has the fastest (*ns_per_op*) and the median run per operation.
+Their relative difference is the *noise* of the run. The fastest runs are
+compared; the exit code is 1 if any benchmark got slower than the baseline
+by more than the threshold and by more than the noise of both runs
+together, so a noisy machine widens the check instead of failing it.
+Select benchmarks with `--filter hub.` etc.
+"""
+
+import argparse
+import collections
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import myo
+from myo.math import Quaternion, Vector
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'Uso do Myo', 'Modelos ML')
+
+#: name -> (default number of operations, setup function). The setup
+#: function receives the number of operations and returns the function
+#: to time, or raises #Skip.
+BENCHMARKS = collections.OrderedDict()
+
+
+class Skip(Exception):
+  pass
+
+
+def benchmark(name, ops):
+  def decorator(func):
+    BENCHMARKS[name] = (ops, func)
+    return func
+  return decorator
+
+
+# Hub callback path (fake libmyo)
+# ===============================
+
+_fake_loaded = []
+
+
+def _hub():
+  if not _fake_loaded:
+    try:
+      import fakemyo
+      fakemyo.init(devices=1)
+    except Exception as exc:
+      raise Skip('fake libmyo not available: {}'.format(exc))
+    _fake_loaded.append(True)
+  return myo.Hub()
+
+
+def _hub_benchmark(name, ops=50000):
+  def decorator(make_handler):
+    def setup(n):
+      hub = _hub()
+      handler = make_handler(hub)
+      hub.run(handler, 2)   # paired and connected
+      return lambda: hub.run(handler, n)
+    BENCHMARKS[name] = (ops, setup)
+    return make_handler
+  return decorator
+
+
+@_hub_benchmark('hub.dispatch')
+def _(hub):
+  return lambda event: None
+
+
+# The handlers must not return the accessed values; Hub.run() would
+# interpret them as a HandlerResult.
+
+@_hub_benchmark('hub.event_timestamp')
+def _(hub):
+  def handler(event):
+    event.timestamp
+  return handler
+
+
+@_hub_benchmark('hub.event_device')
+def _(hub):
+  def handler(event):
+    event.device
+  return handler
+
+
+@_hub_benchmark('hub.event_emg')
+def _(hub):
+  emg = myo.EventType.emg
+  def handler(event):
+    if event.type == emg:
+      event.emg
+  return handler
+
+
+@_hub_benchmark('hub.event_orientation')
+def _(hub):
+  orientation = myo.EventType.orientation
+  def handler(event):
+    if event.type == orientation:
+      event.orientation
+      event.acceleration
+      event.gyroscope
+  return handler
+
+
+@_hub_benchmark('hub.event_orientation_into')
+def _(hub):
+  orientation = myo.EventType.orientation
+  quat, accel, gyro = Quaternion.identity(), Vector(0, 0, 0), Vector(0, 0, 0)
+  def handler(event):
+    if event.type == orientation:
+      event.orientation_into(quat)
+      event.acceleration_into(accel)
+      event.gyroscope_into(gyro)
+  return handler
+
+
+@_hub_benchmark('hub.listener_dispatch')
+def _(hub):
+  class Listener(myo.DeviceListener):
+    def on_emg(self, event):
+      pass
+    def on_orientation(self, event):
+      pass
+  return Listener()
+
+
+@_hub_benchmark('hub.api_listener')
+def _(hub):
+  return myo.ApiDeviceListener()
+
+
+@_hub_benchmark('hub.metrics')
+def _(hub):
+  from myo.metrics import HubMetrics
+  hub.metrics = HubMetrics()
+  return lambda event: None
+
+
+# myo.math
+# ========
+
+def _math_benchmark(name, ops=100000):
+  def decorator(make_op):
+    def setup(n):
+      op = make_op()
+      def run():
+        for _ in range(n):
+          op()
+      return run
+    BENCHMARKS[name] = (ops, setup)
+    return make_op
+  return decorator
+
+
+_q1 = Quaternion(0.1, 0.2, 0.3, 0.9).normalized()
+_q2 = Quaternion(-0.3, 0.1, 0.2, 0.8).normalized()
+_v1 = Vector(1.0, 2.0, 3.0)
+_v2 = Vector(-0.5, 0.25, 2.0)
+
+
+@_math_benchmark('math.quaternion_mul')
+def _():
+  return lambda: _q1 * _q2
+
+
+@_math_benchmark('math.quaternion_imul')
+def _():
+  q = _q1.copy()
+  return lambda: q.imul(_q2)
+
+
+@_math_benchmark('math.quaternion_normalized')
+def _():
+  return _q1.normalized
+
+
+@_math_benchmark('math.quaternion_rotate')
+def _():
+  return lambda: _q1.rotate(_v1)
+
+
+@_math_benchmark('math.quaternion_rotate_into')
+def _():
+  out = Vector(0, 0, 0)
+  return lambda: _q1.rotate_into(_v1, out)
+
+
+@_math_benchmark('math.quaternion_rpy')
+def _():
+  return lambda: _q1.rpy
+
+
+@_math_benchmark('math.vector_add')
+def _():
+  return lambda: _v1 + _v2
+
+
+@_math_benchmark('math.vector_cross')
+def _():
+  return lambda: _v1.cross(_v2)
+
+
+@_math_benchmark('math.vector_normalized')
+def _():
+  return _v1.normalized
+
+
+# Scripts in "Uso do Myo"
+# =======================
+
+def _dataset():
+  try:
+    import pandas as pd
+  except ImportError:
+    raise Skip('pandas is not installed')
+  return pd.read_csv(os.path.join(SCRIPTS_DIR, 'emg_protocol.csv'), encoding='latin-1')
+
+
+def _features(df):
+  # Same preprocessing as knn.py and arvore.py.
+  channels = ['Canal{}'.format(i) for i in range(1, 9)]
+  dataset = df.groupby(['Dedo', 'Movimento', 'Repetição'])[channels].mean().reset_index()
+  dataset['Label'] = dataset['Dedo'].astype(str) + '_' + dataset['Movimento']
+  return dataset[channels].values, dataset['Label'].values
+
+
+@benchmark('scripts.load_csv', ops=3)
+def _(n):
+  _dataset()
+  return lambda: [_dataset() for _ in range(n)]
+
+
+@benchmark('scripts.features', ops=3)
+def _(n):
+  df = _dataset()
+  return lambda: [_features(df) for _ in range(n)]
+
+
+def _train(make_model):
+  def setup(n):
+    X, y = _features(_dataset())
+    def run():
+      for _ in range(n):
+        make_model().fit(X, y)
+    return run
+  return setup
+
+
+def _sklearn(name):
+  try:
+    import sklearn.neighbors
+    import sklearn.tree
+  except ImportError:
+    raise Skip('scikit-learn is not installed')
+  return {'knn': lambda: sklearn.neighbors.KNeighborsClassifier(n_neighbors=1),
+          'tree': lambda: sklearn.tree.DecisionTreeClassifier(random_state=42)}[name]
+
+
+@benchmark('scripts.train_knn', ops=3)
+def _(n):
+  return _train(_sklearn('knn'))(n)
+
+
+@benchmark('scripts.train_tree', ops=3)
+def _(n):
+  return _train(_sklearn('tree'))(n)
+
+
+# Runner
+# ======
+
+def run_benchmarks(names, repeat=15, scale=1.0):
+  """
+  Times every benchmark *repeat* times and returns `{name: result}`. The
+  runs are interleaved (one run of every benchmark per round), so a slow
+  phase of the machine affects all benchmarks a little instead of one a
+  lot. The result has the fastest run in *ns_per_op*, the median run in
+  *median_ns_per_op* and their relative difference in *noise*.
+  """
+
+  funcs = collections.OrderedDict()
+  for name in names:
+    ops, setup = BENCHMARKS[name]
+    ops = max(1, int(ops * scale))
+    try:
+      funcs[name] = (ops, setup(ops))
+    except Skip as exc:
+      print('{:<32} skipped ({})'.format(name, exc))
+      continue
+    funcs[name][1]()  # warm up
+
+  times = {name: [] for name in funcs}
+  for _ in range(repeat):
+    for name, (ops, func) in funcs.items():
+      start = time.perf_counter()
+      func()
+      times[name].append(time.perf_counter() - start)
+
+  results = collections.OrderedDict()
+  print('{:<32} {:>14} {:>14} {:>9}'.format('benchmark', 'min ns/op', 'median ns/op', 'noise'))
+  for name, (ops, func) in funcs.items():
+    samples = sorted(times[name])
+    best, median = samples[0], samples[len(samples) // 2]
+    results[name] = {
+      'ns_per_op': best / ops * 1e9,
+      'median_ns_per_op': median / ops * 1e9,
+      'noise': median / best - 1.0,
+      'ops': ops,
+      'repeat': repeat,
+    }
+    print('{:<32} {:>14.1f} {:>14.1f} {:>8.1f}%'.format(
+      name, results[name]['ns_per_op'], results[name]['median_ns_per_op'],
+      results[name]['noise'] * 100))
+  return results
+
+
+def compare(results, baseline, threshold):
+  """
+  Prints the change of the fastest runs against *baseline* and returns the
+  names of the benchmarks that got slower by more than *threshold* (a
+  fraction) and by more than the noise of both runs together. Baselines
+  written before the noise was recorded count as noise-free.
+  """
+
+  regressions = []
+  print()
+  print('{:<32} {:>14} {:>14} {:>9} {:>9}'.format(
+    'benchmark', 'baseline', 'current', 'change', 'noise'))
+  for name, result in results.items():
+    base = baseline.get(name)
+    if base is None:
+      print('{:<32} {:>14} {:>14.1f} {:>9}'.format(name, '-', result['ns_per_op'], 'new'))
+      continue
+    change = result['ns_per_op'] / base['ns_per_op'] - 1.0
+    noise = result['noise'] + base.get('noise', 0.0)
+    flag = ''
+    if change > threshold and change > noise:
+      regressions.append(name)
+      flag = '  REGRESSION'
+    print('{:<32} {:>14.1f} {:>14.1f} {:>+8.1f}% {:>8.1f}%{}'.format(
+      name, base['ns_per_op'], result['ns_per_op'], change * 100, noise * 100, flag))
+  return regressions
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--filter', action='append', default=[],
+                      help='only run benchmarks whose name contains this string')
+  parser.add_argument('--repeat', type=int, default=15)
+  parser.add_argument('--scale', type=float, default=1.0,
+                      help='multiply the number of operations per benchmark')
+  parser.add_argument('--output', help='write the results to this JSON file')
+  parser.add_argument('--baseline', help='compare against this JSON file')
+  parser.add_argument('--threshold', type=float, default=0.15,
+                      help='allowed slowdown against the baseline (default 15%%)')
+  parser.add_argument('--list', action='store_true')
+  args = parser.parse_args(argv)
+
+  names = [n for n in BENCHMARKS if not args.filter or any(f in n for f in args.filter)]
+  if args.list:
+    print('\n'.join(names))
+    return 0
+
+  results = run_benchmarks(names, args.repeat, args.scale)
+  data = {
+    'meta': {
+      'date': datetime.datetime.now().isoformat(),
+      'python': platform.python_version(),
+      'implementation': platform.python_implementation(),
+      'machine': platform.machine(),
+      'platform': platform.platform(),
+      'myo': myo.__version__,
+    },
+    'results': results,
+  }
+  if args.output:
+    with open(args.output, 'w') as fp:
+      json.dump(data, fp, indent=2)
+
+  if args.baseline:
+    with open(args.baseline) as fp:
+      baseline = json.load(fp)['results']
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+      print('\n{} benchmark(s) regressed by more than {:.0f}% and their noise'.format(
+        len(regressions), args.threshold * 100))
+      return 1
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Checks the #myo.fusion filters against the orientation that libmyo reports.
+Reads the orientation events of a trace (see #myo.trace), feeds their
+gyroscope and accelerometer samples through every filter and compares the
+result with the #Event.orientation quaternions of the same events.
+
+Without a trace, a synthetic recording is generated and written through
+#myo.trace.TraceRecorder first: a smooth arm movement with known
+orientation, gravity as the only acceleration and a noisy, biased
+gyroscope.
+
+    $ python benchmarks/validate_fusion.py
+    $ python benchmarks/validate_fusion.py session.myotrace --max-error 10
+    $ python benchmarks/validate_fusion.py --no-numba
+
+The filters start from the first reference orientation, and the first
+*--settle* seconds are not checked. The bound is checked on the tilt error
+(#myo.fusion.tilt_error()): without a magnetometer, the heading of both
+the filters and libmyo drifts with the gyroscope bias, so the full
+orientation error is reported but not checked. The exit code is 1 if the
+95th percentile of the tilt error of a filter exceeds *--max-error*
+degrees.
+"""
+
+import argparse
+import io
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from myo import fusion
+from myo._ffi import EventType
+from myo.math import QuaternionArray
+from myo.trace import TraceDevice, TraceEvent, TraceRecorder, read_trace
+
+
+def _axis_angle(axis, angles):
+  half = np.asarray(angles) * 0.5
+  data = np.zeros((len(half), 4))
+  data[:, :3] = np.outer(np.sin(half), axis)
+  data[:, 3] = np.cos(half)
+  return QuaternionArray(data)
+
+
+def synthesize(seconds, rate, seed=0):
+  """
+  Returns a trace (bytes) with one device that rolls, pitches and yaws
+  its arm for *seconds* seconds at *rate* Hz.
+  """
+
+  rnd = np.random.RandomState(seed)
+  t = np.arange(int(seconds * rate)) / rate
+  roll = math.radians(70) * np.sin(2 * math.pi * 0.23 * t)
+  pitch = math.radians(40) * np.sin(2 * math.pi * 0.11 * t + 0.5) * np.sin(2 * math.pi * 0.05 * t)
+  yaw = math.radians(90) * np.sin(2 * math.pi * 0.07 * t)
+  quats = (_axis_angle((0, 0, 1), yaw) * _axis_angle((0, 1, 0), pitch)
+           * _axis_angle((1, 0, 0), roll)).normalized()
+
+  # Body rates from the rotation between consecutive samples.
+  delta = (~quats[:-1] * quats[1:]).data
+  delta *= np.where(delta[:, 3:] < 0, -1.0, 1.0)
+  sin_half = np.linalg.norm(delta[:, :3], axis=1)
+  angle = 2.0 * np.arctan2(sin_half, delta[:, 3])
+  axis = delta[:, :3] / np.maximum(sin_half, 1e-12)[:, None]
+  gyro = np.degrees(axis * (angle * rate)[:, None])
+  gyro = np.vstack([gyro, gyro[-1:]])
+  gyro += rnd.normal(0.0, 0.5, gyro.shape) + (0.3, -0.2, 0.25)
+
+  # At rest, the accelerometer measures +1 g along the world z axis.
+  accel = (~quats).rotate(np.array([[0.0, 0.0, 1.0]])).data
+  accel += rnd.normal(0.0, 0.02, accel.shape)
+
+  fp = io.BytesIO()
+  device = TraceDevice(0)
+  with TraceRecorder(fp) as recorder:
+    for i in range(len(t)):
+      data = tuple(quats.data[i]) + tuple(accel[i]) + tuple(gyro[i])
+      recorder.record(TraceEvent(EventType.orientation, int(t[i] * 1e6), device, data))
+  return fp.getvalue()
+
+
+def load(fp):
+  """
+  Returns `{device index: (orientation, accel, gyro)}` arrays of the
+  orientation events in the trace *fp*.
+  """
+
+  rows = {}
+  for event in read_trace(fp):
+    if event.type == EventType.orientation:
+      rows.setdefault(event.device.index, []).append(
+        tuple(event.orientation) + tuple(event.acceleration) + tuple(event.gyroscope))
+  result = {}
+  for index, values in rows.items():
+    values = np.array(values, dtype=np.float64)
+    result[index] = (values[:, 0:4], values[:, 4:7], values[:, 7:10])
+  return result
+
+
+def _disable_numba():
+  for name in ('_madgwick_kernel', '_mahony_kernel'):
+    kernel = getattr(fusion, name)
+    setattr(fusion, name, getattr(kernel, 'py_func', kernel))
+  fusion._jit = None
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('trace', nargs='?', help='a myo trace with orientation events')
+  parser.add_argument('--seconds', type=float, default=120.0,
+                      help='length of the synthetic recording')
+  parser.add_argument('--rate', type=float, default=50.0, help='IMU sample rate in Hz')
+  parser.add_argument('--settle', type=float, default=2.0,
+                      help='seconds at the start that are not checked')
+  parser.add_argument('--max-error', type=float, default=5.0,
+                      help='bound for the 95th percentile of the tilt error in degrees')
+  parser.add_argument('--no-numba', action='store_true',
+                      help='check the pure Python kernels')
+  args = parser.parse_args(argv)
+
+  if args.no_numba:
+    _disable_numba()
+  if args.trace:
+    with open(args.trace, 'rb') as fp:
+      streams = load(fp)
+  else:
+    streams = load(io.BytesIO(synthesize(args.seconds, args.rate)))
+  if not streams:
+    print('no orientation events in the trace')
+    return 2
+
+  print('compiled kernels:', fusion._jit is not None)
+  print('{:<8} {:<20} {:>8} {:>10} {:>10} {:>10} {:>12}'.format(
+    'device', 'filter', 'samples', 'tilt', 'p95', 'max', 'orientation'))
+  failures = []
+  skip = int(args.settle * args.rate)
+  for index, (reference, accel, gyro) in sorted(streams.items()):
+    for cls in (fusion.MadgwickFilter, fusion.ComplementaryFilter):
+      filt = cls(sample_rate=args.rate, orientation=tuple(reference[0]))
+      estimate = filt.update(gyro, accel)
+      error = np.degrees(fusion.tilt_error(estimate, reference))[skip:]
+      median, p95, worst = np.percentile(error, [50, 95, 100])
+      full = np.degrees(fusion.orientation_error(estimate, reference))[skip:]
+      print('{:<8} {:<20} {:>8} {:>9.2f}d {:>9.2f}d {:>9.2f}d {:>11.2f}d'.format(
+        index, cls.__name__, len(error), median, p95, worst, np.median(full)))
+      if p95 > args.max_error:
+        failures.append((index, cls.__name__, p95))
+
+  if failures:
+    print()
+    for index, name, p95 in failures:
+      print('device {}: {} p95 tilt error {:.2f} degrees exceeds {} degrees'.format(
+        index, name, p95, args.max_error))
+    return 1
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -26,6 +26,10 @@ from ._ffi import EventType, Pose, VibrationType
 from .utils import TimeoutManager
 from .math import Vector, Quaternion
 
+# The names of the handler methods, looked up once instead of being built
+# for every event.
+_HANDLER_NAMES = {t: 'on_' + t.name for t in EventType}
+
 
 class DeviceListener(object):
   """
@@ -33,8 +37,8 @@ class DeviceListener(object):
   """
 
   def on_event(self, event):
-    if event.type.name:  # An event type that we know of.
-      attr = 'on_' + event.type.name
+    attr = _HANDLER_NAMES.get(event.type)
+    if attr:  # An event type that we know of.
       try:
         method = getattr(self, attr)
       except AttributeError:
@@ -91,7 +95,7 @@ class DeviceProxy(object):
   def __repr__(self):
     with self._cond:
       con = 'connected' if self._connected else 'disconnected'
-      return '<DeviceProxy ({}) name={!r}>'.format(con, self.name)
+      return '<DeviceProxy ({}) mac_address={}>'.format(con, self._mac_address)
 
   @property
   def _connected(self):
@@ -153,6 +157,26 @@ class DeviceProxy(object):
     with self._cond:
       return self._gyroscope.copy()
 
+  def orientation_into(self, out):
+    """
+    Copies the current orientation into the #Quaternion *out* instead of
+    returning a new copy like #orientation does.
+    """
+
+    with self._cond:
+      q = self._orientation
+      return out.set(q.x, q.y, q.z, q.w)
+
+  def acceleration_into(self, out):
+    with self._cond:
+      v = self._acceleration
+      return out.set(v.x, v.y, v.z)
+
+  def gyroscope_into(self, out):
+    with self._cond:
+      v = self._gyroscope
+      return out.set(v.x, v.y, v.z)
+
   @property
   def pose(self):
     with self._cond:
@@ -245,7 +269,7 @@ class ApiDeviceListener(DeviceListener):
     with self._cond:
       if event.type == EventType.paired:
         device = DeviceProxy(event.device, event.timestamp,
-          event.firmware_version, self._condition_class)
+          event.firmware_version, event.mac_address, self._condition_class)
         self._devices[device._device.handle] = device
         self._cond.notify_all()
         return
@@ -282,6 +306,7 @@ class ApiDeviceListener(DeviceListener):
         device._pose = event.pose
       elif event.type == EventType.orientation:
         device._orientation_update_index += 1
-        device._orientation = event.orientation
-        device._gyroscope = event.gyroscope
-        device._acceleration = event.acceleration
+        # Update in-place; the public accessors only ever hand out copies.
+        event.orientation_into(device._orientation)
+        event.gyroscope_into(device._gyroscope)
+        event.acceleration_into(device._acceleration)
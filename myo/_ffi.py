@@ -29,6 +29,7 @@ import threading
 import six
 import sys
 
+from .commands import CommandQueue
 from .macaddr import MacAddress
 from .math import Quaternion, Vector
 
@@ -376,6 +377,50 @@ class Event(_BaseWrapper):
             for i in [0, 1, 2])
     return Vector(*vals)
 
+  def orientation_into(self, quat):
+    """
+    Like #orientation, but writes the values into the #Quaternion *quat*
+    instead of creating a new object.
+    """
+
+    if self.type != EventType.orientation:
+      raise InvalidOperation()
+    get = libmyo.libmyo_event_get_orientation
+    handle = self._handle
+    quat.x = get(handle, 0)
+    quat.y = get(handle, 1)
+    quat.z = get(handle, 2)
+    quat.w = get(handle, 3)
+    return quat
+
+  def acceleration_into(self, vec):
+    """
+    Like #acceleration, but writes the values into the #Vector *vec*.
+    """
+
+    if self.type != EventType.orientation:
+      raise InvalidOperation()
+    get = libmyo.libmyo_event_get_accelerometer
+    handle = self._handle
+    vec.x = get(handle, 0)
+    vec.y = get(handle, 1)
+    vec.z = get(handle, 2)
+    return vec
+
+  def gyroscope_into(self, vec):
+    """
+    Like #gyroscope, but writes the values into the #Vector *vec*.
+    """
+
+    if self.type != EventType.orientation:
+      raise InvalidOperation()
+    get = libmyo.libmyo_event_get_gyroscope
+    handle = self._handle
+    vec.x = get(handle, 0)
+    vec.y = get(handle, 1)
+    vec.z = get(handle, 2)
+    return vec
+
   @property
   def pose(self):
     if self.type != EventType.pose:
@@ -400,6 +445,23 @@ class Event(_BaseWrapper):
       raise InvalidOperation()
     return [libmyo.libmyo_event_get_emg(self._handle, i) for i in range(8)]
 
+  def emg_into(self, out):
+    """
+    Like #emg, but writes the eight values into the mutable sequence *out*
+    (e.g. a list or a row of a #numpy.ndarray) instead of creating a new
+    list.
+    """
+
+    if self.type != EventType.emg:
+      raise InvalidOperation()
+    get = libmyo.libmyo_event_get_emg
+    handle = self._handle
+    out[0] = get(handle, 0); out[1] = get(handle, 1)
+    out[2] = get(handle, 2); out[3] = get(handle, 3)
+    out[4] = get(handle, 4); out[5] = get(handle, 5)
+    out[6] = get(handle, 6); out[7] = get(handle, 7)
+    return out
+
 
 class Device(_BaseWrapper):
 
@@ -479,6 +541,22 @@ class Hub(_BaseWrapper):
     self._stop_requested = False
     self._stopped = False
 
+    #: A #myo.metrics.HubMetrics object that records every event passed
+    #: to the handler in #run(), or #None.
+    self.metrics = None
+
+    #: A #myo.profiling.SamplingProfiler that traces a fraction of the
+    #: handler calls in #run(), or #None.
+    self.profiler = None
+
+    #: A #myo.realtime.LowJitter that #run_forever() applies to the hub
+    #: thread, or #None.
+    self.realtime = None
+
+    #: A #myo.commands.CommandQueue of device commands that are executed
+    #: on the hub thread.
+    self.commands = CommandQueue()
+
   def __del__(self):
     if self._handle[0]:
       error = ErrorDetails()
@@ -527,6 +605,8 @@ class Hub(_BaseWrapper):
         handler = handler.on_event
       else:
         raise TypeError('expected callable or DeviceListener')
+    if self.profiler is not None:
+      handler = self.profiler.wrap(handler)
 
     with self._lock:
       if self._running:
@@ -536,9 +616,13 @@ class Hub(_BaseWrapper):
       self._stopped = False
 
     exc_box = []
+    commands = self.commands
+    pending = commands.pending
 
     def callback_on_error(*exc_info):
       exc_box.append(exc_info)
+      if self.metrics is not None:
+        self.metrics.record_error()
       with self._lock:
         self._stopped = True
       return HandlerResult.stop
@@ -549,7 +633,16 @@ class Hub(_BaseWrapper):
           self._stopped = True
           return HandlerResult.stop
 
-      result = handler(Event(event))
+      metrics = self.metrics
+      if metrics is None:
+        result = handler(Event(event))
+      else:
+        event = Event(event)
+        start = metrics.clock()
+        result = handler(event)
+        metrics.record(event, start, metrics.clock())
+      if pending:
+        commands.drain()
       if result is None or result is True:
         result = HandlerResult.continue_
       elif result is False:
@@ -579,9 +672,20 @@ class Hub(_BaseWrapper):
     return result
 
   def run_forever(self, handler, duration_ms=500):
-    while self.run(handler, duration_ms):
-      if self._stop_requested:
-        break
+    realtime = self.realtime
+    if realtime is not None:
+      realtime.enter_thread('hub')
+    try:
+      while self.run(handler, duration_ms):
+        if self._stop_requested:
+          break
+        if self.commands.pending:
+          self.commands.drain()
+        if realtime is not None:
+          realtime.idle()
+    finally:
+      if realtime is not None:
+        realtime.exit_thread()
 
   @contextlib.contextmanager
   def run_in_background(self, handler, duration_ms=500):
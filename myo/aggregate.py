@@ -0,0 +1,290 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015-2018 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+Alignment of the EMG streams of several armbands into one matrix.
+
+The #EmgAggregator resamples the EMG of N devices onto a common grid of
+ticks (every 5 ms for the 200 Hz of the Myo) and emits one row with
+`8 * N` channels per tick. A device contributes the sample whose timestamp
+is within half a period of the tick.
+
+A row is emitted as soon as every device has delivered a sample past the
+tick, or when the newest timestamp of any device is more than *max_delay*
+seconds ahead of the tick. In the second case, the devices that are behind
+(radio skew, lost packets, a disconnected armband) are filled in and
+marked as missing. Samples that arrive after their tick was emitted are
+dropped. This bounds both the buffering and the added latency by
+*max_delay*. After a gap in all streams that is longer than that (plus
+the buffered samples), the ticks of the gap are skipped rather than
+filled.
+
+```python
+aggregator = myo.aggregate.EmgAggregator(devices=2, max_delay=0.05)
+hub.run_in_background(aggregator)
+...
+rows = aggregator.pop_rows()   # rows.emg has the shape (T, 16)
+```
+"""
+
+import collections
+import threading
+
+import numpy as np
+
+from ._ffi import EventType
+
+#: Rows returned by #EmgAggregator.pop_rows(): the tick *timestamps* (T,),
+#: the *emg* matrix (T, 8 * N) and the *present* mask (T, N) that is
+#: #False where a device was filled in.
+AlignedRows = collections.namedtuple('AlignedRows', 'timestamps emg present')
+
+
+class _Slot(object):
+
+  __slots__ = ('index', 'samples', 'newest', 'last', 'missing', 'late')
+
+  def __init__(self, index, buffer_size):
+    self.index = index
+    self.samples = collections.deque(maxlen=buffer_size)
+    self.newest = None
+    self.last = (0,) * 8
+    self.missing = 0
+    self.late = 0
+
+
+def _handle(device):
+  device = getattr(device, '_device', device)  # DeviceProxy
+  return getattr(device, 'handle', device)
+
+
+class EmgAggregator(object):
+  """
+  Merges the EMG events of several devices into one `(T, 8 * N)` stream.
+  Pass it to #Hub.run() as the handler, or call #on_event() from your
+  listener.
+
+  # Parameters
+  devices: The number of devices (they get their columns in the order of
+    their first EMG event), or a list of #Device objects, #DeviceProxy
+    objects or device handles in column order. EMG of other devices is
+    ignored.
+  rate: The EMG rate of every device in Hz.
+  max_delay: The maximum time in seconds a tick waits for a slow device.
+  fill: The value for a missing device: `'hold'` (its previous sample),
+    `'zero'` or `'nan'`.
+  max_rows: The number of rows kept for #pop_rows(); when the consumer
+    falls behind, the oldest rows are dropped.
+  on_rows: Called with an #AlignedRows for every batch of rows emitted by
+    one event, on the hub thread. Does not consume the rows.
+  """
+
+  def __init__(self, devices, rate=200.0, max_delay=0.05, fill='hold',
+               max_rows=4096, on_rows=None):
+    if fill not in ('hold', 'zero', 'nan'):
+      raise ValueError('fill must be hold, zero or nan')
+    if isinstance(devices, int):
+      self.num_devices = devices
+      self._handles = None
+    else:
+      self._handles = [_handle(d) for d in devices]
+      self.num_devices = len(self._handles)
+    if self.num_devices < 1:
+      raise ValueError('need at least one device')
+    self.period = int(round(1e6 / rate))
+    self.max_delay = max_delay
+    self.fill = fill
+    self.on_rows = on_rows
+    self._half = self.period // 2
+    self._max_delay_us = int(max_delay * 1e6)
+    buffer_size = self._max_delay_us // self.period + 16
+    # Beyond this distance to the newest sample, a gap is skipped instead
+    # of being filled row by row.
+    self._max_gap = self._max_delay_us + buffer_size * self.period
+    self._slots = {}
+    self._slot_list = []
+    if self._handles is not None:
+      for handle in self._handles:
+        self._add_slot(handle, buffer_size)
+    self._buffer_size = buffer_size
+    self._next_tick = None
+    self._newest = None
+    self._lock = threading.Lock()
+    channels = 8 * self.num_devices
+    self._emg = np.zeros((max_rows, channels), np.float32)
+    self._present = np.zeros((max_rows, self.num_devices), bool)
+    self._timestamps = np.zeros(max_rows, np.int64)
+    self._fill_values = (float('nan') if fill == 'nan' else 0.0,) * 8
+    self._count = 0
+    self._start = 0
+    #: The number of emitted rows.
+    self.rows = 0
+    #: The number of rows that were dropped because #pop_rows() was not
+    #: called often enough.
+    self.dropped_rows = 0
+    #: EMG events of devices that have no column.
+    self.ignored = 0
+    #: Ticks that were skipped without a row because all devices had a gap
+    #: of more than *max_delay* plus the buffered samples.
+    self.skipped = 0
+
+  def _add_slot(self, handle, buffer_size):
+    slot = self._slots[handle] = _Slot(len(self._slot_list), buffer_size)
+    self._slot_list.append(slot)
+    return slot
+
+  def __call__(self, event):
+    self.on_event(event)
+
+  def on_event(self, event):
+    if event.type != EventType.emg:
+      return
+    handle = event.device.handle
+    slot = self._slots.get(handle)
+    if slot is None:
+      if self._handles is not None or len(self._slot_list) >= self.num_devices:
+        self.ignored += 1
+        return
+      slot = self._add_slot(handle, self._buffer_size)
+    timestamp = event.timestamp
+    if self._next_tick is None:
+      self._next_tick = timestamp
+    elif timestamp < self._next_tick - self._half:
+      slot.late += 1
+      return
+    slot.samples.append((timestamp, event.emg))
+    if slot.newest is None or timestamp > slot.newest:
+      slot.newest = timestamp
+    if self._newest is None or timestamp > self._newest:
+      self._newest = timestamp
+    self._emit()
+
+  def _ready(self, tick):
+    if self._newest - tick > self._max_delay_us:
+      return True
+    if len(self._slot_list) < self.num_devices:
+      return False
+    limit = tick + self._half
+    for slot in self._slot_list:
+      if slot.newest is None or slot.newest < limit:
+        return False
+    return True
+
+  def _emit(self):
+    tick = self._next_tick
+    if self._newest - tick > self._max_gap:
+      # After a dropout, resume max_delay behind the newest sample (on the
+      # tick grid) instead of emitting one filler row per missed period.
+      skip = -(-(self._newest - self._max_delay_us - tick) // self.period)
+      tick += skip * self.period
+      self.skipped += skip
+    emitted = 0
+    while self._ready(tick):
+      self._emit_row(tick)
+      emitted += 1
+      tick += self.period
+    self._next_tick = tick
+    if emitted and self.on_rows is not None:
+      self.on_rows(self._view(emitted))
+
+  def _emit_row(self, tick):
+    row = []
+    present = []
+    low, high = tick - self._half, tick + self._half
+    for slot in self._slot_list:
+      samples = slot.samples
+      while samples and samples[0][0] < low:
+        samples.popleft()
+      if samples and samples[0][0] < high:
+        values = slot.last = samples.popleft()[1]
+        present.append(True)
+      else:
+        slot.missing += 1
+        values = slot.last if self.fill == 'hold' else self._fill_values
+        present.append(False)
+      row.extend(values)
+    for index in range(len(self._slot_list), self.num_devices):
+      row.extend(self._fill_values)
+      present.append(False)
+    with self._lock:
+      capacity = len(self._timestamps)
+      if self._count == capacity:
+        self._start = (self._start + 1) % capacity
+        self._count -= 1
+        self.dropped_rows += 1
+      index = (self._start + self._count) % capacity
+      self._timestamps[index] = tick
+      self._emg[index] = row
+      self._present[index] = present
+      self._count += 1
+      self.rows += 1
+
+  def _take(self, n, consume):
+    capacity = len(self._timestamps)
+    n = min(n, self._count)
+    start = (self._start + self._count - n) % capacity if not consume else self._start
+    indices = (start + np.arange(n)) % capacity
+    rows = AlignedRows(self._timestamps[indices], self._emg[indices],
+                       self._present[indices])
+    if consume:
+      self._start = (self._start + n) % capacity
+      self._count -= n
+    return rows
+
+  def _view(self, n):
+    with self._lock:
+      return self._take(n, consume=False)
+
+  def pop_rows(self, max_rows=None):
+    """
+    Returns and removes the oldest emitted rows (all if *max_rows* is
+    #None) as an #AlignedRows of copies.
+    """
+
+    with self._lock:
+      return self._take(self._count if max_rows is None else max_rows, consume=True)
+
+  def latest(self, n):
+    """
+    Returns the *n* newest rows without removing them.
+    """
+
+    with self._lock:
+      return self._take(n, consume=False)
+
+  def stats(self):
+    """
+    Returns `{'rows', 'dropped_rows', 'ignored', 'skipped', 'devices'}`
+    where *devices* is a list of `{'missing', 'late', 'buffered'}` in column order.
+    """
+
+    return {
+      'rows': self.rows,
+      'dropped_rows': self.dropped_rows,
+      'ignored': self.ignored,
+      'skipped': self.skipped,
+      'devices': [{'missing': s.missing, 'late': s.late,
+                   'buffered': len(s.samples)} for s in self._slot_list],
+    }
+
+
+__all__ = ['AlignedRows', 'EmgAggregator']
@@ -0,0 +1,389 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015-2018 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+asyncio interface to a #Hub. Requires Python 3.5 or newer.
+
+The #AsyncHub runs the hub on a background thread and hands the events to
+the event loop. Events are collected on the hub thread and handed over in
+batches: a subscription wakes the loop (with `call_soon_threadsafe()`)
+once per batch instead of once per event.
+
+```python
+async with myo.aio.AsyncHub() as hub:
+  device = await hub.wait_connected(timeout=10)
+  async for batch in hub.emg_batches(device, max_latency=0.02):
+    model.update(batch.emg)    # numpy array of shape (n, 8)
+```
+
+Leaving the `async for` (with `break`, an exception or cancellation of the
+task) ends the subscription.
+"""
+
+import asyncio
+import collections
+import threading
+
+import numpy as np
+
+from ._ffi import EventType, Hub
+from .macaddr import MacAddress
+from .trace import TraceEvent, _encode_payload
+
+#: A batch of EMG samples of one device, in the order they arrived.
+EmgBatch = collections.namedtuple('EmgBatch', 'device timestamps emg')
+
+_CONNECTED = (EventType.paired, EventType.connected)
+
+
+class DetachedEvent(TraceEvent):
+  """
+  A copy of an #Event that stays valid after the hub callback returned
+  (the libmyo event behind an #Event does not). Provides the same
+  properties; #device is the #Device the event came from.
+  """
+
+  __slots__ = ()
+
+  def __init__(self, event):
+    super(DetachedEvent, self).__init__(
+      event.type, event.timestamp, event.device, _encode_payload(event))
+
+  def __repr__(self):
+    return 'DetachedEvent(type={!r}, timestamp={!r}, device={!r})'.format(
+      self.type, self.timestamp, self.device.handle)
+
+  @property
+  def mac_address(self):
+    if self.type in _CONNECTED:
+      return MacAddress(self._data[4])
+    return None
+
+  @property
+  def firmware_version(self):
+    if self.type in _CONNECTED:
+      return tuple(self._data[:4])
+    return None
+
+
+class _Subscription(object):
+
+  def __init__(self, hub, types=None, device=None, emg=False,
+               max_latency=0.0, max_size=None, max_queue=64):
+    self.hub = hub
+    self.types = None if types is None else frozenset(types)
+    self.device = None if device is None else getattr(device, 'handle', device)
+    self.emg = emg
+    self.max_latency = max_latency
+    self.max_size = max_size
+    self.queue = collections.deque(maxlen=max_queue)
+    self.dropped = 0
+    self.waiter = None
+    self.error = None
+    self._buffer = []
+    self._scheduled = False
+    self._urgent = False
+    self._timer = None
+
+  # Hub thread
+
+  def push(self, item):
+    loop = self.hub._loop
+    with self.hub._lock:
+      self._buffer.append(item)
+      wakeup = not self._scheduled
+      self._scheduled = True
+      if self.max_size is not None and len(self._buffer) >= self.max_size and not self._urgent:
+        self._urgent = wakeup = True
+    if wakeup:
+      loop.call_soon_threadsafe(self._arm)
+
+  # Event loop
+
+  def _arm(self):
+    if self._urgent or self.max_latency <= 0:
+      self.flush()
+    elif self._timer is None:
+      self._timer = self.hub._loop.call_later(self.max_latency, self.flush)
+
+  def flush(self):
+    if self._timer is not None:
+      self._timer.cancel()
+      self._timer = None
+    with self.hub._lock:
+      items, self._buffer = self._buffer, []
+      self._scheduled = self._urgent = False
+    if not items:
+      return
+    if self.emg:
+      devices = collections.OrderedDict()
+      for item in items:
+        devices.setdefault(item[2].handle, []).append(item)
+      batches = []
+      for samples in devices.values():
+        timestamps = np.array([x[0] for x in samples], dtype=np.int64)
+        emg = np.array([x[1] for x in samples], dtype=np.int8)
+        batches.append(EmgBatch(samples[0][2], timestamps, emg))
+      self._deliver(batches)
+    else:
+      self._deliver(items)
+
+  def _deliver(self, items):
+    queue = self.queue
+    for item in items:
+      if len(queue) == queue.maxlen:
+        self.dropped += 1
+      queue.append(item)
+    self._wake()
+
+  def fail(self, exc):
+    self.error = exc
+    self._wake()
+
+  def _wake(self):
+    waiter = self.waiter
+    if waiter is not None and not waiter.done():
+      waiter.set_result(None)
+
+  async def get(self):
+    while not self.queue:
+      if self.error is not None:
+        raise self.error
+      self.waiter = self.hub._loop.create_future()
+      try:
+        await self.waiter
+      finally:
+        self.waiter = None
+    return self.queue.popleft()
+
+  def close(self):
+    if self._timer is not None:
+      self._timer.cancel()
+      self._timer = None
+
+
+class _Iterator(object):
+  """
+  The async iterator of a subscription. A class rather than an async
+  generator, which would require Python 3.6. The subscription starts with
+  the first #__anext__() and ends on #aclose(), when #__anext__() raises
+  (including cancellation) or when the iterator is garbage collected
+  (leaving an `async for` with `break`).
+  """
+
+  def __init__(self, hub, sub):
+    self._hub = hub
+    self._sub = sub
+    self._state = 'new'
+
+  def __aiter__(self):
+    return self
+
+  async def __anext__(self):
+    if self._state == 'closed':
+      raise StopAsyncIteration
+    if self._state == 'new':
+      self._hub._subscribe(self._sub)
+      self._state = 'subscribed'
+    try:
+      return await self._sub.get()
+    except BaseException:
+      self._close()
+      raise
+
+  async def aclose(self):
+    self._close()
+
+  def _close(self):
+    if self._state == 'subscribed':
+      self._hub._unsubscribe(self._sub)
+    self._state = 'closed'
+
+  def __del__(self):
+    # Not with the lock of the hub: this may run inside another method of
+    # the hub that holds it.
+    if self._state == 'subscribed':
+      self._state = 'closed'
+      try:
+        self._hub._loop.call_soon_threadsafe(self._hub._unsubscribe, self._sub)
+      except RuntimeError:  # loop closed
+        pass
+
+
+class AsyncHub(object):
+  """
+  Runs *hub* (a new #Hub if #None) on a background thread while the
+  `async with` block is active and provides the events as async iterators.
+
+  # Parameters
+  stream_emg: Enable EMG streaming on every device that connects.
+  duration_ms: The *duration_ms* of #Hub.run_forever(). Stopping the hub
+    takes up to this long.
+  """
+
+  def __init__(self, hub=None, stream_emg=True, duration_ms=100):
+    self.hub = hub if hub is not None else Hub()
+    self.stream_emg = stream_emg
+    self.duration_ms = duration_ms
+    self._lock = threading.Lock()
+    self._loop = None
+    self._thread = None
+    self._subscriptions = ()
+    self._connected = collections.OrderedDict()
+    self._waiters = []
+    self.error = None
+
+  async def __aenter__(self):
+    self.start()
+    return self
+
+  async def __aexit__(self, *args):
+    await self.stop()
+
+  def start(self):
+    self._loop = asyncio.get_event_loop()
+    self._thread = threading.Thread(target=self._run, name='myo.aio.AsyncHub')
+    self._thread.daemon = True
+    self._thread.start()
+
+  async def stop(self):
+    self.hub.stop()
+    if self._thread is not None:
+      await self._loop.run_in_executor(None, self._thread.join)
+      self._thread = None
+
+  @property
+  def devices(self):
+    """
+    The connected devices, in the order they connected.
+    """
+
+    with self._lock:
+      return list(self._connected.values())
+
+  # Hub thread
+
+  def _run(self):
+    try:
+      self.hub.run_forever(self._on_event, self.duration_ms)
+    except Exception as exc:
+      self.error = exc
+      self._loop.call_soon_threadsafe(self._fail, exc)
+
+  def _on_event(self, event):
+    type = event.type
+    if type == EventType.connected:
+      if self.stream_emg:
+        event.device.stream_emg(True)
+      with self._lock:
+        self._connected[event.device.handle] = event.device
+      self._loop.call_soon_threadsafe(self._notify_connected, event.device)
+    elif type == EventType.disconnected or type == EventType.unpaired:
+      with self._lock:
+        self._connected.pop(event.device.handle, None)
+
+    detached = None
+    for sub in self._subscriptions:
+      if sub.device is not None and event.device.handle != sub.device:
+        continue
+      if sub.emg:
+        if type == EventType.emg:
+          sub.push((event.timestamp, event.emg, event.device))
+      elif sub.types is None or type in sub.types:
+        if detached is None:
+          detached = DetachedEvent(event)
+        sub.push(detached)
+
+  # Event loop
+
+  def _notify_connected(self, device):
+    waiters, self._waiters = self._waiters, []
+    for future in waiters:
+      if not future.done():
+        future.set_result(device)
+
+  def _fail(self, exc):
+    for sub in self._subscriptions:
+      sub.fail(exc)
+    for future in self._waiters:
+      if not future.done():
+        future.set_exception(exc)
+    self._waiters = []
+
+  async def wait_connected(self, timeout=None):
+    """
+    Returns a connected #Device; waits for the next connection if there is
+    none. Raises #asyncio.TimeoutError after *timeout* seconds.
+    """
+
+    devices = self.devices
+    if devices:
+      return devices[0]
+    if self.error is not None:
+      raise self.error
+    future = self._loop.create_future()
+    self._waiters.append(future)
+    try:
+      return await asyncio.wait_for(future, timeout)
+    finally:
+      if future in self._waiters:
+        self._waiters.remove(future)
+
+  def _subscribe(self, sub):
+    with self._lock:
+      self._subscriptions = self._subscriptions + (sub,)
+    if self.error is not None:
+      # The hub thread has already failed and will not call _fail() again.
+      sub.fail(self.error)
+
+  def _unsubscribe(self, sub):
+    with self._lock:
+      self._subscriptions = tuple(s for s in self._subscriptions if s is not sub)
+    sub.close()
+
+  def events(self, types=None, device=None, max_latency=0.0, max_queue=1024):
+    """
+    Async iterator over #DetachedEvent objects of the given #EventType
+    *types* (all if #None), optionally of one *device* only. Events are
+    handed to the loop at least every *max_latency* seconds. When the
+    consumer falls behind by more than *max_queue* events, the oldest are
+    dropped.
+    """
+
+    sub = _Subscription(self, types, device, max_latency=max_latency,
+                        max_queue=max_queue)
+    return _Iterator(self, sub)
+
+  def emg_batches(self, device=None, max_latency=0.02, max_size=None, max_queue=64):
+    """
+    Async iterator over #EmgBatch tuples with the EMG samples that arrived
+    within *max_latency* seconds (or as soon as *max_size* samples are
+    there). Without a *device*, every handover yields one batch per
+    device.
+    """
+
+    sub = _Subscription(self, None, device, emg=True, max_latency=max_latency,
+                        max_size=max_size, max_queue=max_queue)
+    return _Iterator(self, sub)
+
+
+__all__ = ['AsyncHub', 'DetachedEvent', 'EmgBatch']
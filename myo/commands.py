@@ -0,0 +1,146 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015-2018 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+A queue of device commands that are executed on the hub thread.
+
+The methods of #Device call libmyo on the calling thread. From other
+threads (a web request handler, a UI callback) that gives no ordering
+between the commands and no way to learn whether they succeeded. Every
+#Hub has a #CommandQueue in #Hub.commands instead: commands are submitted
+from any thread, executed in order by the hub thread after the next
+handler call (or between two runs in #Hub.run_forever()), and their
+result or error is delivered through a #concurrent.futures.Future.
+
+```python
+future = hub.commands.submit(device, 'vibrate', myo.VibrationType.short)
+future.result(timeout=1.0)   # raises the error of the command, if any
+```
+
+A command that is submitted while an identical one (same device, command
+and arguments) is still pending is not queued again; both callers get the
+same future. Bursts of `request_rssi()` calls result in one request.
+"""
+
+import collections
+import threading
+
+try:
+  from concurrent.futures import Future
+except ImportError:  # Python 2 without the futures backport
+  Future = None
+
+#: The #Device methods that can be submitted.
+COMMANDS = frozenset(['vibrate', 'stream_emg', 'request_rssi',
+                      'request_battery_level', 'unlock', 'lock',
+                      'notify_user_action'])
+
+
+class CommandQueue(object):
+  """
+  Thread-safe FIFO of device commands with coalescing.
+
+  # Attributes
+  pending: The queued `(key, device, command, args, future)` entries. Only
+    read its truthiness without holding the lock.
+  submitted: The number of #submit() calls.
+  coalesced: The number of submits that were merged into a pending
+    command.
+  executed: The number of commands that were executed.
+  """
+
+  def __init__(self):
+    if Future is None:
+      raise RuntimeError('concurrent.futures is not available')
+    self._lock = threading.Lock()
+    self._keys = {}
+    self.pending = collections.deque()
+    self.submitted = 0
+    self.coalesced = 0
+    self.executed = 0
+
+  def submit(self, device, command, *args):
+    """
+    Queues the #Device method *command* with *args* for *device* (a #Device
+    or a #DeviceProxy) and returns a #Future for its result.
+    """
+
+    if command not in COMMANDS:
+      raise ValueError('unknown device command: {!r}'.format(command))
+    device = getattr(device, '_device', device)  # DeviceProxy
+    key = (device.handle, command, args)
+    with self._lock:
+      self.submitted += 1
+      future = self._keys.get(key)
+      if future is not None:
+        self.coalesced += 1
+        return future
+      future = self._keys[key] = Future()
+      self.pending.append((key, device, command, args, future))
+    return future
+
+  def drain(self, limit=None):
+    """
+    Executes up to *limit* pending commands (all if #None) on the calling
+    thread, which should be the hub thread. Commands submitted while
+    draining wait for the next call. Returns the number of commands
+    executed (cancelled ones are skipped).
+    """
+
+    with self._lock:
+      count = len(self.pending)
+      if limit is not None:
+        count = min(count, limit)
+      batch = [self.pending.popleft() for _ in range(count)]
+      for entry in batch:
+        del self._keys[entry[0]]
+    executed = 0
+    for key, device, command, args, future in batch:
+      if not future.set_running_or_notify_cancel():
+        continue
+      try:
+        result = getattr(device, command)(*args)
+      except Exception as exc:
+        future.set_exception(exc)
+      else:
+        future.set_result(result)
+      executed += 1
+    with self._lock:
+      self.executed += executed
+    return executed
+
+  def cancel(self):
+    """
+    Cancels all pending commands. Returns the number of cancelled futures.
+    """
+
+    with self._lock:
+      batch = list(self.pending)
+      self.pending.clear()
+      self._keys.clear()
+    return sum(1 for entry in batch if entry[4].cancel())
+
+  def __len__(self):
+    return len(self.pending)
+
+
+__all__ = ['COMMANDS', 'CommandQueue']
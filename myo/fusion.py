@@ -0,0 +1,322 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015-2018 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+Sensor fusion filters that estimate the device orientation from blocks of
+gyroscope and accelerometer samples (as reported by #Event.gyroscope and
+#Event.acceleration). Requires NumPy.
+
+The filter kernels are compiled with Numba if it is installed (`pip
+install myo-python[fusion]`), which processes recordings at several million
+samples per second. Without Numba, the same kernels run as plain Python at
+about 0.15-0.2 million samples per second per filter, which is still
+thousands of times the 50 Hz of a live Myo but slow for large recordings.
+
+`benchmarks/validate_fusion.py` checks the filters against the orientation
+that libmyo reports in a #myo.trace recording.
+"""
+
+import math
+import numpy as np
+
+from .math import Quaternion, QuaternionArray
+
+try:
+  from numba import njit as _jit
+except ImportError:
+  _jit = None
+
+
+def _madgwick_kernel(gyro, accel, dt, beta, state, out):
+  # Madgwick, "An efficient orientation filter for inertial and
+  # inertial/magnetic sensor arrays" (2010), IMU variant. The state and
+  # output are in (x, y, z, w) order like myo.math.Quaternion.
+  q1, q2, q3, q0 = state[0], state[1], state[2], state[3]
+  for i in range(len(gyro)):
+    gx, gy, gz = gyro[i][0], gyro[i][1], gyro[i][2]
+    ax, ay, az = accel[i][0], accel[i][1], accel[i][2]
+
+    qdot0 = 0.5 * (-q1 * gx - q2 * gy - q3 * gz)
+    qdot1 = 0.5 * (q0 * gx + q2 * gz - q3 * gy)
+    qdot2 = 0.5 * (q0 * gy - q1 * gz + q3 * gx)
+    qdot3 = 0.5 * (q0 * gz + q1 * gy - q2 * gx)
+
+    norm = ax * ax + ay * ay + az * az
+    if norm > 0.0:
+      norm = 1.0 / math.sqrt(norm)
+      ax *= norm
+      ay *= norm
+      az *= norm
+      q0q0, q1q1, q2q2, q3q3 = q0 * q0, q1 * q1, q2 * q2, q3 * q3
+      s0 = 4.0 * q0 * q2q2 + 2.0 * q2 * ax + 4.0 * q0 * q1q1 - 2.0 * q1 * ay
+      s1 = (4.0 * q1 * q3q3 - 2.0 * q3 * ax + 4.0 * q0q0 * q1 - 2.0 * q0 * ay
+            - 4.0 * q1 + 8.0 * q1 * q1q1 + 8.0 * q1 * q2q2 + 4.0 * q1 * az)
+      s2 = (4.0 * q0q0 * q2 + 2.0 * q0 * ax + 4.0 * q2 * q3q3 - 2.0 * q3 * ay
+            - 4.0 * q2 + 8.0 * q2 * q1q1 + 8.0 * q2 * q2q2 + 4.0 * q2 * az)
+      s3 = 4.0 * q1q1 * q3 - 2.0 * q1 * ax + 4.0 * q2q2 * q3 - 2.0 * q2 * ay
+      norm = s0 * s0 + s1 * s1 + s2 * s2 + s3 * s3
+      if norm > 0.0:
+        norm = beta / math.sqrt(norm)
+        qdot0 -= norm * s0
+        qdot1 -= norm * s1
+        qdot2 -= norm * s2
+        qdot3 -= norm * s3
+
+    q0 += qdot0 * dt
+    q1 += qdot1 * dt
+    q2 += qdot2 * dt
+    q3 += qdot3 * dt
+    norm = 1.0 / math.sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3)
+    q0 *= norm
+    q1 *= norm
+    q2 *= norm
+    q3 *= norm
+    out[i][0] = q1
+    out[i][1] = q2
+    out[i][2] = q3
+    out[i][3] = q0
+
+  state[0], state[1], state[2], state[3] = q1, q2, q3, q0
+
+
+def _mahony_kernel(gyro, accel, dt, kp, ki, state, integral, out):
+  # Mahony et al., "Nonlinear complementary filters on the special
+  # orthogonal group" (2008), IMU variant with proportional and integral
+  # feedback of the accelerometer error.
+  q1, q2, q3, q0 = state[0], state[1], state[2], state[3]
+  ix, iy, iz = integral[0], integral[1], integral[2]
+  for i in range(len(gyro)):
+    gx, gy, gz = gyro[i][0], gyro[i][1], gyro[i][2]
+    ax, ay, az = accel[i][0], accel[i][1], accel[i][2]
+
+    norm = ax * ax + ay * ay + az * az
+    if norm > 0.0:
+      norm = 1.0 / math.sqrt(norm)
+      ax *= norm
+      ay *= norm
+      az *= norm
+      vx = q1 * q3 - q0 * q2
+      vy = q0 * q1 + q2 * q3
+      vz = q0 * q0 - 0.5 + q3 * q3
+      ex = ay * vz - az * vy
+      ey = az * vx - ax * vz
+      ez = ax * vy - ay * vx
+      if ki > 0.0:
+        ix += 2.0 * ki * ex * dt
+        iy += 2.0 * ki * ey * dt
+        iz += 2.0 * ki * ez * dt
+        gx += ix
+        gy += iy
+        gz += iz
+      gx += 2.0 * kp * ex
+      gy += 2.0 * kp * ey
+      gz += 2.0 * kp * ez
+
+    gx *= 0.5 * dt
+    gy *= 0.5 * dt
+    gz *= 0.5 * dt
+    qa, qb, qc = q0, q1, q2
+    q0 += -qb * gx - qc * gy - q3 * gz
+    q1 += qa * gx + qc * gz - q3 * gy
+    q2 += qa * gy - qb * gz + q3 * gx
+    q3 += qa * gz + qb * gy - qc * gx
+    norm = 1.0 / math.sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3)
+    q0 *= norm
+    q1 *= norm
+    q2 *= norm
+    q3 *= norm
+    out[i][0] = q1
+    out[i][1] = q2
+    out[i][2] = q3
+    out[i][3] = q0
+
+  state[0], state[1], state[2], state[3] = q1, q2, q3, q0
+  integral[0], integral[1], integral[2] = ix, iy, iz
+
+
+if _jit is not None:
+  _madgwick_kernel = _jit(cache=True, nogil=True)(_madgwick_kernel)
+  _mahony_kernel = _jit(cache=True, nogil=True)(_mahony_kernel)
+
+
+class _FusionFilter(object):
+  """
+  Base class for the orientation filters. The filter keeps its state across
+  calls to #update(), so a live stream can be fed in blocks of any size.
+  """
+
+  def __init__(self, sample_rate, orientation, gyro_in_degrees):
+    if sample_rate <= 0:
+      raise ValueError('sample_rate must be positive')
+    self.sample_rate = float(sample_rate)
+    self.gyro_in_degrees = gyro_in_degrees
+    self._state = np.zeros(4)
+    self.reset(orientation)
+
+  def reset(self, orientation=None):
+    """
+    Resets the filter state to *orientation* (the identity by default).
+    """
+
+    if orientation is None:
+      orientation = Quaternion.identity()
+    self._state[:] = tuple(orientation)
+
+  @property
+  def orientation(self):
+    """
+    The current orientation estimate as a #Quaternion.
+    """
+
+    return Quaternion(*self._state)
+
+  def _prepare(self, gyro, accel):
+    gyro = np.ascontiguousarray(gyro, dtype=np.float64)
+    accel = np.ascontiguousarray(accel, dtype=np.float64)
+    if gyro.ndim != 2 or gyro.shape[1] != 3 or gyro.shape != accel.shape:
+      raise ValueError('expected gyro and accel blocks of equal shape (N, 3), '
+                       'got {} and {}'.format(gyro.shape, accel.shape))
+    if self.gyro_in_degrees:
+      gyro = np.radians(gyro)
+    return gyro, accel
+
+  def update(self, gyro, accel):
+    """
+    Feeds a block of *gyro* and *accel* samples of shape `(N, 3)` into the
+    filter and returns the orientation after every sample as a
+    #QuaternionArray of length `N`.
+    """
+
+    gyro, accel = self._prepare(gyro, accel)
+    return QuaternionArray(self._update(gyro, accel, 1.0 / self.sample_rate))
+
+  def _update(self, gyro, accel, dt):
+    raise NotImplementedError
+
+
+class MadgwickFilter(_FusionFilter):
+  """
+  Gradient-descent orientation filter by Sebastian Madgwick.
+
+  # Parameters
+  sample_rate: The IMU sample rate in Hz. The Myo reports orientation
+    events at 50 Hz.
+  beta: Filter gain. Larger values trust the accelerometer more, which
+    corrects gyroscope drift faster but lets linear acceleration through.
+  orientation: The initial orientation, defaults to the identity.
+  gyro_in_degrees: #True if the gyroscope samples are in degrees per second,
+    which is what libmyo reports.
+  """
+
+  def __init__(self, sample_rate=50.0, beta=0.1, orientation=None,
+               gyro_in_degrees=True):
+    super(MadgwickFilter, self).__init__(sample_rate, orientation, gyro_in_degrees)
+    self.beta = float(beta)
+
+  def _update(self, gyro, accel, dt):
+    if _jit is not None:
+      out = np.empty((len(gyro), 4))
+      _madgwick_kernel(gyro, accel, dt, self.beta, self._state, out)
+      return out
+    state = self._state.tolist()
+    out = [[0.0] * 4 for _ in range(len(gyro))]
+    _madgwick_kernel(gyro.tolist(), accel.tolist(), dt, self.beta, state, out)
+    self._state[:] = state
+    return np.array(out, dtype=np.float64).reshape(-1, 4)
+
+
+class ComplementaryFilter(_FusionFilter):
+  """
+  Nonlinear complementary filter (Mahony) that integrates the gyroscope and
+  pulls the estimate towards the gravity direction measured by the
+  accelerometer.
+
+  # Parameters
+  sample_rate: The IMU sample rate in Hz.
+  kp: Proportional gain of the accelerometer correction.
+  ki: Integral gain, estimates and removes a constant gyroscope bias.
+  orientation: The initial orientation, defaults to the identity.
+  gyro_in_degrees: #True if the gyroscope samples are in degrees per second.
+  """
+
+  def __init__(self, sample_rate=50.0, kp=0.5, ki=0.0, orientation=None,
+               gyro_in_degrees=True):
+    super(ComplementaryFilter, self).__init__(sample_rate, orientation, gyro_in_degrees)
+    self.kp = float(kp)
+    self.ki = float(ki)
+    self._integral = np.zeros(3)
+
+  def reset(self, orientation=None):
+    super(ComplementaryFilter, self).reset(orientation)
+    if hasattr(self, '_integral'):
+      self._integral[:] = 0.0
+
+  def _update(self, gyro, accel, dt):
+    if _jit is not None:
+      out = np.empty((len(gyro), 4))
+      _mahony_kernel(gyro, accel, dt, self.kp, self.ki, self._state,
+                     self._integral, out)
+      return out
+    state = self._state.tolist()
+    integral = self._integral.tolist()
+    out = [[0.0] * 4 for _ in range(len(gyro))]
+    _mahony_kernel(gyro.tolist(), accel.tolist(), dt, self.kp, self.ki,
+                   state, integral, out)
+    self._state[:] = state
+    self._integral[:] = integral
+    return np.array(out, dtype=np.float64).reshape(-1, 4)
+
+
+def orientation_error(estimate, reference, align=True):
+  """
+  Returns the angle in radians between the orientations in *estimate* and
+  *reference* (for example the quaternions from #Event.orientation) for
+  every sample, as an array of shape `(N,)`.
+
+  The fusion filters and libmyo start from different world frames. With
+  *align* enabled, the constant rotation between the two frames is taken
+  from the first sample and removed before comparing.
+  """
+
+  estimate = QuaternionArray(estimate).normalized()
+  reference = QuaternionArray(reference).normalized()
+  if align:
+    offset = reference[0] * ~estimate[0]
+    estimate = offset * estimate
+  dot = np.abs(np.einsum('ij,ij->i', estimate.data, reference.data))
+  return 2.0 * np.arccos(np.clip(dot, 0.0, 1.0))
+
+
+def tilt_error(estimate, reference):
+  """
+  Returns the angle in radians between the gravity directions of the
+  orientations in *estimate* and *reference* for every sample, as an array
+  of shape `(N,)`. Unlike #orientation_error(), this ignores the heading,
+  which the accelerometer cannot correct, so it does not grow with the
+  gyroscope drift around the vertical axis.
+  """
+
+  up = np.array([[0.0, 0.0, 1.0]])
+  estimate = (~QuaternionArray(estimate).normalized()).rotate(up).data
+  reference = (~QuaternionArray(reference).normalized()).rotate(up).data
+  dot = np.einsum('ij,ij->i', estimate, reference)
+  return np.arccos(np.clip(dot, -1.0, 1.0))
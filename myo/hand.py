@@ -0,0 +1,248 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015-2018 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+A kinematic five-finger hand model and a Matplotlib 3D view of it. Requires
+NumPy and Matplotlib.
+
+The joint angles are a `(5, 3)` array of flexion angles in degrees, one row
+per finger (#FINGERS) and one column per joint (#JOINTS). The thumb has no
+DIP joint; its third column is ignored.
+
+The #HandView creates its artists once. Angle updates only store the latest
+state (and can come from any thread, e.g. the hub thread); the view renders
+that state on its own timer, so the control loop never waits for drawing.
+
+```python
+class ThumbControl(myo.DeviceListener):
+  def __init__(self, view):
+    self.view = view
+  def on_emg(self, event):
+    self.view.set_finger('thumb', emg_to_angles(event.emg))
+
+view = myo.hand.HandView()
+with hub.run_in_background(ThumbControl(view).on_event):
+  view.show()
+```
+"""
+
+import collections
+import numbers
+import threading
+import time
+
+import numpy as np
+
+#: The order of the fingers in an angle array.
+FINGERS = ('thumb', 'index', 'middle', 'ring', 'little')
+
+#: The order of the joints in an angle array.
+JOINTS = ('MCP', 'IP', 'DIP')
+
+
+def _normalize(v):
+  v = np.asarray(v, dtype=float)
+  return v / np.linalg.norm(v, axis=-1, keepdims=True)
+
+
+class HandModel(object):
+  """
+  The geometry of a hand, palm down, with the fingers pointing along +y and
+  flexion bending towards -z. The default dimensions are in units of about
+  4 cm.
+
+  # Attributes
+  bases: `(5, 3)` positions of the MCP joints.
+  directions: `(5, 3)` unit vectors along the extended fingers.
+  flex_directions: `(5, 3)` unit vectors a segment points to when its
+    cumulative flexion is 90 degrees. Made perpendicular to *directions*.
+  lengths: `(5, 3)` lengths of the proximal, middle and distal phalanges.
+  palm: `(P, 3)` outline of the palm, for drawing.
+  """
+
+  def __init__(self, bases=None, directions=None, flex_directions=None,
+               lengths=None):
+    if bases is None:
+      bases = [(1.0, 0.5, 0.0), (0.6, 2.0, 0.0), (0.2, 2.1, 0.0),
+               (-0.2, 2.0, 0.0), (-0.6, 1.8, 0.0)]
+    if directions is None:
+      directions = [(0.6, 0.8, 0.0), (0.08, 1.0, 0.0), (0.0, 1.0, 0.0),
+                    (-0.05, 1.0, 0.0), (-0.12, 1.0, 0.0)]
+    if flex_directions is None:
+      flex_directions = [(-0.6, 0.2, -0.8)] + [(0.0, 0.0, -1.0)] * 4
+    if lengths is None:
+      lengths = [(0.9, 0.7, 0.0), (1.0, 0.6, 0.5), (1.1, 0.7, 0.5),
+                 (1.0, 0.65, 0.5), (0.8, 0.5, 0.45)]
+    self.bases = np.asarray(bases, dtype=float)
+    self.directions = _normalize(directions)
+    flex = np.asarray(flex_directions, dtype=float)
+    flex = flex - np.sum(flex * self.directions, axis=-1, keepdims=True) * self.directions
+    self.flex_directions = _normalize(flex)
+    self.lengths = np.asarray(lengths, dtype=float)
+    wrist = [(-0.6, 0.0, 0.0), (0.7, 0.0, 0.0)]
+    self.palm = np.vstack([wrist[1:], self.bases, wrist[:1], wrist[1:]])
+
+  def forward(self, angles):
+    """
+    Computes the joint positions of all fingers for an array of angles of
+    shape `(..., 5, 3)` in degrees. Returns an array of shape `(..., 5, 4, 3)`
+    with the MCP, IP and DIP joints and the fingertip of every finger.
+    """
+
+    phi = np.cumsum(np.radians(angles), axis=-1)[..., None]       # (..., 5, 3, 1)
+    segments = self.lengths[..., None] * (
+      np.cos(phi) * self.directions[:, None, :] +
+      np.sin(phi) * self.flex_directions[:, None, :])             # (..., 5, 3, 3)
+    joints = np.cumsum(segments, axis=-2) + self.bases[:, None, :]
+    shape = joints.shape[:-2] + (1, 3)
+    bases = np.broadcast_to(self.bases[:, None, :], shape)
+    return np.concatenate([bases, joints], axis=-2)
+
+
+class HandView(object):
+  """
+  Draws a #HandModel into a 3D axes and updates it from the latest angle
+  state every *interval* milliseconds.
+
+  # Parameters
+  model: The #HandModel, defaults to a new instance.
+  ax: A 3D axes to draw into. A new figure is created if omitted.
+  interval: The render interval in milliseconds.
+  colors: One color per finger.
+  title: The title of the axes.
+  """
+
+  def __init__(self, model=None, ax=None, interval=33,
+               colors=('r', 'g', 'b', 'c', 'm'), title=None):
+    from matplotlib import pyplot as plt
+
+    self.model = model or HandModel()
+    self.interval = interval
+    self._lock = threading.Lock()
+    self._angles = np.zeros((len(FINGERS), len(JOINTS)))
+    self._version = 0
+    self._drawn = -1
+
+    if ax is None:
+      self.fig = plt.figure()
+      ax = self.fig.add_subplot(111, projection='3d')
+    else:
+      self.fig = ax.figure
+    self.ax = ax
+    ax.set_xlim([-2, 2])
+    ax.set_ylim([0, 4])
+    ax.set_zlim([-2, 2])
+    ax.set_xlabel('X')
+    ax.set_ylabel('Y')
+    ax.set_zlabel('Z')
+    if title:
+      ax.set_title(title)
+
+    palm = self.model.palm
+    ax.plot(palm[:, 0], palm[:, 1], palm[:, 2], color='0.5')
+    joints = self.model.forward(self._angles)
+    self.lines = [
+      ax.plot(j[:, 0], j[:, 1], j[:, 2], color=c, linewidth=5, marker='o')[0]
+      for j, c in zip(joints, colors)
+    ]
+    self._frame_times = collections.deque(maxlen=60)
+    self._timer = None
+
+  @property
+  def angles(self):
+    """
+    A copy of the latest angle state.
+    """
+
+    with self._lock:
+      return self._angles.copy()
+
+  def set_angles(self, angles):
+    """
+    Replaces the complete `(5, 3)` angle state. Does not draw.
+    """
+
+    with self._lock:
+      self._angles[:] = angles
+      self._version += 1
+
+  def set_finger(self, finger, angles):
+    """
+    Sets the joint angles of one finger, given by index or name. Does not
+    draw.
+    """
+
+    if not isinstance(finger, numbers.Integral):  # also NumPy integers
+      finger = FINGERS.index(finger)
+    with self._lock:
+      self._angles[finger, :len(angles)] = angles
+      self._version += 1
+
+  @property
+  def fps(self):
+    """
+    The rate at which frames with new angles were rendered recently.
+    """
+
+    times = self._frame_times
+    if len(times) < 2 or times[-1] == times[0]:
+      return 0.0
+    return (len(times) - 1) / (times[-1] - times[0])
+
+  def update(self, *args):
+    """
+    Renders the latest angle state if it changed since the last frame.
+    """
+
+    with self._lock:
+      if self._version == self._drawn:
+        return
+      self._drawn = self._version
+      angles = self._angles.copy()
+    joints = self.model.forward(angles)
+    for line, j in zip(self.lines, joints):
+      line.set_data_3d(j[:, 0], j[:, 1], j[:, 2])
+    self._frame_times.append(time.perf_counter())
+    self.fig.canvas.draw_idle()
+
+  def start(self):
+    if self._timer is None:
+      self._timer = self.fig.canvas.new_timer(interval=self.interval)
+      self._timer.add_callback(self.update)
+    self._timer.start()
+
+  def stop(self):
+    if self._timer is not None:
+      self._timer.stop()
+
+  def show(self):
+    """
+    Starts the render timer and blocks in #matplotlib.pyplot.show().
+    """
+
+    from matplotlib import pyplot as plt
+    self.start()
+    plt.show()
+    self.stop()
+
+
+__all__ = ['FINGERS', 'JOINTS', 'HandModel', 'HandView']
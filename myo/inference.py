@@ -0,0 +1,278 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015-2018 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+Micro-batched model inference for many concurrent streams.
+
+Calling `model.predict()` of a scikit-learn model with one `(1, 8)` row
+costs almost the same as calling it with a few hundred rows; the time goes
+into input validation and per-call overhead. The #InferenceServer collects
+the feature vectors that are submitted from any thread, and its worker
+thread runs one vectorized call per model for all of them: when the oldest
+pending request has waited *max_delay* seconds, or as soon as *max_batch*
+requests are pending. The results are routed back through futures or
+callbacks.
+
+```python
+server = myo.inference.InferenceServer(max_delay=0.005)
+with server.run_in_background():
+  # In the handler of every user stream:
+  server.submit(model, window.mean(axis=0), key=user, callback=show)
+```
+
+Requests with a *key* replace a pending request with the same key (its
+future is cancelled), so a stream that produces windows faster than they
+are served never gets more than one request into a batch.
+"""
+
+import collections
+import contextlib
+import threading
+import time
+
+import numpy as np
+
+from .metrics import LogHistogram
+
+try:
+  from concurrent.futures import Future
+except ImportError:  # Python 2 without the futures backport
+  Future = None
+
+_ANONYMOUS = object()
+
+
+class _Request(object):
+
+  __slots__ = ('model', 'features', 'future', 'callback', 'time')
+
+  def __init__(self, model, features, future, callback, time):
+    self.model = model
+    self.features = features
+    self.future = future
+    self.callback = callback
+    self.time = time
+
+
+class InferenceServer(object):
+  """
+  Batches the predictions of many streams.
+
+  # Parameters
+  max_delay: The maximum time in seconds a request waits for others to be
+    batched with. `0` runs a batch as soon as the worker is idle.
+  max_batch: A batch runs immediately when this many requests are pending.
+  method: The name of the model method that is called with the `(n, k)`
+    feature matrix, e.g. `'predict_proba'`.
+
+  # Attributes
+  latency: A #LogHistogram of the time from #submit() to the result.
+  predict_time: A #LogHistogram of the duration of the model calls.
+  batches, predictions, superseded, errors: Counters. #errors counts
+    failed model calls and callbacks that raised.
+  """
+
+  def __init__(self, max_delay=0.005, max_batch=1024, method='predict',
+               clock=time.perf_counter):
+    if Future is None:
+      raise RuntimeError('concurrent.futures is not available')
+    self.max_delay = max_delay
+    self.max_batch = max_batch
+    self.method = method
+    self.clock = clock
+    self._cond = threading.Condition()
+    self._pending = collections.OrderedDict()
+    self._counter = 0
+    self._stop = False
+    self._thread = None
+    self.latency = LogHistogram()
+    self.predict_time = LogHistogram()
+    self.batches = 0
+    self.predictions = 0
+    self.superseded = 0
+    self.errors = 0
+
+  def submit(self, model, features, key=None, callback=None):
+    """
+    Queues the feature vector *features* (a 1-D sequence) for
+    `model.<method>()` and returns a #Future for the result of this row.
+    *callback* is called with the result on the worker thread (it is not
+    called on errors); exceptions raised by *callback* are counted in
+    #errors and otherwise ignored. A pending request with the same *key* is
+    cancelled and replaced; the new request takes over its place in the
+    queue and its deadline.
+    """
+
+    future = Future()
+    request = _Request(model, features, future, callback, self.clock())
+    with self._cond:
+      if key is None:
+        self._counter += 1
+        key = (_ANONYMOUS, self._counter)
+      else:
+        old = self._pending.get(key)
+        if old is not None:
+          # Keep the place and the arrival time of the replaced request, or
+          # a stream that submits faster than max_delay would push its own
+          # deadline back forever.
+          request.time = old.time
+          old.future.cancel()
+          self.superseded += 1
+      self._pending[key] = request
+      if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+        self._cond.notify()
+    return future
+
+  def __len__(self):
+    return len(self._pending)
+
+  # Worker thread
+
+  def _take(self):
+    """
+    Waits until a batch is due and returns its requests, or #None when the
+    server is stopped.
+    """
+
+    with self._cond:
+      while not self._stop:
+        if not self._pending:
+          self._cond.wait()
+          continue
+        oldest = next(iter(self._pending.values())).time
+        remaining = oldest + self.max_delay - self.clock()
+        if remaining > 0 and len(self._pending) < self.max_batch:
+          self._cond.wait(remaining)
+          continue
+        if len(self._pending) <= self.max_batch:
+          batch = list(self._pending.values())
+          self._pending.clear()
+        else:
+          batch = [self._pending.popitem(last=False)[1] for _ in range(self.max_batch)]
+        return batch
+      return None
+
+  def process(self, batch):
+    """
+    Runs one model call per model in *batch* and resolves the requests.
+    """
+
+    groups = collections.OrderedDict()
+    for request in batch:
+      if request.future.set_running_or_notify_cancel():
+        groups.setdefault(id(request.model), []).append(request)
+    for requests in groups.values():
+      model = requests[0].model
+      try:
+        features = np.array([r.features for r in requests], dtype=np.float64)
+        if features.ndim != 2:
+          features = features.reshape(len(requests), -1)
+        start = self.clock()
+        results = getattr(model, self.method)(features)
+        self.predict_time.record(self.clock() - start)
+      except Exception as exc:
+        self.errors += 1
+        for request in requests:
+          request.future.set_exception(exc)
+        continue
+      now = self.clock()
+      latency = self.latency
+      for request, result in zip(requests, results):
+        latency.record(now - request.time)
+        request.future.set_result(result)
+      self.batches += 1
+      self.predictions += len(requests)
+      # Only after every future is resolved: a failing callback must not
+      # leave the rest of the batch (or the worker) hanging.
+      for request, result in zip(requests, results):
+        if request.callback is not None:
+          try:
+            request.callback(result)
+          except Exception:
+            self.errors += 1
+
+  def run(self):
+    """
+    Serves batches on the calling thread until #stop() is called. Returns
+    right away if #stop() was called before; #start() clears that.
+    """
+
+    while True:
+      batch = self._take()
+      if batch is None:
+        break
+      self.process(batch)
+
+  def start(self):
+    # Not in run(): a stop() between here and the start of the thread
+    # would be lost.
+    with self._cond:
+      self._stop = False
+    self._thread = threading.Thread(target=self.run, name='myo.inference.InferenceServer')
+    self._thread.daemon = True
+    self._thread.start()
+    return self._thread
+
+  def stop(self, timeout=None):
+    """
+    Stops the worker and cancels the requests that are still pending.
+    """
+
+    with self._cond:
+      self._stop = True
+      pending = list(self._pending.values())
+      self._pending.clear()
+      self._cond.notify_all()
+    for request in pending:
+      request.future.cancel()
+    if self._thread is not None and self._thread is not threading.current_thread():
+      self._thread.join(timeout)
+      self._thread = None
+
+  @contextlib.contextmanager
+  def run_in_background(self):
+    thread = self.start()
+    try:
+      yield thread
+    finally:
+      self.stop()
+
+  def snapshot(self):
+    """
+    Returns `{'batches', 'predictions', 'superseded', 'errors', 'pending',
+    'latency', 'predict_time'}` with #LogHistogram snapshots in seconds.
+    """
+
+    with self._cond:
+      pending = len(self._pending)
+    return {
+      'batches': self.batches,
+      'predictions': self.predictions,
+      'superseded': self.superseded,
+      'errors': self.errors,
+      'pending': pending,
+      'latency': self.latency.copy().snapshot(),
+      'predict_time': self.predict_time.copy().snapshot(),
+    }
+
+
+__all__ = ['InferenceServer']
@@ -0,0 +1,271 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015-2018 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+End-to-end latency tracing of a processing pipeline, from the libmyo event
+timestamp to the consumer of the result.
+
+A #Span is started in the hub callback when a sample arrives and carried
+along with the sample (or with the batch the sample is the newest member
+of). Every pipeline stage marks the span when it is done with it, and the
+consumer finishes it. The #LatencyTracer aggregates the time spent in
+every stage into histograms and calls an alert function when the p99 of
+the end-to-end latency exceeds a budget.
+
+```python
+tracer = myo.latency.LatencyTracer(budget=0.1)
+
+def on_emg(self, event):
+  self.buffer.append(event.emg)
+  self.span = tracer.begin(event.timestamp)
+
+def predict(self):
+  span = self.span
+  window = self.buffer.latest(512); span.mark('buffer')
+  features = window.mean(axis=0); span.mark('feature')
+  label = model.predict([features]); span.mark('prediction')
+  show(label); span.mark('consumer')
+  span.finish()
+
+print(tracer.report())
+```
+
+The libmyo timestamps and the host clock are not synchronized, so the
+*source* stage (event timestamp to callback entry) is measured relative to
+the smallest offset between the two clocks observed recently. It shows the
+delay and the jitter added on top of the fastest delivery, not the absolute
+radio latency.
+"""
+
+import collections
+import threading
+import time
+import warnings
+
+from .metrics import LogHistogram
+
+_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Span(object):
+  """
+  The timing of one sample or batch through the pipeline. Created with
+  #LatencyTracer.begin().
+
+  # Attributes
+  timestamp: The libmyo timestamp of the sample in microseconds.
+  entry: The #LatencyTracer.clock value when the callback was entered.
+  source: The estimated delay from the timestamp to the callback entry in
+    seconds.
+  marks: A list of `(stage, time)` tuples.
+  """
+
+  __slots__ = ('timestamp', 'entry', 'source', 'marks', 'finished', '_tracer')
+
+  def __init__(self, tracer, timestamp, entry, source):
+    self._tracer = tracer
+    self.timestamp = timestamp
+    self.entry = entry
+    self.source = source
+    self.marks = []
+    self.finished = False
+
+  def mark(self, stage):
+    """
+    Records that the stage *stage* is done with this span.
+    """
+
+    self.marks.append((stage, self._tracer.clock()))
+
+  def finish(self):
+    """
+    Hands the span to the tracer. A span is only recorded once; finishing
+    it again (e.g. when the same newest sample is processed twice) does
+    nothing.
+    """
+
+    if not self.finished:
+      self.finished = True
+      self._tracer.record(self)
+
+  @property
+  def total(self):
+    """
+    The end-to-end latency up to the last mark, in seconds.
+    """
+
+    end = self.marks[-1][1] if self.marks else self.entry
+    return self.source + (end - self.entry)
+
+
+class LatencyTracer(object):
+  """
+  Aggregates finished #Span objects into per-stage histograms.
+
+  Besides the cumulative histograms, the tracer keeps the histograms of the
+  current *window* (in seconds). When a window is complete, its p99 of the
+  end-to-end latency is compared to the *budget*, and *on_alert* is called
+  with `(p99, budget, window_snapshot)` if it is exceeded. The default
+  alert issues a #RuntimeWarning.
+
+  # Parameters
+  budget: The p99 end-to-end latency budget in seconds, or #None.
+  window: The length of an alert window in seconds.
+  offset_window: The time in seconds after which the clock offset estimate
+    is renewed, to follow the drift between device and host clock.
+  """
+
+  def __init__(self, budget=None, window=10.0, on_alert=None,
+               offset_window=30.0, clock=time.perf_counter):
+    self.budget = budget
+    self.window = window
+    self.on_alert = on_alert
+    self.offset_window = offset_window
+    self.clock = clock
+    self._lock = threading.Lock()
+    self._offset = None
+    self._next_offset = None
+    self._offset_started = None
+    #: The alerts that were raised, as `(clock, p99)` tuples.
+    self.alerts = collections.deque(maxlen=100)
+    self.reset()
+
+  def reset(self):
+    with self._lock:
+      self._stages = collections.OrderedDict()
+      self._window_stages = collections.OrderedDict()
+      self._window_started = self.clock()
+      self.spans = 0
+
+  def begin(self, timestamp, entry=None):
+    """
+    Starts a span for a sample with the libmyo *timestamp*, called from the
+    hub callback. *entry* defaults to the current time.
+    """
+
+    if entry is None:
+      entry = self.clock()
+    offset = entry - timestamp * 1e-6
+    # Windowed minimum of the clock offset: the current estimate is the
+    # minimum of the previous and the current window.
+    if self._offset_started is None or entry - self._offset_started > self.offset_window:
+      self._offset = self._next_offset
+      self._next_offset = offset
+      self._offset_started = entry
+    elif offset < self._next_offset:
+      self._next_offset = offset
+    base = self._next_offset if self._offset is None else min(self._offset, self._next_offset)
+    return Span(self, timestamp, entry, offset - base)
+
+  def _record_into(self, stages, span):
+    def hist(stage):
+      h = stages.get(stage)
+      if h is None:
+        h = stages[stage] = LogHistogram()
+      return h
+    hist('source').record(span.source)
+    previous = span.entry
+    for stage, t in span.marks:
+      hist(stage).record(t - previous)
+      previous = t
+    hist('total').record(span.total)
+
+  def record(self, span):
+    """
+    Records a finished span. Usually called through #Span.finish().
+    """
+
+    alert = None
+    with self._lock:
+      now = self.clock()
+      if now - self._window_started >= self.window:
+        alert = self._close_window(now)
+      self._record_into(self._stages, span)
+      self._record_into(self._window_stages, span)
+      self.spans += 1
+    if alert is not None:
+      self._alert(*alert)
+
+  def _close_window(self, now):
+    stages = self._window_stages
+    self._window_stages = collections.OrderedDict()
+    self._window_started = now
+    total = stages.get('total')
+    if self.budget is None or total is None or not total.count:
+      return None
+    p99 = total.percentile(0.99)
+    if p99 <= self.budget:
+      return None
+    self.alerts.append((now, p99))
+    return p99, _snapshot(stages)
+
+  def _alert(self, p99, snapshot):
+    if self.on_alert is not None:
+      self.on_alert(p99, self.budget, snapshot)
+    else:
+      slowest = max((s for s in snapshot if s != 'total'),
+                    key=lambda s: snapshot[s]['p99'] or 0.0, default=None)
+      warnings.warn('p99 latency {:.1f} ms exceeds the budget of {:.1f} ms '
+                    '(slowest stage: {})'.format(p99 * 1e3, self.budget * 1e3,
+                                                 slowest), RuntimeWarning)
+
+  def snapshot(self):
+    """
+    Returns `{stage: {'count', 'mean', 'p50', 'p90', 'p99', 'max'}}` in
+    seconds over all recorded spans. The stages are in the order they were
+    first seen, starting with `source` and ending with `total`.
+    """
+
+    with self._lock:
+      stages = collections.OrderedDict(
+        (k, v.copy()) for k, v in self._stages.items())
+    return _snapshot(stages)
+
+  def report(self):
+    """
+    Returns the #snapshot() as a text table in milliseconds.
+    """
+
+    snapshot = self.snapshot()
+    lines = ['{:<12} {:>8} {:>8} {:>8} {:>8} {:>8}'.format(
+      'stage', 'count', 'p50', 'p90', 'p99', 'max')]
+    for stage, s in snapshot.items():
+      lines.append('{:<12} {:>8} {:>8.2f} {:>8.2f} {:>8.2f} {:>8.2f}'.format(
+        stage, s['count'], s['p50'] * 1e3, s['p90'] * 1e3, s['p99'] * 1e3,
+        s['max'] * 1e3))
+    return '\n'.join(lines)
+
+
+def _snapshot(stages):
+  result = collections.OrderedDict()
+  items = [(k, v) for k, v in stages.items() if k != 'total']
+  if 'total' in stages:
+    items.append(('total', stages['total']))
+  for stage, hist in items:
+    entry = {'count': hist.count, 'mean': hist.mean, 'max': hist.max}
+    for q in _QUANTILES:
+      entry['p{:g}'.format(q * 100)] = hist.percentile(q)
+    result[stage] = entry
+  return result
+
+
+__all__ = ['Span', 'LatencyTracer']
@@ -0,0 +1,315 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015-2018 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+Synthetic EMG/IMU load for stress testing listeners without hardware. The
+generated events are #myo.trace.TraceEvent objects and can be delivered to
+anything that accepts a #Hub handler.
+
+```python
+gen = myo.loadgen.LoadGenerator(num_devices=64, loss=0.01, jitter=0.002)
+gen.run(listener.on_event, duration=10.0, realtime=True)
+
+report = myo.loadgen.find_saturation({
+  'api': myo.ApiDeviceListener,
+  'collector': lambda: EmgCollector(512),
+})
+```
+"""
+
+import heapq
+import math
+import random
+import time
+
+from ._ffi import EventType, HandlerResult
+from .trace import TraceDevice, TraceEvent
+from .macaddr import MacAddress
+
+
+def _resolve_handler(handler):
+  if not callable(handler):
+    if hasattr(handler, 'on_event'):
+      return handler.on_event
+    raise TypeError('expected callable or DeviceListener')
+  return handler
+
+
+class LoadGenerator(object):
+  """
+  Generates the event stream of *num_devices* virtual armbands.
+
+  # Parameters
+  num_devices: The number of virtual devices.
+  emg_rate: EMG events per second and device (the Myo streams at 200 Hz).
+  imu_rate: Orientation events per second and device (50 Hz on the Myo).
+  amplitude: Standard deviation of the resting EMG signal. Either a number,
+    a sequence of 8 per-channel values or a function `(device_index, t)`
+    returning 8 values for the time *t* in seconds.
+  burst_rate: Average number of activity bursts per second and device.
+  burst_duration: Average duration of a burst in seconds.
+  burst_gain: Factor applied to the amplitude during a burst.
+  loss: Probability for every EMG/IMU event to be dropped.
+  jitter: Standard deviation of the timestamp jitter in seconds.
+  seed: Seed for the random number generator.
+  """
+
+  def __init__(self, num_devices=1, emg_rate=200.0, imu_rate=50.0,
+               amplitude=10.0, burst_rate=0.2, burst_duration=0.5,
+               burst_gain=6.0, loss=0.0, jitter=0.0, seed=None,
+               start_timestamp=None):
+    if num_devices < 1 or num_devices > 256:
+      raise ValueError('num_devices must be in [1, 256]')
+    self.num_devices = num_devices
+    self.emg_rate = float(emg_rate)
+    self.imu_rate = float(imu_rate)
+    self.amplitude = amplitude
+    self.burst_rate = burst_rate
+    self.burst_duration = burst_duration
+    self.burst_gain = burst_gain
+    self.loss = loss
+    self.jitter = jitter
+    self.random = random.Random(seed)
+    if start_timestamp is None:
+      start_timestamp = int(time.time() * 1e6)
+    self.start_timestamp = start_timestamp
+    self.devices = [TraceDevice(i) for i in range(num_devices)]
+    for device in self.devices:
+      device.mac_address = MacAddress(0xD0C0FFEE0000 + device.index)
+      device.firmware_version = (1, 5, 1970, 2)
+
+  @property
+  def nominal_rate(self):
+    """
+    The number of events per second the generator produces without loss.
+    """
+
+    return self.num_devices * (self.emg_rate + self.imu_rate)
+
+  def _amplitudes(self, index, t):
+    amp = self.amplitude
+    if callable(amp):
+      return amp(index, t)
+    if isinstance(amp, (int, float)):
+      return (amp,) * 8
+    return amp
+
+  def _emg(self, index, t, gain):
+    gauss = self.random.gauss
+    return tuple(max(-128, min(127, int(gauss(0.0, a * gain))))
+                 for a in self._amplitudes(index, t))
+
+  def _imu(self, index, t):
+    # Slow rotation about the forearm axis plus noise, gravity along -z.
+    angle = 0.5 * math.sin(0.3 * t + index)
+    gauss = self.random.gauss
+    orientation = (math.sin(angle / 2.0), 0.0, 0.0, math.cos(angle / 2.0))
+    accel = (gauss(0.0, 0.02), gauss(0.0, 0.02), -1.0 + gauss(0.0, 0.02))
+    gyro = (math.degrees(0.15 * math.cos(0.3 * t + index)) + gauss(0.0, 0.5),
+            gauss(0.0, 0.5), gauss(0.0, 0.5))
+    return orientation + accel + gyro
+
+  def _bursts(self, duration):
+    """
+    Returns a list of `(start, end)` intervals of activity.
+    """
+
+    bursts = []
+    if self.burst_rate <= 0:
+      return bursts
+    t = self.random.expovariate(self.burst_rate)
+    while t < duration:
+      length = self.random.expovariate(1.0 / self.burst_duration)
+      bursts.append((t, t + length))
+      t += length + self.random.expovariate(self.burst_rate)
+    return bursts
+
+  def _device_events(self, device, duration):
+    index = device.index
+    start = self.start_timestamp
+    rnd = self.random.random
+    gauss = self.random.gauss
+    bursts = self._bursts(duration)
+    burst_index = 0
+
+    emg_period = 1.0 / self.emg_rate if self.emg_rate > 0 else None
+    imu_period = 1.0 / self.imu_rate if self.imu_rate > 0 else None
+    next_emg = 0.0 if emg_period else float('inf')
+    next_imu = 0.0 if imu_period else float('inf')
+
+    seq = 0
+    while True:
+      seq += 1
+      if next_emg <= next_imu:
+        t, kind = next_emg, EventType.emg
+        next_emg += emg_period
+      else:
+        t, kind = next_imu, EventType.orientation
+        next_imu += imu_period
+      if t >= duration:
+        break
+      if self.loss and rnd() < self.loss:
+        continue
+
+      ts = t + gauss(0.0, self.jitter) if self.jitter else t
+      timestamp = start + int(max(ts, 0.0) * 1e6)
+      if kind == EventType.emg:
+        while burst_index < len(bursts) and bursts[burst_index][1] < t:
+          burst_index += 1
+        active = burst_index < len(bursts) and bursts[burst_index][0] <= t
+        data = self._emg(index, t, self.burst_gain if active else 1.0)
+      else:
+        data = self._imu(index, t)
+      # Sorted by the nominal time, the timestamps carry the jitter.
+      yield (t, index, seq, TraceEvent(kind, timestamp, device, data))
+
+  def events(self, duration):
+    """
+    Returns the list of events for *duration* seconds of all devices in
+    timestamp order, starting with a *paired* and *connected* event for
+    every device.
+    """
+
+    result = []
+    for device in self.devices:
+      payload = device.firmware_version + (device.mac_address.value,)
+      for kind in (EventType.paired, EventType.connected):
+        result.append(TraceEvent(kind, self.start_timestamp, device, payload))
+    streams = [self._device_events(d, duration) for d in self.devices]
+    result.extend(x[3] for x in heapq.merge(*streams))
+    return result
+
+  def run(self, handler, duration, realtime=False, clock=time.perf_counter,
+          sleep=time.sleep):
+    """
+    Generates *duration* seconds of events and delivers them to *handler*.
+    Returns a #LoadReport.
+    """
+
+    return deliver(self.events(duration), handler, realtime, clock, sleep)
+
+
+class LoadReport(object):
+  """
+  The result of delivering a generated event stream to a handler.
+
+  # Attributes
+  events: The number of events that were delivered.
+  elapsed: Wall time in seconds.
+  event_rate: Delivered events per second.
+  max_lag: The largest delay in seconds by which an event was delivered
+    after its scheduled time (only for realtime delivery).
+  final_lag: The delay of the last event. A final lag that keeps growing
+    with the duration means the handler can not keep up.
+  stopped: #True if the handler asked to stop.
+  """
+
+  def __init__(self, events, elapsed, max_lag, final_lag, stopped):
+    self.events = events
+    self.elapsed = elapsed
+    self.event_rate = events / elapsed if elapsed > 0 else float('inf')
+    self.max_lag = max_lag
+    self.final_lag = final_lag
+    self.stopped = stopped
+
+  def __repr__(self):
+    return ('LoadReport(events={}, event_rate={:.0f}/s, max_lag={:.4f}s, '
+            'final_lag={:.4f}s)').format(self.events, self.event_rate,
+                                         self.max_lag, self.final_lag)
+
+
+def deliver(events, handler, realtime=False, clock=time.perf_counter,
+            sleep=time.sleep):
+  """
+  Delivers a list of events to *handler*, optionally paced by their
+  timestamps, and returns a #LoadReport.
+  """
+
+  handler = _resolve_handler(handler)
+  if not events:
+    return LoadReport(0, 0.0, 0.0, 0.0, False)
+
+  first = events[0].timestamp
+  start = clock()
+  max_lag = lag = 0.0
+  count = 0
+  stopped = False
+  for event in events:
+    if realtime:
+      target = start + (event.timestamp - first) * 1e-6
+      lag = clock() - target
+      if lag < 0:
+        sleep(-lag)
+        lag = 0.0
+      elif lag > max_lag:
+        max_lag = lag
+    result = handler(event)
+    count += 1
+    if result is False or (result is not None and result is not True
+                           and HandlerResult(result) == HandlerResult.stop):
+      stopped = True
+      break
+
+  elapsed = clock() - start
+  if realtime:
+    lag = elapsed - (event.timestamp - first) * 1e-6
+    max_lag = max(max_lag, lag)
+  return LoadReport(count, elapsed, max_lag, lag, stopped)
+
+
+def find_saturation(stages, device_counts=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+                    duration=2.0, max_lag=0.05, **generator_options):
+  """
+  Finds the load at which each pipeline stage starts falling behind.
+
+  *stages* maps a name to a factory that returns a fresh handler or
+  #DeviceListener for every trial. For every stage, the generated event
+  stream is delivered in real time with an increasing number of devices
+  until an event is delivered more than *max_lag* seconds late.
+
+  Returns a dictionary that maps every stage name to a dictionary with
+  the keys `devices` and `event_rate` (the largest load that was
+  sustained, or #None if not even the smallest one was) and `failed_at`
+  (the first device count that was not sustained, or #None).
+  """
+
+  results = {}
+  for name, factory in stages.items():
+    sustained = None
+    failed_at = None
+    for count in device_counts:
+      gen = LoadGenerator(num_devices=count, seed=count, **generator_options)
+      events = gen.events(duration)
+      report = deliver(events, factory(), realtime=True)
+      if report.max_lag > max_lag:
+        failed_at = count
+        break
+      sustained = {'devices': count, 'event_rate': gen.nominal_rate}
+    results[name] = {
+      'devices': sustained['devices'] if sustained else None,
+      'event_rate': sustained['event_rate'] if sustained else None,
+      'failed_at': failed_at,
+    }
+  return results
+
+
+__all__ = ['LoadGenerator', 'LoadReport', 'deliver', 'find_saturation']
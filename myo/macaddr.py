@@ -73,13 +73,13 @@ class MacAddress(object):
     if isinstance(value, six.integer_types):
       if value < 0 or value > MAX_VALUE:
         raise ValueError('value {!r} out of MAC address range'.format(value))
-    elif isinstance(value, six.string_to_int):
+    elif isinstance(value, (six.binary_type, six.text_type)):
       if isinstance(value, six.text_type):
         value = value.encode('ascii')
       value = decode(value)
     else:
       msg = 'expected string, bytes or int for MacAddress, got {}'
-      return TypeError(msg.format(type(value).__name__))
+      raise TypeError(msg.format(type(value).__name__))
 
     self._value = value
     self._string = None
@@ -92,6 +92,19 @@ class MacAddress(object):
   def __repr__(self):
     return '<MAC {}>'.format(self)
 
+  def __eq__(self, other):
+    if isinstance(other, MacAddress):
+      return self._value == other._value
+    return NotImplemented
+
+  def __ne__(self, other):
+    if isinstance(other, MacAddress):
+      return self._value != other._value
+    return NotImplemented
+
+  def __hash__(self):
+    return hash(self._value)
+
   @property
   def value(self):
     return self._value
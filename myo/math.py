@@ -23,6 +23,11 @@
 import math
 import six
 
+try:
+  import numpy as np
+except ImportError:
+  np = None
+
 
 class Vector(object):
   """
@@ -131,6 +136,73 @@ class Vector(object):
 
     return math.acos(self.dot(rhs) / (self.magnitude() * rhs.magnitude()))
 
+  # In-place variants. These modify the vector and return it, which allows
+  # per-event code to reuse preallocated vectors instead of creating new ones.
+
+  def set(self, x, y, z):
+    """
+    Assigns the components of the vector in-place.
+    """
+
+    self.x = x
+    self.y = y
+    self.z = z
+    return self
+
+  def iadd(self, rhs):
+    """
+    Adds the vector *rhs* to *self* in-place.
+    """
+
+    self.x += rhs.x
+    self.y += rhs.y
+    self.z += rhs.z
+    return self
+
+  def isub(self, rhs):
+    """
+    Substracts the vector *rhs* from *self* in-place.
+    """
+
+    self.x -= rhs.x
+    self.y -= rhs.y
+    self.z -= rhs.z
+    return self
+
+  def iscale(self, factor):
+    """
+    Multiplies the vector with the scalar *factor* in-place.
+    """
+
+    self.x *= factor
+    self.y *= factor
+    self.z *= factor
+    return self
+
+  def inormalize(self):
+    """
+    Normalizes the vector in-place.
+    """
+
+    norm = math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+    self.x /= norm
+    self.y /= norm
+    self.z /= norm
+    return self
+
+  def cross_into(self, rhs, out):
+    """
+    Writes the cross product of this vector and *rhs* into *out*, which
+    may be *self* or *rhs*.
+    """
+
+    x, y, z = self.x, self.y, self.z
+    out.x, out.y, out.z = (
+      y * rhs.z - z * rhs.y,
+      z * rhs.x - x * rhs.z,
+      x * rhs.y - y * rhs.x)
+    return out
+
   __abs__ = magnitude
 
 
@@ -145,7 +217,7 @@ class Quaternion(object):
   with other 3D APIs that provide a vector class.
   """
 
-  __slots__ = ('x', 'y', 'z', 'w')
+  __slots__ = ('x', 'y', 'z', 'w', '_matrix', '_mx', '_my', '_mz', '_mw')
 
   def __init__(self, x, y, z, w):
     super(Quaternion, self).__init__()
@@ -153,12 +225,16 @@ class Quaternion(object):
     self.y = float(y)
     self.z = float(z)
     self.w = float(w)
+    self._matrix = None
 
   def __mul__(self, rhs):
     """
     Multiplies *self* with the #Quaternion *rhs* and returns a new #Quaternion.
+    If *rhs* is a #QuaternionArray, the result is a #QuaternionArray.
     """
 
+    if isinstance(rhs, QuaternionArray):
+      return QuaternionArray(self) * rhs
     if not isinstance(rhs, Quaternion):
       raise TypeError('can only multiply with Quaternion')
     return Quaternion(
@@ -222,6 +298,102 @@ class Quaternion(object):
     qvec = self * Quaternion(vec.x, vec.y, vec.z, 0) * ~self
     return type(vec)(qvec.x, qvec.y, qvec.z)
 
+  # In-place variants. These modify the quaternion (or the *out* argument)
+  # and return it, so that the per-event orientation handling does not need
+  # to allocate new objects.
+
+  def set(self, x, y, z, w):
+    """
+    Assigns the components of the quaternion in-place.
+    """
+
+    self.x = x
+    self.y = y
+    self.z = z
+    self.w = w
+    return self
+
+  def imul(self, rhs):
+    """
+    Multiplies *self* with the #Quaternion *rhs* in-place.
+    """
+
+    x, y, z, w = self.x, self.y, self.z, self.w
+    rx, ry, rz, rw = rhs.x, rhs.y, rhs.z, rhs.w
+    self.x = w * rx + x * rw + y * rz - z * ry
+    self.y = w * ry - x * rz + y * rw + z * rx
+    self.z = w * rz + x * ry - y * rx + z * rw
+    self.w = w * rw - x * rx - y * ry - z * rz
+    return self
+
+  def iconjugate(self):
+    """
+    Replaces the quaternion with its conjugate in-place.
+    """
+
+    self.x = -self.x
+    self.y = -self.y
+    self.z = -self.z
+    return self
+
+  def inormalize(self):
+    """
+    Normalizes the quaternion in-place.
+    """
+
+    x, y, z, w = self.x, self.y, self.z, self.w
+    magnitude = math.sqrt(x * x + y * y + z * z + w * w)
+    self.x = x / magnitude
+    self.y = y / magnitude
+    self.z = z / magnitude
+    self.w = w / magnitude
+    return self
+
+  def rotation_matrix(self):
+    """
+    Returns the 3x3 matrix that applies the same transformation as
+    #rotate() as a flat, row-major list of 9 floats. The matrix is cached
+    on the quaternion and only recomputed after its components changed, so
+    rotating many vectors by the same quaternion is cheap. The returned
+    list is owned by the quaternion and must not be modified.
+    """
+
+    x, y, z, w = self.x, self.y, self.z, self.w
+    m = self._matrix
+    if m is not None and self._mx == x and self._my == y \
+        and self._mz == z and self._mw == w:
+      return m
+    if m is None:
+      m = self._matrix = [0.0] * 9
+
+    xx, yy, zz, ww = x * x, y * y, z * z, w * w
+    xy, xz, yz = x * y, x * z, y * z
+    wx, wy, wz = w * x, w * y, w * z
+    m[0] = ww + xx - yy - zz
+    m[1] = 2.0 * (xy - wz)
+    m[2] = 2.0 * (xz + wy)
+    m[3] = 2.0 * (xy + wz)
+    m[4] = ww - xx + yy - zz
+    m[5] = 2.0 * (yz - wx)
+    m[6] = 2.0 * (xz - wy)
+    m[7] = 2.0 * (yz + wx)
+    m[8] = ww - xx - yy + zz
+    self._mx, self._my, self._mz, self._mw = x, y, z, w
+    return m
+
+  def rotate_into(self, vec, out):
+    """
+    Writes *vec* rotated by this #Quaternion into the vector *out*, which
+    may be *vec* itself. Uses the cached #rotation_matrix().
+    """
+
+    m = self.rotation_matrix()
+    x, y, z = vec.x, vec.y, vec.z
+    out.x = m[0] * x + m[1] * y + m[2] * z
+    out.y = m[3] * x + m[4] * y + m[5] * z
+    out.z = m[6] * x + m[7] * y + m[8] * z
+    return out
+
   # Reference:
   # http://answers.unity3d.com/questions/416169/finding-pitchrollyaw-from-quaternions.html
 
@@ -276,27 +448,27 @@ class Quaternion(object):
     cross = source.cross(dest)
     cos_theta = source.dot(dest)
 
-    # Return identity if the vectors are the same direction.
-    if cos_theta >= 1.0:
-      return Quaternion.identity()
-
     # Product of the square of the magnitudes.
-    k = math.sqrt(source.dot(source), dest.dot(dest))
+    k = math.sqrt(source.dot(source) * dest.dot(dest))
 
     # Return identity in the degenerate case.
     if k <= 0.0:
       return Quaternion.identity()
 
+    # Return identity if the vectors are the same direction.
+    if cos_theta / k >= 1.0:
+      return Quaternion.identity()
+
     # Special handling for vectors facing opposite directions.
     if cos_theta / k <= -1:
       x_axis = Vector(1, 0, 0)
-      y_axis = Vector(0, 1, 1)
-      if abs(source.dot(x_ais)) < 1.0:
+      y_axis = Vector(0, 1, 0)
+      if abs(source.normalized().dot(x_axis)) < 1.0:
         cross = source.cross(x_axis)
       else:
         cross = source.cross(y_axis)
 
-    return Quaternion(cross.x, cross.y, cross.z, k + cos_theta)
+    return Quaternion(cross.x, cross.y, cross.z, k + cos_theta).normalized()
 
   @staticmethod
   def from_axis_angle(axis, angle):
@@ -312,3 +484,358 @@ class Quaternion(object):
     return Quaternion(
       axis.x * sincomp, axis.y * sincomp,
       axis.z * sincomp, math.cos(angle / 2.0))
+
+
+def _require_numpy():
+  if np is None:
+    raise RuntimeError('numpy is required for VectorArray and QuaternionArray')
+
+
+def _as_array(value, width, name):
+  """
+  Converts *value* to a float64 array of shape `(N, width)`. Accepts
+  array-likes, the array classes of this module and sequences of the scalar
+  classes.
+  """
+
+  _require_numpy()
+  if isinstance(value, (VectorArray, QuaternionArray)):
+    value = value.data
+  elif isinstance(value, (Vector, Quaternion)):
+    value = tuple(value)
+  elif isinstance(value, (list, tuple)) and value and \
+      isinstance(value[0], (Vector, Quaternion)):
+    value = [tuple(x) for x in value]
+  array = np.asarray(value, dtype=np.float64)
+  if array.ndim == 1:
+    array = array.reshape(1, -1)
+  if array.ndim != 2 or array.shape[1] != width:
+    raise ValueError('expected {} data of shape (N, {}), got {}'.format(
+      name, width, array.shape))
+  return array
+
+
+class VectorArray(object):
+  """
+  A batch of three-dimensional vectors backed by a NumPy array of shape
+  `(N, 3)`. The operations mirror those of #Vector but are evaluated for all
+  vectors at once. Operands of length 1 (including a single #Vector) are
+  broadcast against the whole batch.
+  """
+
+  __slots__ = ('data',)
+
+  def __init__(self, data):
+    super(VectorArray, self).__init__()
+    self.data = _as_array(data, 3, 'vector')
+
+  @classmethod
+  def from_vectors(cls, vectors):
+    """
+    Creates a #VectorArray from an iterable of #Vector objects.
+    """
+
+    _require_numpy()
+    vectors = list(vectors)
+    data = np.empty((len(vectors), 3))
+    for i, vec in enumerate(vectors):
+      data[i] = (vec.x, vec.y, vec.z)
+    return cls(data)
+
+  def to_vectors(self):
+    """
+    Returns a list of #Vector objects.
+    """
+
+    return [Vector(x, y, z) for x, y, z in self.data.tolist()]
+
+  @property
+  def x(self):
+    return self.data[:, 0]
+
+  @property
+  def y(self):
+    return self.data[:, 1]
+
+  @property
+  def z(self):
+    return self.data[:, 2]
+
+  def __len__(self):
+    return len(self.data)
+
+  def __getitem__(self, index):
+    if isinstance(index, six.integer_types):
+      return Vector(*self.data[index])
+    return VectorArray(self.data[index])
+
+  def __iter__(self):
+    return iter(self.to_vectors())
+
+  def __repr__(self):
+    return 'VectorArray(<{} vectors>)'.format(len(self.data))
+
+  def __mul__(self, rhs):
+    """
+    Multiplies the vectors with *rhs* which can be either a scalar or an
+    array of `N` scalars to retrieve a new #VectorArray, or another vector
+    (array) to compute the dot products.
+    """
+
+    if isinstance(rhs, (Vector, VectorArray)):
+      return self.dot(rhs)
+    rhs = np.asarray(rhs, dtype=np.float64)
+    if rhs.ndim == 1:
+      rhs = rhs[:, None]
+    return VectorArray(self.data * rhs)
+
+  def __add__(self, rhs):
+    if isinstance(rhs, (six.integer_types, float)):
+      return VectorArray(self.data + rhs)
+    return VectorArray(self.data + _as_array(rhs, 3, 'vector'))
+
+  def __sub__(self, rhs):
+    if isinstance(rhs, (six.integer_types, float)):
+      return VectorArray(self.data - rhs)
+    return VectorArray(self.data - _as_array(rhs, 3, 'vector'))
+
+  def __invert__(self):
+    return VectorArray(-self.data)
+
+  def copy(self):
+    return VectorArray(self.data.copy())
+
+  def magnitude(self):
+    """
+    Returns the magnitudes of the vectors as an array of shape `(N,)`.
+    """
+
+    return np.sqrt(np.einsum('ij,ij->i', self.data, self.data))
+
+  def normalized(self):
+    return VectorArray(self.data / self.magnitude()[:, None])
+
+  def dot(self, rhs):
+    rhs = _as_array(rhs, 3, 'vector')
+    return np.einsum('ij,ij->i', *np.broadcast_arrays(self.data, rhs))
+
+  def cross(self, rhs):
+    return VectorArray(np.cross(self.data, _as_array(rhs, 3, 'vector')))
+
+  def angle_to(self, rhs):
+    rhs = VectorArray(rhs)
+    cos = self.dot(rhs) / (self.magnitude() * rhs.magnitude())
+    return np.arccos(np.clip(cos, -1.0, 1.0))
+
+  __abs__ = magnitude
+
+
+class QuaternionArray(object):
+  """
+  A batch of quaternions backed by a NumPy array of shape `(N, 4)` in
+  `(x, y, z, w)` order, the same as #Quaternion. Operands of length 1
+  (including a single #Quaternion) are broadcast against the whole batch.
+  """
+
+  __slots__ = ('data',)
+
+  def __init__(self, data):
+    super(QuaternionArray, self).__init__()
+    self.data = _as_array(data, 4, 'quaternion')
+
+  @classmethod
+  def from_quaternions(cls, quats):
+    """
+    Creates a #QuaternionArray from an iterable of #Quaternion objects.
+    """
+
+    _require_numpy()
+    quats = list(quats)
+    data = np.empty((len(quats), 4))
+    for i, quat in enumerate(quats):
+      data[i] = (quat.x, quat.y, quat.z, quat.w)
+    return cls(data)
+
+  def to_quaternions(self):
+    """
+    Returns a list of #Quaternion objects.
+    """
+
+    return [Quaternion(x, y, z, w) for x, y, z, w in self.data.tolist()]
+
+  @property
+  def x(self):
+    return self.data[:, 0]
+
+  @property
+  def y(self):
+    return self.data[:, 1]
+
+  @property
+  def z(self):
+    return self.data[:, 2]
+
+  @property
+  def w(self):
+    return self.data[:, 3]
+
+  def __len__(self):
+    return len(self.data)
+
+  def __getitem__(self, index):
+    if isinstance(index, six.integer_types):
+      return Quaternion(*self.data[index])
+    return QuaternionArray(self.data[index])
+
+  def __iter__(self):
+    return iter(self.to_quaternions())
+
+  def __repr__(self):
+    return 'QuaternionArray(<{} quaternions>)'.format(len(self.data))
+
+  def __mul__(self, rhs):
+    """
+    Multiplies the quaternions element-wise with *rhs* (a #Quaternion or
+    #QuaternionArray) and returns a new #QuaternionArray.
+    """
+
+    if not isinstance(rhs, (Quaternion, QuaternionArray)):
+      raise TypeError('can only multiply with Quaternion or QuaternionArray')
+    ax, ay, az, aw = self.data.T
+    bx, by, bz, bw = _as_array(rhs, 4, 'quaternion').T
+    result = np.empty(np.broadcast(ax, bx).shape + (4,))
+    result[:, 0] = aw * bx + ax * bw + ay * bz - az * by
+    result[:, 1] = aw * by - ax * bz + ay * bw + az * bx
+    result[:, 2] = aw * bz + ax * by - ay * bx + az * bw
+    result[:, 3] = aw * bw - ax * bx - ay * by - az * bz
+    return QuaternionArray(result)
+
+  def __invert__(self):
+    """
+    Returns the conjugates of the quaternions.
+    """
+
+    result = self.data * (-1.0, -1.0, -1.0, 1.0)
+    return QuaternionArray(result)
+
+  conjugate = __invert__
+
+  def copy(self):
+    return QuaternionArray(self.data.copy())
+
+  def magnitude(self):
+    """
+    Returns the magnitudes of the quaternions as an array of shape `(N,)`.
+    """
+
+    return np.sqrt(np.einsum('ij,ij->i', self.data, self.data))
+
+  def normalized(self):
+    return QuaternionArray(self.data / self.magnitude()[:, None])
+
+  def rotate(self, vec):
+    """
+    Returns *vec* (a #Vector or #VectorArray) rotated by the quaternions.
+    Computes the same `q * v * ~q` product as #Quaternion.rotate() without
+    the intermediate quaternions.
+
+    :return: #VectorArray
+    """
+
+    v = _as_array(vec, 3, 'vector')
+    u = self.data[:, :3]
+    w = self.data[:, 3:]
+    uv = np.cross(u, v)
+    udotv = np.einsum('ij,ij->i', *np.broadcast_arrays(u, v))[:, None]
+    udotu = np.einsum('ij,ij->i', u, u)[:, None]
+    return VectorArray((w * w - udotu) * v + 2.0 * udotv * u + 2.0 * w * uv)
+
+  @property
+  def roll(self):
+    x, y, z, w = self.data.T
+    return np.arctan2(2*y*w - 2*x*z, 1 - 2*y*y - 2*z*z)
+
+  @property
+  def pitch(self):
+    x, y, z, w = self.data.T
+    return np.arctan2(2*x*w - 2*y*z, 1 - 2*x*x - 2*z*z)
+
+  @property
+  def yaw(self):
+    x, y, z, w = self.data.T
+    return np.arcsin(np.clip(2*x*y + 2*z*w, -1.0, 1.0))
+
+  @property
+  def rpy(self):
+    """
+    Returns an array of shape `(N, 3)` with the roll, pitch and yaw of
+    every quaternion.
+    """
+
+    return np.stack([self.roll, self.pitch, self.yaw], axis=1)
+
+  @staticmethod
+  def identity(n):
+    """
+    Returns a #QuaternionArray of *n* identity quaternions.
+    """
+
+    _require_numpy()
+    data = np.zeros((n, 4))
+    data[:, 3] = 1.0
+    return QuaternionArray(data)
+
+  @staticmethod
+  def rotation_of(source, dest):
+    """
+    Returns a #QuaternionArray with the rotations from the vectors in
+    *source* to the vectors in *dest*. Same semantics as
+    #Quaternion.rotation_of().
+    """
+
+    source = _as_array(source, 3, 'vector')
+    dest = _as_array(dest, 3, 'vector')
+    source, dest = np.broadcast_arrays(source, dest)
+    cross = np.cross(source, dest)
+    cos_theta = np.einsum('ij,ij->i', source, dest)
+    k = np.sqrt(np.einsum('ij,ij->i', source, source) *
+                np.einsum('ij,ij->i', dest, dest))
+
+    degenerate = k <= 0.0
+    safe_k = np.where(degenerate, 1.0, k)
+    same = (cos_theta / safe_k >= 1.0) | degenerate
+    opposite = (cos_theta / safe_k <= -1.0) & ~degenerate
+
+    if opposite.any():
+      src = source[opposite]
+      src_norm = src / np.sqrt(np.einsum('ij,ij->i', src, src))[:, None]
+      use_x = np.abs(src_norm[:, 0]) < 1.0
+      axis = np.where(use_x[:, None], (1.0, 0.0, 0.0), (0.0, 1.0, 0.0))
+      cross[opposite] = np.cross(src, axis)
+
+    data = np.empty((len(cross), 4))
+    data[:, :3] = cross
+    data[:, 3] = k + cos_theta
+    data[same] = (0.0, 0.0, 0.0, 1.0)
+    data /= np.sqrt(np.einsum('ij,ij->i', data, data))[:, None]
+    return QuaternionArray(data)
+
+  @staticmethod
+  def from_axis_angle(axis, angle):
+    """
+    Returns a #QuaternionArray with the right-handed rotations of *angle*
+    radians about *axis*. Either argument may be a single value that is
+    broadcast against the other.
+
+    :param axis: Unit vector(s) representing the axis of rotation.
+    :param angle: Scalar or array of shape `(N,)` with angles in radians.
+    """
+
+    axis = _as_array(axis, 3, 'vector')
+    half = np.asarray(angle, dtype=np.float64).reshape(-1) / 2.0
+    sincomp = np.sin(half)[:, None]
+    n = np.broadcast(axis[:, 0], half).shape[0]
+    data = np.empty((n, 4))
+    data[:, :3] = axis * sincomp
+    data[:, 3] = np.cos(half)
+    return QuaternionArray(data)
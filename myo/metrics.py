@@ -0,0 +1,395 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015-2018 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+Event rate, handler latency and drop metrics for a #Hub.
+
+Assign a #HubMetrics object to #Hub.metrics and every event that passes
+through #Hub.run() is recorded per event type and device: the number of
+events, the time the handler took, the time between events and the samples
+that are missing according to the event timestamps.
+
+```python
+hub.metrics = myo.metrics.HubMetrics()
+myo.metrics.serve_metrics(hub.metrics, ('127.0.0.1', 9464))
+hub.run_forever(listener)
+
+hub.metrics.snapshot()['events']['emg']['0']['handler']['p99']
+```
+
+Other event sources (#myo.trace.TraceReplayer, #myo.net.StreamClient) can
+be instrumented by wrapping the handler with #HubMetrics.wrap().
+"""
+
+import json
+import threading
+import time
+
+from six.moves import BaseHTTPServer, socketserver
+
+from ._ffi import EventType
+
+#: The nominal interval between events in microseconds, used to detect
+#: dropped samples from the event timestamps.
+EXPECTED_PERIODS = {
+  EventType.emg: 5000,
+  EventType.orientation: 20000,
+}
+
+_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class LogHistogram(object):
+  """
+  A histogram of durations in seconds with logarithmic buckets in the style
+  of HdrHistogram. Values are recorded as integer nanoseconds; every power
+  of two is split into 64 linear buckets, which bounds the relative error of
+  the reported percentiles to 1/64 (about 1.6%). Recording a value is O(1)
+  and does not allocate.
+
+  Values above *highest* seconds are clamped.
+  """
+
+  _SUB_BITS = 7  # record() has the constants inlined
+
+  def __init__(self, highest=60.0):
+    self._highest = int(highest * 1e9)
+    self._counts = [0] * (self._index(self._highest) + 1)
+    self.reset()
+
+  def reset(self):
+    for i in range(len(self._counts)):
+      self._counts[i] = 0
+    self.count = 0
+    self.sum = 0.0
+    self.min = None
+    self.max = None
+
+  @classmethod
+  def _index(cls, ns):
+    if ns < (1 << cls._SUB_BITS):
+      return ns
+    shift = ns.bit_length() - cls._SUB_BITS
+    return (shift << (cls._SUB_BITS - 1)) + (ns >> shift)
+
+  @classmethod
+  def _bucket_range(cls, index):
+    if index < (1 << cls._SUB_BITS):
+      return index, index
+    shift = (index >> (cls._SUB_BITS - 1)) - 1
+    mantissa = index - (shift << (cls._SUB_BITS - 1))
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+  def record(self, seconds):
+    ns = int(seconds * 1e9)
+    if ns < 128:
+      index = ns if ns > 0 else 0
+    else:
+      if ns > self._highest:
+        ns = self._highest
+      shift = ns.bit_length() - 7
+      index = (shift << 6) + (ns >> shift)
+    self._counts[index] += 1
+    self.count += 1
+    self.sum += seconds
+    if self.max is None:
+      self.min = self.max = seconds
+    elif seconds > self.max:
+      self.max = seconds
+    elif seconds < self.min:
+      self.min = seconds
+
+  def merge(self, other):
+    for i, n in enumerate(other._counts):
+      if n:
+        self._counts[i] += n
+    self.count += other.count
+    self.sum += other.sum
+    for value in (other.min, other.max):
+      if value is not None:
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+  def copy(self):
+    result = LogHistogram.__new__(LogHistogram)
+    result._highest = self._highest
+    result._counts = list(self._counts)
+    result.count, result.sum = self.count, self.sum
+    result.min, result.max = self.min, self.max
+    return result
+
+  @property
+  def mean(self):
+    return self.sum / self.count if self.count else None
+
+  def percentile(self, q):
+    """
+    Returns the value below which the fraction *q* (0 to 1) of the recorded
+    values falls, or #None if the histogram is empty.
+    """
+
+    if not self.count:
+      return None
+    rank = max(1, int(q * self.count + 0.5))
+    seen = 0
+    for index, n in enumerate(self._counts):
+      seen += n
+      if seen >= rank:
+        low, high = self._bucket_range(index)
+        value = (low + high) / 2.0 * 1e-9
+        return min(max(value, self.min), self.max)
+    return self.max
+
+  def snapshot(self):
+    result = {'count': self.count, 'sum': self.sum, 'min': self.min,
+              'max': self.max, 'mean': self.mean}
+    for q in _QUANTILES:
+      result['p' + '{:g}'.format(q * 100).replace('.', '')] = self.percentile(q)
+    return result
+
+
+class _Series(object):
+
+  __slots__ = ('kind', 'device', 'period', 'count', 'dropped', 'first_time',
+               'last_time', 'last_timestamp', 'handler', 'interval')
+
+  def __init__(self, kind, device, period=None):
+    self.kind = kind
+    self.device = device
+    self.period = float(period) if period else None
+    self.count = 0
+    self.dropped = 0
+    self.first_time = None
+    self.last_time = None
+    self.last_timestamp = None
+    self.handler = LogHistogram()
+    self.interval = LogHistogram()
+
+
+class HubMetrics(object):
+  """
+  Collects per event type and device metrics. #record() is called from the
+  hub thread; #snapshot() and #to_prometheus() may be called from any
+  thread.
+
+  # Parameters
+  expected_periods: Maps #EventType members to the nominal interval in
+    microseconds between two events of a device. A timestamp gap of more
+    than 1.5 periods is counted as dropped samples.
+  clock: The clock used to measure handler durations.
+  """
+
+  def __init__(self, expected_periods=None, clock=time.perf_counter):
+    self.expected_periods = dict(EXPECTED_PERIODS if expected_periods is None
+                                 else expected_periods)
+    self.clock = clock
+    self._lock = threading.Lock()
+    self.reset()
+
+  def reset(self):
+    with self._lock:
+      self._series = {}
+      self._devices = {}
+      self.errors = 0
+      self.started = self.clock()
+
+  def record(self, event, start, end):
+    """
+    Records an *event* whose handler ran from *start* to *end* (values of
+    #clock).
+    """
+
+    kind = event.type
+    timestamp = event.timestamp
+    handle = event.device.handle
+    with self._lock:
+      series = self._series.get((kind, handle))
+      if series is None:
+        device = self._devices.setdefault(handle, len(self._devices))
+        series = self._series[(kind, handle)] = _Series(
+          kind, device, self.expected_periods.get(kind))
+        series.first_time = start
+      else:
+        series.interval.record(start - series.last_time)
+        if series.period:
+          gap = timestamp - series.last_timestamp
+          if gap > 1.5 * series.period:
+            series.dropped += int(gap / series.period + 0.5) - 1
+      series.count += 1
+      series.last_time = start
+      series.last_timestamp = timestamp
+      series.handler.record(end - start)
+
+  def record_error(self):
+    with self._lock:
+      self.errors += 1
+
+  def wrap(self, handler):
+    """
+    Returns a handler that calls *handler* and records every event. Use it
+    for event sources other than #Hub.
+    """
+
+    if not callable(handler):
+      if hasattr(handler, 'on_event'):
+        handler = handler.on_event
+      else:
+        raise TypeError('expected callable or DeviceListener')
+    clock = self.clock
+
+    def wrapper(event):
+      start = clock()
+      try:
+        result = handler(event)
+      except BaseException:
+        self.record_error()
+        raise
+      self.record(event, start, clock())
+      return result
+
+    return wrapper
+
+  def _copy(self):
+    with self._lock:
+      series = {}
+      for s in self._series.values():
+        copy = _Series(s.kind, s.device, s.period)
+        for name in ('count', 'dropped', 'first_time', 'last_time',
+                     'last_timestamp'):
+          setattr(copy, name, getattr(s, name))
+        copy.handler = s.handler.copy()
+        copy.interval = s.interval.copy()
+        series[(s.kind, s.device)] = copy
+      return series, self.errors, self.clock() - self.started
+
+  def snapshot(self):
+    """
+    Returns the current metrics as a dictionary of the form
+    `{'uptime', 'errors', 'events': {type: {device: {...}}}}` where every
+    series has the keys `count`, `rate` (events per second between the
+    first and the last event), `dropped`, `handler` and `interval`
+    (histogram snapshots in seconds). Devices are numbered in the order
+    they were first seen.
+    """
+
+    series, errors, uptime = self._copy()
+    events = {}
+    for (kind, device), s in sorted(series.items()):
+      span = s.last_time - s.first_time
+      events.setdefault(kind.name, {})[str(device)] = {
+        'count': s.count,
+        'rate': (s.count - 1) / span if span > 0 else 0.0,
+        'dropped': s.dropped,
+        'handler': s.handler.snapshot(),
+        'interval': s.interval.snapshot(),
+      }
+    return {'uptime': uptime, 'errors': errors, 'events': events}
+
+  def to_prometheus(self, prefix='myo'):
+    """
+    Returns the metrics in the Prometheus text exposition format.
+    """
+
+    series, errors, uptime = self._copy()
+    lines = []
+
+    def header(name, kind, help):
+      lines.append('# HELP {}_{} {}'.format(prefix, name, help))
+      lines.append('# TYPE {}_{} {}'.format(prefix, name, kind))
+
+    def labels(kind, device, **extra):
+      pairs = [('type', kind.name), ('device', device)] + sorted(extra.items())
+      return '{' + ','.join('{}="{}"'.format(k, v) for k, v in pairs) + '}'
+
+    items = sorted(series.items())
+    header('events_total', 'counter', 'Events delivered to the handler.')
+    for (kind, device), s in items:
+      lines.append('{}_events_total{} {}'.format(prefix, labels(kind, device), s.count))
+    header('dropped_samples_total', 'counter',
+           'Samples missing according to the event timestamps.')
+    for (kind, device), s in items:
+      if kind in self.expected_periods:
+        lines.append('{}_dropped_samples_total{} {}'.format(
+          prefix, labels(kind, device), s.dropped))
+    for attr, name, help in (
+        ('handler', 'handler_seconds', 'Time spent in the handler.'),
+        ('interval', 'event_interval_seconds', 'Time between two events.')):
+      header(name, 'summary', help)
+      for (kind, device), s in items:
+        hist = getattr(s, attr)
+        for q in _QUANTILES:
+          value = hist.percentile(q)
+          lines.append('{}_{}{} {}'.format(prefix, name, labels(
+            kind, device, quantile='{:g}'.format(q)),
+            'NaN' if value is None else repr(value)))
+        lines.append('{}_{}_sum{} {!r}'.format(prefix, name, labels(kind, device), hist.sum))
+        lines.append('{}_{}_count{} {}'.format(prefix, name, labels(kind, device), hist.count))
+    header('handler_errors_total', 'counter', 'Exceptions raised by the handler.')
+    lines.append('{}_handler_errors_total {}'.format(prefix, errors))
+    header('uptime_seconds', 'gauge', 'Time since the metrics were reset.')
+    lines.append('{}_uptime_seconds {!r}'.format(prefix, uptime))
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+  def do_GET(self):
+    metrics = self.server.metrics
+    if self.path == '/metrics':
+      body = metrics.to_prometheus().encode('utf8')
+      content_type = 'text/plain; version=0.0.4; charset=utf-8'
+    elif self.path == '/metrics.json':
+      body = json.dumps(metrics.snapshot()).encode('utf8')
+      content_type = 'application/json'
+    else:
+      self.send_error(404)
+      return
+    self.send_response(200)
+    self.send_header('Content-Type', content_type)
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, format, *args):
+    pass
+
+
+class _MetricsServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+  daemon_threads = True
+
+
+def serve_metrics(metrics, address=('127.0.0.1', 9464)):
+  """
+  Serves *metrics* over HTTP in a background thread: `/metrics` in the
+  Prometheus text format and `/metrics.json` as the #HubMetrics.snapshot().
+  Returns the server; call its `shutdown()` method to stop it.
+  """
+
+  server = _MetricsServer(address, _MetricsRequestHandler)
+  server.metrics = metrics
+  thread = threading.Thread(target=server.serve_forever)
+  thread.daemon = True
+  thread.start()
+  return server
+
+
+__all__ = ['EXPECTED_PERIODS', 'LogHistogram', 'HubMetrics', 'serve_metrics']
@@ -0,0 +1,451 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015-2018 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+Streaming of the hub events to remote consumers over UDP (low latency,
+lossy) or TCP (reliable). The #StreamServer is a #DeviceListener on the
+machine with the armband, the #StreamClient on the receiving side delivers
+the events to a handler just like #Hub.run() does.
+
+```python
+# Acquisition machine
+server = myo.net.StreamServer(('0.0.0.0', 7878), mode='udp')
+hub.run_forever(server)
+
+# Compute node
+client = myo.net.StreamClient(('acquisition-pc', 7878), mode='udp')
+client.run_forever(listener)
+```
+
+Every packet starts with a 20 byte header (magic, version, kind, sample
+count, packet sequence number and base timestamp) followed by *count*
+samples of the kind. EMG samples take 13 bytes (timestamp offset, device
+index and the 8 int8 values). Over TCP, packets are prefixed with their
+32-bit length.
+"""
+
+import contextlib
+import socket
+import struct
+import threading
+import time
+
+from ._ffi import EventType, HandlerResult
+from ._device_listener import DeviceListener
+from .trace import TraceDevice, TraceEvent
+
+MAGIC = b'MYON'
+VERSION = 1
+
+KIND_STATE = 0
+KIND_ORIENTATION = 1
+KIND_EMG = 2
+
+_HEADER = struct.Struct('<4sBBHIQ')
+_LENGTH = struct.Struct('<I')
+_SAMPLES = {
+  KIND_STATE: struct.Struct('<IBB'),       # offset, device, event type
+  KIND_ORIENTATION: struct.Struct('<IB10f'),
+  KIND_EMG: struct.Struct('<IB8b'),
+}
+_SUBSCRIBE = b'MYON-SUB'
+
+#: Events that are forwarded as state changes without a payload.
+_STATE_EVENTS = frozenset([
+  EventType.paired, EventType.unpaired, EventType.connected,
+  EventType.disconnected, EventType.arm_unsynced, EventType.unlocked,
+  EventType.locked,
+])
+
+
+class _Batch(object):
+
+  def __init__(self, kind):
+    self.kind = kind
+    self.sample = _SAMPLES[kind]
+    self.samples = []
+    self.base = None
+    self.started = None
+
+  def add(self, timestamp, values, now):
+    if self.base is None:
+      self.base = timestamp
+      self.started = now
+    self.samples.append((max(0, timestamp - self.base),) + values)
+
+  def encode(self, seq):
+    parts = [_HEADER.pack(MAGIC, VERSION, self.kind, len(self.samples),
+                          seq & 0xffffffff, self.base)]
+    pack = self.sample.pack
+    parts.extend(pack(*x) for x in self.samples)
+    del self.samples[:]
+    self.base = None
+    return b''.join(parts)
+
+
+class StreamServer(DeviceListener):
+  """
+  A #DeviceListener that streams the events it receives to remote
+  #StreamClient#s.
+
+  # Parameters
+  address: The `(host, port)` to bind to.
+  mode: `'udp'` or `'tcp'`. UDP clients subscribe by sending a datagram to
+    the server and receive all packets from then on; TCP clients connect
+    and receive the length-prefixed packets on their connection.
+  batch_size: The maximum number of EMG samples per packet.
+  max_delay: The maximum time in seconds a sample is held back to fill a
+    batch. Batches are flushed when the next event arrives after the delay
+    has passed, or by calling #flush().
+  stream_emg: Enable EMG streaming on every device that connects.
+  send_timeout: TCP only. A client that blocks a send for longer than this
+    is disconnected, so a slow consumer can not stall the hub.
+  """
+
+  def __init__(self, address=('127.0.0.1', 7878), mode='udp', batch_size=16,
+               max_delay=0.01, stream_emg=True, send_timeout=0.05):
+    if mode not in ('udp', 'tcp'):
+      raise ValueError('mode must be "udp" or "tcp"')
+    self.mode = mode
+    self.batch_size = batch_size
+    self.max_delay = max_delay
+    self.send_timeout = send_timeout
+    self._stream_emg = stream_emg
+    self._lock = threading.Lock()
+    self._clients = []
+    self._devices = {}
+    self._seq = 0
+    self._batches = {kind: _Batch(kind) for kind in _SAMPLES}
+    self.packets_sent = 0
+    self.bytes_sent = 0
+    self._closed = False
+
+    if mode == 'udp':
+      self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+      self._socket.bind(address)
+      self._socket.setblocking(False)
+      self._accept_thread = None
+    else:
+      self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+      self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+      self._socket.bind(address)
+      self._socket.listen(8)
+      self._accept_thread = threading.Thread(target=self._accept_loop)
+      self._accept_thread.daemon = True
+      self._accept_thread.start()
+
+  @property
+  def address(self):
+    return self._socket.getsockname()
+
+  @property
+  def clients(self):
+    with self._lock:
+      return list(self._clients)
+
+  def close(self):
+    self._closed = True
+    self._socket.close()
+    with self._lock:
+      if self.mode == 'tcp':
+        for client in self._clients:
+          client.close()
+      del self._clients[:]
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
+
+  def _accept_loop(self):
+    while not self._closed:
+      try:
+        conn, _ = self._socket.accept()
+      except (OSError, socket.error):
+        break
+      conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+      conn.settimeout(self.send_timeout)
+      with self._lock:
+        self._clients.append(conn)
+
+  def _poll_subscribers(self):
+    while True:
+      try:
+        data, addr = self._socket.recvfrom(64)
+      except (BlockingIOError, socket.timeout):
+        return
+      except (OSError, socket.error):
+        return
+      if data == _SUBSCRIBE:
+        with self._lock:
+          if addr not in self._clients:
+            self._clients.append(addr)
+
+  def _send(self, packet):
+    self._seq += 1
+    self.packets_sent += 1
+    self.bytes_sent += len(packet)
+    if self.mode == 'udp':
+      self._poll_subscribers()
+      with self._lock:
+        clients = list(self._clients)
+      for addr in clients:
+        try:
+          self._socket.sendto(packet, addr)
+        except (OSError, socket.error):
+          pass
+    else:
+      data = _LENGTH.pack(len(packet)) + packet
+      with self._lock:
+        clients = list(self._clients)
+      for conn in clients:
+        try:
+          conn.sendall(data)
+        except (OSError, socket.error):
+          with self._lock:
+            if conn in self._clients:
+              self._clients.remove(conn)
+          conn.close()
+
+  def _flush_batch(self, batch):
+    if batch.samples:
+      self._send(batch.encode(self._seq))
+
+  def flush(self):
+    """
+    Sends all pending samples.
+    """
+
+    for batch in self._batches.values():
+      self._flush_batch(batch)
+
+  def _device_index(self, event):
+    handle = event.device.handle
+    index = self._devices.get(handle)
+    if index is None:
+      index = self._devices[handle] = len(self._devices) & 0xff
+    return index
+
+  def _add(self, kind, event, values, limit):
+    now = time.perf_counter()
+    batch = self._batches[kind]
+    batch.add(event.timestamp, (self._device_index(event),) + values, now)
+    if len(batch.samples) >= limit:
+      self._flush_batch(batch)
+    for other in self._batches.values():
+      if other.samples and now - other.started >= self.max_delay:
+        self._flush_batch(other)
+
+  def on_event(self, event):
+    if event.type in _STATE_EVENTS:
+      # State changes must not overtake the samples before them.
+      self.flush()
+      batch = self._batches[KIND_STATE]
+      batch.add(event.timestamp, (self._device_index(event), int(event.type)), 0.0)
+      self._flush_batch(batch)
+    return super(StreamServer, self).on_event(event)
+
+  def on_connected(self, event):
+    if self._stream_emg:
+      event.device.stream_emg(True)
+
+  def on_emg(self, event):
+    self._add(KIND_EMG, event, tuple(event.emg), self.batch_size)
+
+  def on_orientation(self, event):
+    o, a, g = event.orientation, event.acceleration, event.gyroscope
+    values = (o.x, o.y, o.z, o.w, a.x, a.y, a.z, g.x, g.y, g.z)
+    self._add(KIND_ORIENTATION, event, values, max(1, self.batch_size // 4))
+
+
+class StreamClient(object):
+  """
+  Receives the packets of a #StreamServer and delivers them as
+  #myo.trace.TraceEvent objects to a handler. Offers the same `run`,
+  `run_forever`, `run_in_background` and `stop` methods as #Hub, so it can
+  replace the hub as the event source of an existing #DeviceListener.
+
+  The first event seen for a device is preceded by synthesized *paired*
+  and *connected* events, so that listeners such as #ApiDeviceListener
+  register the device even if the client joined mid-stream.
+
+  # Attributes
+  packets_received: The number of packets received.
+  packets_lost: The number of packets missing from the sequence.
+  """
+
+  def __init__(self, address=('127.0.0.1', 7878), mode='udp', timeout=1.0):
+    if mode not in ('udp', 'tcp'):
+      raise ValueError('mode must be "udp" or "tcp"')
+    self.address = address
+    self.mode = mode
+    self.timeout = timeout
+    self.devices = {}
+    self._states = {}
+    self.packets_received = 0
+    self.packets_lost = 0
+    self._last_seq = None
+    self._stop_requested = False
+    self._buffer = bytearray()
+    if mode == 'udp':
+      self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+      self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+      self._socket.connect(address)
+      self._socket.send(_SUBSCRIBE)
+    else:
+      self._socket = socket.create_connection(address)
+      self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    self._socket.settimeout(timeout)
+
+  def close(self):
+    self._socket.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
+
+  def _receive(self):
+    """
+    Returns the next packet, or #None on timeout.
+    """
+
+    try:
+      if self.mode == 'udp':
+        return self._socket.recv(65536)
+      buf = self._buffer
+      while True:
+        if len(buf) >= 4:
+          size = _LENGTH.unpack_from(buf)[0]
+          if len(buf) >= 4 + size:
+            packet = bytes(buf[4:4 + size])
+            del buf[:4 + size]
+            return packet
+        chunk = self._socket.recv(65536)
+        if not chunk:
+          raise ConnectionError('stream server closed the connection')
+        buf += chunk
+    except socket.timeout:
+      return None
+
+  def decode(self, packet):
+    """
+    Decodes a packet into a list of #TraceEvent objects.
+    """
+
+    magic, version, kind, count, seq, base = _HEADER.unpack_from(packet)
+    if magic != MAGIC or version != VERSION:
+      raise ValueError('not a myo stream packet')
+    self.packets_received += 1
+    if self._last_seq is not None:
+      gap = (seq - self._last_seq - 1) & 0xffffffff
+      if gap < 0x80000000:
+        self.packets_lost += gap
+    self._last_seq = seq
+
+    sample = _SAMPLES[kind]
+    events = []
+    offset = _HEADER.size
+    for _ in range(count):
+      values = sample.unpack_from(packet, offset)
+      offset += sample.size
+      timestamp = base + values[0]
+      device = self._device(values[1], timestamp, events)
+      if kind == KIND_EMG:
+        events.append(TraceEvent(EventType.emg, timestamp, device, values[2:]))
+      elif kind == KIND_ORIENTATION:
+        events.append(TraceEvent(EventType.orientation, timestamp, device, values[2:]))
+      else:
+        type = EventType(values[2])
+        state = self._states[values[1]]
+        if type in (EventType.paired, EventType.connected):
+          if type in state:
+            continue  # Already synthesized.
+          state.add(type)
+        elif type == EventType.unpaired:
+          state.clear()
+        elif type == EventType.disconnected:
+          state.discard(EventType.connected)
+        events.append(TraceEvent(type, timestamp, device, ()))
+    return events
+
+  def _device(self, index, timestamp, events):
+    device = self.devices.get(index)
+    if device is None:
+      device = self.devices[index] = TraceDevice(index)
+      device.firmware_version = ()
+      self._states[index] = set([EventType.paired, EventType.connected])
+      events.append(TraceEvent(EventType.paired, timestamp, device, ()))
+      events.append(TraceEvent(EventType.connected, timestamp, device, ()))
+    return device
+
+  def run(self, handler, duration_ms):
+    """
+    Receives and delivers events for *duration_ms* milliseconds with the
+    same semantics as #Hub.run().
+    """
+
+    if not callable(handler):
+      if hasattr(handler, 'on_event'):
+        handler = handler.on_event
+      else:
+        raise TypeError('expected callable or DeviceListener')
+
+    deadline = time.perf_counter() + duration_ms / 1000.0
+    while not self._stop_requested:
+      remaining = deadline - time.perf_counter()
+      if remaining <= 0:
+        return True
+      self._socket.settimeout(min(remaining, self.timeout))
+      packet = self._receive()
+      if packet is None:
+        if self.mode == 'udp' and not self.packets_received:
+          self._socket.send(_SUBSCRIBE)  # The first request may have been lost.
+        continue
+      for event in self.decode(packet):
+        result = handler(event)
+        if result is False or (result is not None and result is not True
+                               and HandlerResult(result) == HandlerResult.stop):
+          return False
+    return False
+
+  def run_forever(self, handler, duration_ms=500):
+    while self.run(handler, duration_ms):
+      if self._stop_requested:
+        break
+
+  @contextlib.contextmanager
+  def run_in_background(self, handler, duration_ms=500):
+    thread = threading.Thread(target=lambda: self.run_forever(handler, duration_ms))
+    thread.start()
+    try:
+      yield thread
+    finally:
+      self.stop()
+
+  def stop(self):
+    self._stop_requested = True
+
+
+__all__ = ['StreamServer', 'StreamClient']
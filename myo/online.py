@@ -0,0 +1,343 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015-2018 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+Classifiers that learn incrementally from new labelled windows.
+
+Adding a protocol repetition to a scikit-learn model means fitting it
+again on all the data. The classifiers here have the scikit-learn
+interface (`fit()`, `predict()`, `classes_`) plus `partial_fit()`, which
+adds new samples in time proportional to the new data only:
+
+* #IncrementalKNN appends the samples to its index,
+* #OnlineLDA updates per-class means and the pooled scatter matrix and
+  solves the (small) discriminant on the next prediction.
+
+Both accept new classes in any `partial_fit()` call. scikit-learn models
+with `partial_fit()` (`SGDClassifier`, `Perceptron`, `GaussianNB`) can be
+used the same way with #update().
+
+```python
+model = myo.online.OnlineLDA().fit(X, y)
+# During the session, a few seconds of recalibration data:
+model.partial_fit(new_windows.mean(axis=1), new_labels)
+```
+"""
+
+import threading
+
+import numpy as np
+
+
+def update(model, X, y, classes=None):
+  """
+  Calls `model.partial_fit(X, y)`. scikit-learn classifiers require the
+  list of all *classes* in the first call; it is passed when the model has
+  not been fitted yet. Returns *model*.
+  """
+
+  if classes is not None and not hasattr(model, 'classes_'):
+    model.partial_fit(X, y, classes=classes)
+  else:
+    model.partial_fit(X, y)
+  return model
+
+
+class _Labels(object):
+
+  def __init__(self):
+    self.codes = {}
+    self.classes = []
+
+  def encode(self, y):
+    codes = self.codes
+    result = np.empty(len(y), np.intp)
+    for i, label in enumerate(y):
+      code = codes.get(label)
+      if code is None:
+        code = codes[label] = len(self.classes)
+        self.classes.append(label)
+      result[i] = code
+    return result
+
+  def decode(self, codes):
+    return np.asarray(self.classes)[codes]
+
+
+def _check(X, y=None, n_features=None):
+  X = np.asarray(X, dtype=np.float64)
+  if X.ndim == 1:
+    X = X.reshape(1, -1)
+  if X.ndim != 2:
+    raise ValueError('expected a 2-D array of samples')
+  if n_features is not None and X.shape[1] != n_features:
+    raise ValueError('expected {} features, got {}'.format(n_features, X.shape[1]))
+  if y is not None:
+    y = np.asarray(y).ravel()
+    if len(y) != len(X):
+      raise ValueError('X and y have different lengths')
+  return X, y
+
+
+class IncrementalKNN(object):
+  """
+  A k-nearest-neighbours classifier with an appendable index (euclidean
+  distance, majority vote, ties go to the nearest neighbour's class).
+
+  The index is not locked: call #partial_fit() on the thread that
+  predicts, or guard both with your own lock.
+
+  # Parameters
+  n_neighbors: The number of neighbours that vote.
+  max_samples: Keep only the newest *max_samples* samples, so that old
+    calibration data is forgotten. #None keeps all.
+  """
+
+  def __init__(self, n_neighbors=1, max_samples=None):
+    self.n_neighbors = n_neighbors
+    self.max_samples = max_samples
+    self._reset()
+
+  def _reset(self):
+    self._labels = _Labels()
+    self._X = None
+    self._norms = None
+    self._y = None
+    self.n_samples = 0
+
+  @property
+  def classes_(self):
+    return np.asarray(self._labels.classes)
+
+  def fit(self, X, y):
+    self._reset()
+    return self.partial_fit(X, y)
+
+  def partial_fit(self, X, y):
+    """
+    Adds the samples *X* with the labels *y* to the index.
+    """
+
+    n_features = None if self._X is None else self._X.shape[1]
+    X, y = _check(X, y, n_features)
+    codes = self._labels.encode(y)
+    n, count = self.n_samples, len(X)
+    if self._X is None:
+      capacity = max(count, 64)
+      self._X = np.empty((capacity, X.shape[1]))
+      self._norms = np.empty(capacity)
+      self._y = np.empty(capacity, np.intp)
+    elif n + count > len(self._X):
+      capacity = max(n + count, 2 * len(self._X))
+      self._X = self._grow(self._X, capacity, n)
+      self._norms = self._grow(self._norms, capacity, n)
+      self._y = self._grow(self._y, capacity, n)
+    self._X[n:n + count] = X
+    self._norms[n:n + count] = np.einsum('ij,ij->i', X, X)
+    self._y[n:n + count] = codes
+    self.n_samples = n + count
+    if self.max_samples is not None and self.n_samples > self.max_samples:
+      drop = self.n_samples - self.max_samples
+      keep = slice(drop, self.n_samples)
+      self.n_samples = self.max_samples
+      self._X[:self.n_samples] = self._X[keep].copy()
+      self._norms[:self.n_samples] = self._norms[keep].copy()
+      self._y[:self.n_samples] = self._y[keep].copy()
+    return self
+
+  @staticmethod
+  def _grow(array, capacity, n):
+    result = np.empty((capacity,) + array.shape[1:], array.dtype)
+    result[:n] = array[:n]
+    return result
+
+  def kneighbors(self, X):
+    """
+    Returns `(distances, indices)` of the nearest samples, nearest first.
+    """
+
+    if not self.n_samples:
+      raise RuntimeError('the index is empty')
+    X, _ = _check(X, n_features=self._X.shape[1])
+    n = self.n_samples
+    d2 = self._norms[:n] - 2.0 * X.dot(self._X[:n].T)
+    d2 += np.einsum('ij,ij->i', X, X)[:, None]
+    k = min(self.n_neighbors, n)
+    if k == 1:
+      indices = d2.argmin(axis=1)[:, None]
+    else:
+      indices = np.argpartition(d2, k - 1, axis=1)[:, :k]
+      order = np.take_along_axis(d2, indices, axis=1).argsort(axis=1)
+      indices = np.take_along_axis(indices, order, axis=1)
+    distances = np.sqrt(np.maximum(np.take_along_axis(d2, indices, axis=1), 0.0))
+    return distances, indices
+
+  def predict(self, X):
+    _, indices = self.kneighbors(X)
+    codes = self._y[indices]
+    if codes.shape[1] == 1:
+      return self._labels.decode(codes[:, 0])
+    num_classes = len(self._labels.classes)
+    result = np.empty(len(codes), np.intp)
+    for i, row in enumerate(codes):
+      votes = np.bincount(row, minlength=num_classes)
+      best = np.flatnonzero(votes == votes.max())
+      result[i] = row[0] if len(best) > 1 and row[0] in best else best[0]
+    return self._labels.decode(result)
+
+
+class OnlineLDA(object):
+  """
+  Linear discriminant analysis from running sufficient statistics: the
+  count and mean of every class and the pooled within-class scatter,
+  merged batch by batch (so #partial_fit() with the data in pieces gives
+  the same model as one #fit()).
+
+  #fit() and #partial_fit() may be called from any thread, also while other
+  threads predict (for example a recalibration thread next to the hub
+  thread). They lock the statistics; a prediction uses the discriminant
+  from before or after an update, never a mix. The first prediction after
+  an update solves the discriminant on the predicting thread.
+
+  # Parameters
+  shrinkage: Blend the covariance with a scaled identity matrix, between
+    0 and 1. Keeps the model usable with few samples per class.
+  priors: `'empirical'` (class frequencies) or `'uniform'`.
+  """
+
+  def __init__(self, shrinkage=0.01, priors='empirical'):
+    if priors not in ('empirical', 'uniform'):
+      raise ValueError('priors must be empirical or uniform')
+    self.shrinkage = shrinkage
+    self.priors = priors
+    self._lock = threading.Lock()
+    self._reset()
+
+  def __getstate__(self):
+    state = self.__dict__.copy()
+    del state['_lock']
+    return state
+
+  def __setstate__(self, state):
+    self.__dict__.update(state)
+    self._lock = threading.Lock()
+
+  def _reset(self):
+    self._labels = _Labels()
+    self._counts = None
+    self._means = None
+    self._scatter = None
+    self._solution = None  # (coef, intercept, classes), replaced as a whole
+    self.n_samples = 0
+
+  @property
+  def classes_(self):
+    return np.asarray(self._labels.classes)
+
+  def fit(self, X, y):
+    with self._lock:
+      self._reset()
+      self._merge(X, y)
+    return self
+
+  def partial_fit(self, X, y):
+    """
+    Merges the samples *X* with the labels *y* into the statistics.
+    """
+
+    with self._lock:
+      self._merge(X, y)
+    return self
+
+  def _merge(self, X, y):
+    n_features = None if self._means is None else self._means.shape[1]
+    X, y = _check(X, y, n_features)
+    codes = self._labels.encode(y)
+    num_classes = len(self._labels.classes)
+    if self._means is None:
+      self._counts = np.zeros(num_classes)
+      self._means = np.zeros((num_classes, X.shape[1]))
+      self._scatter = np.zeros((X.shape[1], X.shape[1]))
+    elif num_classes > len(self._counts):
+      grow = num_classes - len(self._counts)
+      self._counts = np.concatenate([self._counts, np.zeros(grow)])
+      self._means = np.concatenate([self._means, np.zeros((grow, X.shape[1]))])
+    for code in np.unique(codes):
+      batch = X[codes == code]
+      count = len(batch)
+      mean = batch.mean(axis=0)
+      centered = batch - mean
+      scatter = centered.T.dot(centered)
+      old = self._counts[code]
+      total = old + count
+      delta = mean - self._means[code]
+      self._means[code] += delta * (count / total)
+      self._scatter += scatter + np.outer(delta, delta) * (old * count / total)
+      self._counts[code] = total
+    self.n_samples += len(X)
+    self._solution = None
+
+  def _solve(self):
+    # Called with the lock held.
+    num_classes, n_features = self._means.shape
+    dof = max(self.n_samples - num_classes, 1)
+    cov = self._scatter / dof
+    if self.shrinkage:
+      scale = np.trace(cov) / n_features or 1.0
+      cov = (1.0 - self.shrinkage) * cov + self.shrinkage * scale * np.eye(n_features)
+    coef = np.linalg.lstsq(cov, self._means.T, rcond=None)[0]  # (features, classes)
+    if self.priors == 'uniform':
+      priors = np.full(num_classes, 1.0 / num_classes)
+    else:
+      priors = self._counts / self._counts.sum()
+    intercept = -0.5 * np.einsum('ij,ji->i', self._means, coef) + np.log(priors)
+    self._solution = (coef, intercept, self.classes_)
+    return self._solution
+
+  def _get_solution(self):
+    solution = self._solution
+    if solution is None:
+      with self._lock:
+        if self._means is None:
+          raise RuntimeError('the model is not fitted')
+        solution = self._solution or self._solve()
+    return solution
+
+  def decision_function(self, X):
+    coef, intercept, _ = self._get_solution()
+    X, _ = _check(X, n_features=len(coef))
+    return X.dot(coef) + intercept
+
+  def predict_proba(self, X):
+    scores = self.decision_function(X)
+    scores -= scores.max(axis=1, keepdims=True)
+    np.exp(scores, out=scores)
+    scores /= scores.sum(axis=1, keepdims=True)
+    return scores
+
+  def predict(self, X):
+    coef, intercept, classes = self._get_solution()
+    X, _ = _check(X, n_features=len(coef))
+    return classes[(X.dot(coef) + intercept).argmax(axis=1)]
+
+
+__all__ = ['IncrementalKNN', 'OnlineLDA', 'update']
@@ -0,0 +1,312 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015-2018 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+Live plotting of multi-channel signals with Matplotlib. Requires NumPy and
+Matplotlib.
+
+A #RingBuffer is filled from the hub thread with one sample per event and a
+#BlitScope draws the most recent window of it. The scope keeps its line data
+preallocated, copies the window out of the ring buffer without allocating
+and only redraws the lines on top of a cached background (blitting), so the
+axes, ticks and grids are rendered once instead of on every frame.
+
+```python
+class EmgCollector(myo.DeviceListener):
+  def __init__(self):
+    self.buffer = myo.plot.RingBuffer(4096, 8)
+  def on_connected(self, event):
+    event.device.stream_emg(True)
+  def on_emg(self, event):
+    self.buffer.append(event.emg)
+
+listener = EmgCollector()
+with hub.run_in_background(listener.on_event):
+  myo.plot.BlitScope(listener.buffer, window=512).show()
+```
+"""
+
+import collections
+import threading
+import time
+
+import numpy as np
+
+
+class RingBuffer(object):
+  """
+  A thread-safe circular buffer of *capacity* samples with *channels*
+  values each. Writers only store the new samples; readers copy the most
+  recent samples out in chronological order.
+  """
+
+  def __init__(self, capacity, channels=8, dtype=np.float32):
+    if capacity < 1:
+      raise ValueError('capacity must be positive')
+    self.capacity = capacity
+    self.channels = channels
+    self.lock = threading.Lock()
+    self._data = np.zeros((capacity, channels), dtype=dtype)
+    self._total = 0
+
+  @property
+  def total(self):
+    """
+    The number of samples appended so far.
+    """
+
+    return self._total
+
+  def __len__(self):
+    return min(self._total, self.capacity)
+
+  def append(self, sample):
+    with self.lock:
+      self._data[self._total % self.capacity] = sample
+      self._total += 1
+
+  def extend(self, samples):
+    samples = np.asarray(samples)
+    count = len(samples)
+    samples = samples[-self.capacity:]
+    with self.lock:
+      start = (self._total + count - len(samples)) % self.capacity
+      first = min(len(samples), self.capacity - start)
+      self._data[start:start + first] = samples[:first]
+      self._data[:len(samples) - first] = samples[first:]
+      self._total += count
+
+  def latest(self, n, out=None):
+    """
+    Copies the last *n* samples into *out* (a `(n, channels)` array, which
+    is allocated if omitted) and returns it. Missing samples at the start
+    of a recording are zero.
+    """
+
+    if n > self.capacity:
+      raise ValueError('n must not exceed the capacity')
+    if out is None:
+      out = np.empty((n, self.channels), dtype=self._data.dtype)
+    with self.lock:
+      total = self._total
+      end = total % self.capacity
+      if end >= n:
+        out[:] = self._data[end - n:end]
+      else:
+        out[:n - end] = self._data[end - n:]
+        out[n - end:] = self._data[:end]
+    if total < n:
+      out[:n - total] = 0
+    return out
+
+
+def decimate_minmax(data, columns, out=None):
+  """
+  Reduces a `(N, channels)` array to `(2 * columns, channels)` by taking the
+  minimum and maximum of every column, interleaved. Unlike taking every
+  k-th sample, this keeps the peaks of the signal visible.
+  """
+
+  n, channels = data.shape
+  if out is None:
+    out = np.empty((2 * columns, channels), dtype=data.dtype)
+  edges = (np.arange(columns) * n) // columns
+  np.minimum.reduceat(data, edges, axis=0, out=out[0::2])
+  np.maximum.reduceat(data, edges, axis=0, out=out[1::2])
+  return out
+
+
+class BlitScope(object):
+  """
+  Plots the last *window* samples of a #RingBuffer in one subplot per
+  channel and updates it every *interval* milliseconds.
+
+  # Parameters
+  source: The #RingBuffer to plot.
+  window: The number of samples that are visible.
+  columns: If set and the window is larger than twice this number, the
+    window is reduced to this many min/max columns with #decimate_minmax()
+    before it is drawn. Use it for long time spans.
+  ylim: The y limits of every subplot.
+  colors: One line color per channel.
+  titles: One title per channel, or #None.
+  ylabel: The y axis label of every subplot.
+  interval: The update interval in milliseconds.
+  show_fps: Display the achieved frame rate in the figure.
+  figsize: Passed to #matplotlib.pyplot.subplots().
+  """
+
+  def __init__(self, source, window=512, columns=None, ylim=(-100, 100),
+               colors=('b', 'g', 'r', 'c', 'm', 'y', 'orange', 'purple'),
+               titles=None, ylabel=None, interval=33, show_fps=False, figsize=(10, 12)):
+    from matplotlib import pyplot as plt
+
+    if window > source.capacity:
+      raise ValueError('window must not exceed the capacity of the source')
+    self.source = source
+    self.window = window
+    self.interval = interval
+    channels = source.channels
+
+    self._window = np.zeros((window, channels), dtype=np.float32)
+    if columns and window > 2 * columns:
+      self._decimated = np.zeros((2 * columns, channels), dtype=np.float32)
+      self._columns = columns
+      points = 2 * columns
+    else:
+      self._decimated = None
+      self._columns = None
+      points = window
+    # One contiguous row per line. The lines keep a reference to the rows,
+    # so every frame only writes new values into them.
+    self._ydata = np.zeros((channels, points), dtype=np.float32)
+    xdata = np.linspace(0, window, points, endpoint=False)
+
+    self.fig, axes = plt.subplots(channels, 1, figsize=figsize, sharex=True,
+                                  squeeze=False)
+    self.axes = axes[:, 0]
+    for i, ax in enumerate(self.axes):
+      ax.set_xlim(0, window)
+      ax.set_ylim(ylim)
+      ax.grid(True)
+      if ylabel:
+        ax.set_ylabel(ylabel)
+      if titles:
+        ax.set_title(titles[i], loc='left', fontsize=10, pad=2)
+    self.lines = [
+      ax.plot(xdata, row, color=colors[i % len(colors)], animated=True)[0]
+      for i, (ax, row) in enumerate(zip(self.axes, self._ydata))
+    ]
+    self.title = self.fig.text(0.5, 0.985, '', ha='center', va='top',
+                               fontsize=16, animated=True)
+    self.fps_text = self.fig.text(0.99, 0.005, '', ha='right', va='bottom',
+                                  fontsize=8, animated=True)
+    self.fps_text.set_visible(show_fps)
+    self.fig.tight_layout(rect=[0, 0, 1, 0.96])
+
+    self._artists = self.lines + [self.title, self.fps_text]
+    self._background = None
+    self._frame_times = collections.deque(maxlen=60)
+    self._callbacks = []
+    self._timer = None
+    self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+
+  @property
+  def fps(self):
+    """
+    The frame rate achieved over the last 60 frames.
+    """
+
+    times = self._frame_times
+    if len(times) < 2 or times[-1] == times[0]:
+      return 0.0
+    return (len(times) - 1) / (times[-1] - times[0])
+
+  def add_callback(self, func):
+    """
+    Registers a function that is called with the scope before every frame,
+    for example to update the #title. It must not block.
+    """
+
+    self._callbacks.append(func)
+
+  def set_title(self, text):
+    self.title.set_text(text)
+
+  def add_artist(self, artist):
+    """
+    Adds an animated artist that is redrawn on every frame.
+    """
+
+    artist.set_animated(True)
+    self._artists.append(artist)
+
+  def _on_draw(self, event):
+    # A full redraw (first show, resize) renders everything but the
+    # animated artists; that is the background for the following frames.
+    canvas = self.fig.canvas
+    self._background = canvas.copy_from_bbox(self.fig.bbox)
+    self._draw_artists()
+
+  def _draw_artists(self):
+    for artist in self._artists:
+      self.fig.draw_artist(artist)
+
+  def update_data(self):
+    """
+    Copies the current window of the source into the line data.
+    """
+
+    window = self.source.latest(self.window, out=self._window)
+    if self._decimated is not None:
+      window = decimate_minmax(window, self._columns, out=self._decimated)
+    np.copyto(self._ydata, window.T)
+    for line, row in zip(self.lines, self._ydata):
+      line.set_ydata(row)
+
+  def update(self, *args):
+    """
+    Draws one frame.
+    """
+
+    for func in self._callbacks:
+      func(self)
+    self.update_data()
+    self._frame_times.append(time.perf_counter())
+    if self.fps_text.get_visible():
+      self.fps_text.set_text('{:.0f} FPS'.format(self.fps))
+
+    canvas = self.fig.canvas
+    if self._background is None or not getattr(canvas, 'supports_blit', True):
+      canvas.draw_idle()
+      return
+    canvas.restore_region(self._background)
+    self._draw_artists()
+    canvas.blit(self.fig.bbox)
+    canvas.flush_events()
+
+  def start(self):
+    """
+    Starts the update timer of the figure.
+    """
+
+    if self._timer is None:
+      self._timer = self.fig.canvas.new_timer(interval=self.interval)
+      self._timer.add_callback(self.update)
+    self._timer.start()
+
+  def stop(self):
+    if self._timer is not None:
+      self._timer.stop()
+
+  def show(self):
+    """
+    Starts the timer and blocks in #matplotlib.pyplot.show().
+    """
+
+    from matplotlib import pyplot as plt
+    self.start()
+    plt.show()
+    self.stop()
+
+
+__all__ = ['RingBuffer', 'BlitScope', 'decimate_minmax']
@@ -0,0 +1,231 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015-2018 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+Sampling profiler for event handlers.
+
+Profiling the whole #Hub.run() with #cProfile slows down every event and
+distorts the timing of the handler. The #SamplingProfiler instead traces
+only every n-th handler invocation (with #sys.setprofile(), on the hub
+thread only) and lets all other invocations run at full speed. The traced
+calls are attributed to the listener methods and to the functions they
+call, including the Python accessors of #Event (e.g. `Event.emg`) and the
+libmyo functions behind them.
+
+```python
+hub.profiler = myo.profiling.SamplingProfiler(ratio=0.01)
+hub.run_forever(listener)
+hub.profiler.dump('handler.folded')   # flamegraph.pl handler.folded > handler.svg
+```
+
+Without a profiler, #Hub.run() does not do any additional work.
+"""
+
+import collections
+import sys
+import threading
+import time
+
+import six
+
+
+def _code_name(frame):
+  code = frame.f_code
+  module = frame.f_globals.get('__name__', '?')
+  return '{}.{}'.format(module, getattr(code, 'co_qualname', code.co_name))
+
+
+def _builtin_name(func):
+  name = getattr(func, '__qualname__', None) or getattr(func, '__name__', '?')
+  module = getattr(func, '__module__', None)
+  self = getattr(func, '__self__', None)
+  if module is None and self is not None and not isinstance(self, type):
+    module = getattr(type(self), '__module__', None)
+  return '{}.{}'.format(module, name) if module else name
+
+
+class SamplingProfiler(object):
+  """
+  Traces a fraction *ratio* of the handler invocations. The sampled
+  invocations are spread evenly (every `round(1 / ratio)`-th call) so that
+  the overhead is predictable.
+
+  The traced time includes the overhead of the profile hook itself, which
+  inflates functions that make many small calls. Compare the relative
+  weights of the stacks rather than their absolute values.
+
+  # Attributes
+  calls: The number of handler invocations.
+  samples: The number of traced invocations.
+  enabled: Set to #False to pause sampling without unwrapping.
+  """
+
+  def __init__(self, ratio=0.01, clock=time.perf_counter):
+    if not 0 < ratio <= 1:
+      raise ValueError('ratio must be in (0, 1]')
+    self.ratio = ratio
+    self.clock = clock
+    self.enabled = True
+    self._every = max(1, int(round(1.0 / ratio)))
+    self._lock = threading.Lock()
+    self._code_names = {}
+    self._builtin_names = {}
+    self.reset()
+
+  def reset(self):
+    with self._lock:
+      self.calls = 0
+      self.samples = 0
+      self._countdown = 1
+      self._stacks = collections.defaultdict(float)
+      self._functions = {}
+
+  def wrap(self, handler):
+    """
+    Returns a handler that calls *handler* (a function or #DeviceListener)
+    and traces a fraction of the calls.
+    """
+
+    if not callable(handler):
+      if hasattr(handler, 'on_event'):
+        handler = handler.on_event
+      else:
+        raise TypeError('expected callable or DeviceListener')
+
+    def wrapper(event):
+      self.calls += 1
+      self._countdown -= 1
+      if self._countdown > 0 or not self.enabled:
+        return handler(event)
+      self._countdown = self._every
+      return self._trace(handler, event)
+
+    return wrapper
+
+  def _trace(self, handler, event):
+    names = []
+    frames = []   # [start, time spent in children]
+    stacks = collections.defaultdict(float)
+    functions = []
+    clock = self.clock
+    code_names = self._code_names
+    builtin_names = self._builtin_names
+
+    def hook(frame, what, arg):
+      now = clock()
+      if what == 'call':
+        code = frame.f_code
+        name = code_names.get(code)
+        if name is None:
+          name = code_names[code] = _code_name(frame)
+        names.append(name)
+        frames.append([now, 0.0])
+      elif what == 'c_call':
+        try:
+          name = builtin_names.get(arg)
+        except TypeError:
+          name = None
+        if name is None:
+          name = _builtin_name(arg)
+          try:
+            builtin_names[arg] = name
+          except TypeError:
+            pass
+        names.append(name)
+        frames.append([now, 0.0])
+      elif frames:
+        # return, c_return, c_exception
+        start, children = frames.pop()
+        elapsed = now - start
+        stacks[tuple(names)] += elapsed - children
+        functions.append((names.pop(), elapsed, elapsed - children))
+        if frames:
+          frames[-1][1] += elapsed
+
+    previous = sys.getprofile()
+    sys.setprofile(hook)
+    try:
+      return handler(event)
+    finally:
+      sys.setprofile(previous)
+      self._merge(stacks, functions)
+
+  def _merge(self, stacks, functions):
+    with self._lock:
+      self.samples += 1
+      for stack, value in stacks.items():
+        # The frames of sys.setprofile() itself are not part of the handler.
+        if stack[0].endswith('setprofile'):
+          continue
+        self._stacks[stack] += value
+      for name, total, own in functions:
+        if name.endswith('setprofile'):
+          continue
+        entry = self._functions.get(name)
+        if entry is None:
+          entry = self._functions[name] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += total
+        entry[2] += own
+
+  def stats(self):
+    """
+    Returns a list of `(name, calls, total, own)` tuples sorted by the time
+    spent in the function itself, in seconds, over all traced invocations.
+    Recursive calls count into *total* more than once.
+    """
+
+    with self._lock:
+      items = [(name, e[0], e[1], e[2]) for name, e in self._functions.items()]
+    items.sort(key=lambda x: x[3], reverse=True)
+    return items
+
+  def collapsed(self, unit=1e-6):
+    """
+    Returns the traced stacks in the collapsed format understood by
+    `flamegraph.pl`, speedscope and similar tools: one line per stack with
+    the frames separated by semicolons and the time spent in the innermost
+    frame as an integer multiple of *unit* seconds.
+    """
+
+    with self._lock:
+      items = sorted(self._stacks.items())
+    lines = []
+    for stack, value in items:
+      count = int(round(value / unit))
+      if count > 0:
+        lines.append('{} {}'.format(';'.join(stack), count))
+    return '\n'.join(lines) + '\n' if lines else ''
+
+  def dump(self, fp, unit=1e-6):
+    """
+    Writes the #collapsed() stacks to a file object or file name.
+    """
+
+    if isinstance(fp, six.string_types):
+      with open(fp, 'w') as f:
+        f.write(self.collapsed(unit))
+    else:
+      fp.write(self.collapsed(unit))
+
+
+__all__ = ['SamplingProfiler']
@@ -0,0 +1,294 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015-2018 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+Opt-in low-jitter mode for the hub thread.
+
+Python's cyclic garbage collector stops all threads while it runs, and a
+full collection over a large heap (a trained model, a few DataFrames) takes
+milliseconds. The OS scheduler adds its own delays when the hub thread
+shares a CPU with other work. #LowJitter reduces both:
+
+* the objects that exist when it is started are moved out of the reach of
+  the collector with #gc.freeze(),
+* automatic collections are disabled, and young collections run between
+  two #Hub.run() calls instead (full collections every *full_interval*
+  seconds),
+* the hub thread and the processing threads can be pinned to CPUs and get
+  a higher scheduling priority, where the platform and the permissions of
+  the process allow it.
+
+```python
+hub.realtime = myo.realtime.LowJitter(hub_cpus={2}, worker_cpus={3}, nice=-10)
+hub.metrics = myo.metrics.HubMetrics()   # the `interval` histograms show the jitter
+with hub.run_in_background(listener):
+  with hub.realtime.thread('worker'):
+    processing_loop()
+```
+
+Settings that can not be applied issue a #RuntimeWarning and are left out
+of #LowJitter.applied; the rest still takes effect.
+"""
+
+import collections
+import contextlib
+import gc
+import os
+import threading
+import time
+import warnings
+
+from .metrics import LogHistogram
+
+
+class LowJitter(object):
+  """
+  Process-wide GC control plus per-thread CPU affinity and priority. The
+  GC part is active from the first #start() (or #enter_thread()) until the
+  matching last #stop() (or #exit_thread()).
+
+  # Parameters
+  freeze: Call #gc.freeze() after a full collection when starting, and
+    after every scheduled full collection. #gc.freeze() is new in Python
+    3.7; on older versions, #start() issues a #RuntimeWarning and the rest
+    of the GC control works without it.
+  gc_interval: The minimum time in seconds between two young collections
+    in #idle(), or #None to leave the automatic collections enabled.
+  full_interval: The time in seconds between full collections in #idle(),
+    or #None to never run them. Cyclic garbage that survived a young
+    collection is only reclaimed by a full one.
+  hub_cpus, worker_cpus: Sets of CPU numbers for the `'hub'` and the
+    `'worker'` threads, or #None to leave the affinity alone.
+  nice: The niceness for the threads (negative values usually require
+    privileges), or #None.
+  fifo_priority: Switch the threads to the `SCHED_FIFO` real-time policy
+    with this priority (1-99, requires privileges), or #None.
+
+  # Attributes
+  applied: `{role: [setting, ...]}` of the thread settings that took
+    effect.
+  gc_pauses: A #LogHistogram of the duration of all collections (automatic
+    and scheduled) while the mode is active.
+  """
+
+  def __init__(self, freeze=True, gc_interval=1.0, full_interval=60.0,
+               hub_cpus=None, worker_cpus=None, nice=None, fifo_priority=None,
+               clock=time.perf_counter):
+    self.freeze = freeze
+    self.gc_interval = gc_interval
+    self.full_interval = full_interval
+    self.cpus = {'hub': hub_cpus, 'worker': worker_cpus}
+    self.nice = nice
+    self.fifo_priority = fifo_priority
+    self.clock = clock
+    self.applied = collections.defaultdict(list)
+    self.gc_pauses = LogHistogram()
+    self._lock = threading.Lock()
+    self._users = 0
+    self._gc_was_enabled = None
+    self._frozen = False
+    self._gc_started = None
+    self._last_young = None
+    self._last_full = None
+    self._local = threading.local()
+
+  @property
+  def active(self):
+    return self._users > 0
+
+  def start(self):
+    """
+    Runs a full collection, freezes the surviving objects and disables the
+    automatic collections. Calls nest; only the first one has an effect.
+    """
+
+    with self._lock:
+      self._users += 1
+      if self._users > 1:
+        return
+      gc.callbacks.append(self._gc_callback)
+      self._gc_was_enabled = gc.isenabled()
+      gc.collect()
+      self._frozen = self.freeze and hasattr(gc, 'freeze')
+      if self._frozen:
+        gc.freeze()
+      elif self.freeze:
+        warnings.warn('low-jitter mode: can not freeze the heap (gc.freeze() '
+                      'requires Python 3.7)', RuntimeWarning)
+      if self.gc_interval is not None:
+        gc.disable()
+      self._last_young = self._last_full = self.clock()
+
+  def stop(self):
+    """
+    Undoes #start() when called as often as #start().
+    """
+
+    with self._lock:
+      if self._users == 0:
+        return
+      self._users -= 1
+      if self._users > 0:
+        return
+      if self._frozen:
+        gc.unfreeze()
+        self._frozen = False
+      if self._gc_was_enabled:
+        gc.enable()
+      gc.callbacks.remove(self._gc_callback)
+
+  def __enter__(self):
+    self.start()
+    return self
+
+  def __exit__(self, *args):
+    self.stop()
+
+  def _gc_callback(self, phase, info):
+    if phase == 'start':
+      self._gc_started = self.clock()
+    elif self._gc_started is not None:
+      self.gc_pauses.record(self.clock() - self._gc_started)
+      self._gc_started = None
+
+  def idle(self):
+    """
+    Runs the scheduled collections that are due. Called by
+    #Hub.run_forever() between two runs; call it from your own loop when
+    you do not use it.
+    """
+
+    if not self.active or self.gc_interval is None:
+      return
+    now = self.clock()
+    if self.full_interval is not None and now - self._last_full >= self.full_interval:
+      self.collect(2)
+    elif now - self._last_young >= self.gc_interval:
+      self.collect(1)
+
+  def collect(self, generation=2):
+    """
+    Runs a collection of *generation* now. After a full collection, the
+    survivors are frozen again if *freeze* is enabled.
+    """
+
+    gc.collect(generation)
+    now = self.clock()
+    self._last_young = now
+    if generation == 2:
+      self._last_full = now
+      if self._frozen and self.active:
+        gc.freeze()
+
+  def enter_thread(self, role='hub'):
+    """
+    Applies the CPU affinity and priority of *role* (`'hub'` or `'worker'`)
+    to the calling thread and #start()s the GC control. Returns the list of
+    settings that took effect.
+    """
+
+    if role not in self.cpus:
+      raise ValueError('unknown role: {!r}'.format(role))
+    self.start()
+    state = self._thread_state()
+    applied = []
+    cpus = self.cpus[role]
+    if cpus is not None:
+      if self._apply('affinity', _set_affinity, state, cpus):
+        applied.append('affinity')
+    if self.nice is not None:
+      if self._apply('nice', _set_nice, state, self.nice):
+        applied.append('nice')
+    if self.fifo_priority is not None:
+      if self._apply('fifo', _set_fifo, state, self.fifo_priority):
+        applied.append('fifo')
+    with self._lock:
+      self.applied[role] = applied
+    return applied
+
+  def exit_thread(self):
+    """
+    Restores the affinity and priority of the calling thread and #stop()s
+    the GC control.
+    """
+
+    state = self._thread_state()
+    for restore in reversed(state):
+      try:
+        restore()
+      except OSError:
+        pass
+    del state[:]
+    self.stop()
+
+  @contextlib.contextmanager
+  def thread(self, role='worker'):
+    """
+    Context manager for #enter_thread() and #exit_thread().
+    """
+
+    self.enter_thread(role)
+    try:
+      yield self
+    finally:
+      self.exit_thread()
+
+  def _thread_state(self):
+    state = getattr(self._local, 'restore', None)
+    if state is None:
+      state = self._local.restore = []
+    return state
+
+  def _apply(self, name, func, state, value):
+    try:
+      state.append(func(value))
+    except (AttributeError, OSError, ValueError) as exc:
+      warnings.warn('low-jitter mode: can not set {} ({})'.format(name, exc),
+                    RuntimeWarning)
+      return False
+    return True
+
+
+# Linux applies these to the calling thread when given the id 0 (or the
+# native thread id for setpriority()).
+
+def _set_affinity(cpus):
+  previous = os.sched_getaffinity(0)
+  os.sched_setaffinity(0, cpus)
+  return lambda: os.sched_setaffinity(0, previous)
+
+
+def _set_nice(nice):
+  tid = threading.get_native_id()
+  previous = os.getpriority(os.PRIO_PROCESS, tid)
+  os.setpriority(os.PRIO_PROCESS, tid, nice)
+  return lambda: os.setpriority(os.PRIO_PROCESS, tid, previous)
+
+
+def _set_fifo(priority):
+  policy = os.sched_getscheduler(0)
+  param = os.sched_getparam(0)
+  os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+  return lambda: os.sched_setscheduler(0, policy, param)
+
+
+__all__ = ['LowJitter']
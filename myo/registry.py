@@ -0,0 +1,452 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015-2018 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+Per-user models that are loaded on demand.
+
+The #ModelRegistry maps users to a trained model and its feature
+configuration (window length, feature type, ...), and devices (by their
+#MacAddress) to users. Models are created lazily by the loader that was
+registered for the user, which can load a pickle file or train the model
+from the user's data. With a *cache_dir*, a trained model is pickled there
+and the next process loads it instead of training again.
+
+Loaded models stay in memory in LRU order until their estimated size (the
+size of their pickle) exceeds the *memory_budget*. #ModelRegistry.preload()
+loads the models of the users that are expected at a station in the
+background, so switching users is a dictionary lookup.
+
+```python
+registry = myo.registry.ModelRegistry(cache_dir='modelos')
+registry.register('david', lambda: train('emg_protocol_dados_david.csv'),
+                  features={'window': 512})
+registry.bind('D0:C0:FF:EE:00:01', 'david')
+registry.preload(['david'])
+
+entry = registry.get(event.mac_address)   # or registry.get('david')
+entry.model.predict(...)
+```
+"""
+
+import collections
+import os
+import pickle
+import re
+import threading
+import time
+
+import six
+
+from .macaddr import MacAddress
+from .metrics import LogHistogram
+
+try:
+  from concurrent.futures import Future, ThreadPoolExecutor
+except ImportError:  # Python 2 without the futures backport
+  Future = ThreadPoolExecutor = None
+
+#: A loaded model: the *user* it belongs to, the *model* and its
+#: *features* configuration (whatever was registered with it).
+UserModel = collections.namedtuple('UserModel', 'user model features')
+
+
+class _Registration(object):
+
+  __slots__ = ('user', 'loader', 'features', 'cache', 'path', 'sources')
+
+  def __init__(self, user, loader=None, features=None, cache=False, path=None,
+               sources=()):
+    self.user = user
+    self.loader = loader
+    self.features = features
+    self.cache = cache
+    self.path = path
+    self.sources = tuple(sources)
+
+  def fresh(self, path):
+    """
+    Returns #True if the cached model at *path* is newer than all sources.
+    """
+
+    try:
+      mtime = os.path.getmtime(path)
+    except OSError:
+      return False
+    for source in self.sources:
+      try:
+        if os.path.getmtime(source) >= mtime:
+          return False
+      except OSError:
+        pass  # A missing source does not invalidate the cache.
+    return True
+
+
+def _mac(key):
+  if isinstance(key, MacAddress):
+    return key
+  return MacAddress(key)
+
+
+def save_model(path, model, features=None):
+  """
+  Pickles *model* and its *features* configuration to *path*, in the
+  format that #ModelRegistry.register_file() loads. Returns the size of the
+  file.
+  """
+
+  data = pickle.dumps({'model': model, 'features': features}, pickle.HIGHEST_PROTOCOL)
+  tmp = path + '.{}.tmp'.format(os.getpid())
+  with open(tmp, 'wb') as fp:
+    fp.write(data)
+  os.replace(tmp, path)  # os.rename() fails on Windows if path exists
+  return len(data)
+
+
+def load_model(path):
+  """
+  Loads a file written by #save_model(). Returns `(model, features, size)`.
+  """
+
+  with open(path, 'rb') as fp:
+    data = fp.read()
+  payload = pickle.loads(data)
+  return payload['model'], payload['features'], len(data)
+
+
+class ModelRegistry(object):
+  """
+  Lazily loaded per-user models with an LRU memory budget.
+
+  # Parameters
+  memory_budget: The total estimated size in bytes of the models kept in
+    memory. The least recently used models are dropped when it is exceeded
+    (the model that was just loaded is always kept).
+  cache_dir: A directory where the models created by loaders are pickled
+    and loaded from on the next start. #None disables the cache.
+  preload_workers: The number of threads #preload() uses.
+
+  # Attributes
+  hits, misses, evictions: Counters of #get().
+  load_time: A #LogHistogram of the time it took to load (or train) a
+    model.
+  """
+
+  def __init__(self, memory_budget=256 * 2 ** 20, cache_dir=None,
+               preload_workers=1, clock=time.perf_counter):
+    if Future is None:
+      raise RuntimeError('concurrent.futures is not available')
+    self.memory_budget = memory_budget
+    self.cache_dir = cache_dir
+    self.preload_workers = preload_workers
+    self.clock = clock
+    self._lock = threading.Lock()
+    self._registrations = {}
+    self._devices = {}
+    self._loaded = collections.OrderedDict()  # user -> (UserModel, size)
+    self._loading = {}  # user -> Future
+    self._executor = None
+    self.memory = 0
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.load_time = LogHistogram()
+
+  # Registration
+
+  def register(self, user, loader, features=None, cache=True, sources=()):
+    """
+    Registers the model of *user*. *loader* is called without arguments
+    the first time the model is needed and returns the model (e.g. it
+    trains it from the user's data). With a *cache_dir* and *cache*
+    enabled, the result is pickled and later loads skip the loader, unless
+    one of the *sources* (the paths of the training data) was modified
+    after the pickle was written. Registering a user again replaces the
+    registration and drops the loaded model.
+    """
+
+    if not callable(loader):
+      raise TypeError('loader must be callable')
+    with self._lock:
+      self._registrations[user] = _Registration(user, loader, features, cache,
+                                                sources=sources)
+      self._drop(user)
+
+  def register_file(self, user, path):
+    """
+    Registers *user* with a model file written by #save_model().
+    """
+
+    with self._lock:
+      self._registrations[user] = _Registration(user, path=path)
+      self._drop(user)
+
+  def bind(self, device, user):
+    """
+    Maps *device* (a #MacAddress or a value it accepts) to *user*, so that
+    #get() can be called with the MAC address of an event or device.
+    """
+
+    with self._lock:
+      self._devices[_mac(device)] = user
+
+  def unbind(self, device):
+    with self._lock:
+      self._devices.pop(_mac(device), None)
+
+  @property
+  def users(self):
+    with self._lock:
+      return list(self._registrations)
+
+  def resolve(self, key):
+    """
+    Returns the user for *key*: a registered user, a #MacAddress bound with
+    #bind() or an object with a `mac_address` (#DeviceProxy, a *paired*
+    or *connected* #Event). Raises a #KeyError for unknown keys.
+    """
+
+    with self._lock:
+      if not isinstance(key, MacAddress):
+        if key in self._registrations:
+          return key
+        mac = getattr(key, 'mac_address', key)
+        if not isinstance(mac, MacAddress):
+          try:
+            mac = MacAddress(mac)
+          except (TypeError, ValueError):
+            raise KeyError(key)
+        key = mac
+      try:
+        return self._devices[key]
+      except KeyError:
+        raise KeyError(key)
+
+  # Loading
+
+  def _cache_path(self, user):
+    name = re.sub(r'[^\w.-]', '_', six.text_type(user))
+    return os.path.join(self.cache_dir, name + '.pickle')
+
+  def _load(self, registration):
+    start = self.clock()
+    path = registration.path
+    if path is None and self.cache_dir is not None and registration.cache:
+      path = self._cache_path(registration.user)
+    if path is not None and (registration.loader is None or registration.fresh(path)):
+      model, features, size = load_model(path)
+    else:
+      model, features = registration.loader(), registration.features
+      if path is not None:
+        if not os.path.isdir(self.cache_dir):
+          os.makedirs(self.cache_dir)
+        size = save_model(path, model, features)
+      else:
+        size = len(pickle.dumps(model, pickle.HIGHEST_PROTOCOL))
+    self.load_time.record(self.clock() - start)
+    return UserModel(registration.user, model, features), size
+
+  def get(self, key):
+    """
+    Returns the #UserModel for *key* (see #resolve()), loading it on the
+    calling thread if it is not in memory. When a #preload() of the model
+    is in progress, waits for it.
+    """
+
+    user = self.resolve(key)
+    with self._lock:
+      item = self._loaded.get(user)
+      if item is not None:
+        self._loaded[user] = self._loaded.pop(user)
+        self.hits += 1
+        return item[0]
+      self.misses += 1
+      future = self._loading.get(user)
+      owner = future is None
+      if owner:
+        future = self._start_load(user)
+    if owner:
+      self._run_load(user, future)
+    return future.result()
+
+  def _start_load(self, user):
+    # Called with the lock held.
+    if user not in self._registrations:
+      raise KeyError(user)
+    future = self._loading[user] = Future()
+    future.set_running_or_notify_cancel()
+    return future
+
+  def _run_load(self, user, future):
+    registration = self._registrations[user]
+    try:
+      entry, size = self._load(registration)
+    except BaseException as exc:
+      with self._lock:
+        self._loading.pop(user, None)
+      future.set_exception(exc)
+      return
+    with self._lock:
+      self._loading.pop(user, None)
+      if self._registrations.get(user) is registration:
+        self._loaded[user] = (entry, size)
+        self.memory += size
+        self._evict(keep=user)
+    future.set_result(entry)
+
+  def _evict(self, keep):
+    # Called with the lock held.
+    while self.memory > self.memory_budget and len(self._loaded) > 1:
+      user = next(iter(self._loaded))
+      if user == keep:
+        self._loaded[user] = self._loaded.pop(user)
+        continue
+      self._drop(user)
+      self.evictions += 1
+
+  def _drop(self, user):
+    # Called with the lock held.
+    item = self._loaded.pop(user, None)
+    if item is not None:
+      self.memory -= item[1]
+
+  def preload(self, keys):
+    """
+    Loads the models for *keys* on background threads. Returns a list of
+    futures with the #UserModel objects. Models that are in memory are not
+    loaded again (but count as recently used).
+    """
+
+    futures = []
+    with self._lock:
+      if self._executor is None:
+        self._executor = ThreadPoolExecutor(self.preload_workers)
+    for key in keys:
+      user = self.resolve(key)
+      with self._lock:
+        item = self._loaded.get(user)
+        if item is not None:
+          self._loaded[user] = self._loaded.pop(user)
+          future = Future()
+          future.set_result(item[0])
+        elif user in self._loading:
+          future = self._loading[user]
+        else:
+          future = self._start_load(user)
+          self._executor.submit(self._run_load, user, future)
+      futures.append(future)
+    return futures
+
+  def loaded(self, key):
+    """
+    Returns #True if the model for *key* is in memory.
+    """
+
+    user = self.resolve(key)
+    with self._lock:
+      return user in self._loaded
+
+  def evict(self, key=None):
+    """
+    Drops the model of *key* from memory, or all models if *key* is #None.
+    """
+
+    with self._lock:
+      users = list(self._loaded) if key is None else [key]
+    for user in users:
+      user = self.resolve(user)
+      with self._lock:
+        self._drop(user)
+
+  def put(self, key, model, features=None):
+    """
+    Replaces the model of *key* in memory, e.g. after it was updated with
+    `partial_fit()`, and rewrites its cached pickle. *features* defaults to
+    the current configuration.
+    """
+
+    user = self.resolve(key)
+    with self._lock:
+      registration = self._registrations[user]
+      item = self._loaded.get(user)
+    if features is None:
+      features = item[0].features if item is not None else registration.features
+    path = registration.path
+    if path is None and self.cache_dir is not None and registration.cache:
+      path = self._cache_path(user)
+    if path is not None:
+      if self.cache_dir is not None and not os.path.isdir(self.cache_dir):
+        os.makedirs(self.cache_dir)
+      size = save_model(path, model, features)
+    else:
+      size = len(pickle.dumps(model, pickle.HIGHEST_PROTOCOL))
+    entry = UserModel(user, model, features)
+    with self._lock:
+      self._drop(user)
+      self._loaded[user] = (entry, size)
+      self.memory += size
+      self._evict(keep=user)
+    return entry
+
+  def invalidate(self, key):
+    """
+    Drops the model of *key* from memory and deletes its cached pickle, so
+    the next #get() calls the loader again (e.g. after new training data
+    was recorded).
+    """
+
+    user = self.resolve(key)
+    with self._lock:
+      self._drop(user)
+    if self.cache_dir is not None:
+      path = self._cache_path(user)
+      if os.path.isfile(path):
+        os.remove(path)
+
+  def close(self):
+    """
+    Waits for running preloads and stops the preload threads.
+    """
+
+    with self._lock:
+      executor, self._executor = self._executor, None
+    if executor is not None:
+      executor.shutdown(wait=True)
+
+  def snapshot(self):
+    """
+    Returns `{'hits', 'misses', 'evictions', 'memory', 'loaded',
+    'load_time'}`, with the loaded users in LRU order (oldest first) and
+    a #LogHistogram snapshot in seconds.
+    """
+
+    with self._lock:
+      return {
+        'hits': self.hits,
+        'misses': self.misses,
+        'evictions': self.evictions,
+        'memory': self.memory,
+        'loaded': list(self._loaded),
+        'load_time': self.load_time.copy().snapshot(),
+      }
+
+
+__all__ = ['ModelRegistry', 'UserModel', 'load_model', 'save_model']
@@ -0,0 +1,311 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015-2018 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+Fan-out of the EMG/IMU stream of a single #Hub to any number of local
+consumer processes through a #multiprocessing.shared_memory ring buffer.
+Requires Python 3.8+ and NumPy.
+
+The hub process runs #serve() (or passes a #SharedMemoryWriter as its
+handler). Consumers attach a #SharedMemoryReader by name and poll for new
+records. There is a single writer and no locks; every record carries its
+sequence number, which readers use to detect records that were overwritten
+while they were reading and to detect when they have been lapped.
+
+```python
+# Hub process
+myo.shm.serve('myo-stream')
+
+# Any number of consumer processes
+reader = myo.shm.SharedMemoryReader('myo-stream')
+while True:
+  records = reader.read()
+  emg = records[records['type'] == int(myo.EventType.emg)]['emg']
+```
+"""
+
+import struct
+import sys
+
+from multiprocessing import shared_memory
+import numpy as np
+
+from ._ffi import EventType, Hub
+from ._device_listener import DeviceListener
+
+MAGIC = b'MYOSHM01'
+
+_HEADER = struct.Struct('<8sQQQ')    # magic, capacity, record size, head
+_HEADER_SIZE = 64
+_HEAD_OFFSET = 24
+
+#: The layout of a record in the ring buffer. *seq* is 1-based; a slot that
+#: is being written or was never written has a *seq* of 0. Only the fields
+#: matching the *type* are valid: *emg* for EMG events, *orientation*,
+#: *acceleration* and *gyroscope* for orientation events.
+RECORD_DTYPE = np.dtype([
+  ('seq', '<u8'),
+  ('timestamp', '<u8'),
+  ('device', 'u1'),
+  ('type', 'u1'),
+  ('_pad', 'u1', (6,)),
+  ('emg', 'i1', (8,)),
+  ('orientation', '<f4', (4,)),
+  ('acceleration', '<f4', (3,)),
+  ('gyroscope', '<f4', (3,)),
+])
+
+_EMG = struct.Struct('<QBB6x8b')
+_IMU = struct.Struct('<QBB6x8x10f')
+
+
+class SharedMemoryWriter(DeviceListener):
+  """
+  A #DeviceListener that writes EMG and orientation events into a new
+  shared memory ring buffer of *capacity* records. If *name* is #None, a
+  unique name is chosen; see #name.
+
+  # Parameters
+  stream_emg: Enable EMG streaming on every device that connects.
+  """
+
+  def __init__(self, name=None, capacity=1 << 16, stream_emg=True):
+    if capacity < 1:
+      raise ValueError('capacity must be positive')
+    size = _HEADER_SIZE + capacity * RECORD_DTYPE.itemsize
+    self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+    self._buf = self._shm.buf
+    self._buf[:size] = bytes(size)
+    _HEADER.pack_into(self._buf, 0, MAGIC, capacity, RECORD_DTYPE.itemsize, 0)
+    # The sequence numbers are written through NumPy views, which store
+    # them as single aligned 64-bit words. struct.pack_into() writes byte
+    # by byte, so readers could observe a half-written counter.
+    self._head_word = np.ndarray((1,), '<u8', self._buf, _HEAD_OFFSET)
+    self._seqs = np.ndarray((capacity,), RECORD_DTYPE, self._buf, _HEADER_SIZE)['seq']
+    self.capacity = capacity
+    self._head = 0
+    self._devices = {}
+    self._stream_emg = stream_emg
+
+  @property
+  def name(self):
+    return self._shm.name
+
+  @property
+  def head(self):
+    """
+    The total number of records written so far.
+    """
+
+    return self._head
+
+  def close(self, unlink=True):
+    """
+    Closes the shared memory. With *unlink*, the segment is destroyed once
+    all readers closed it as well.
+    """
+
+    self._buf = self._head_word = self._seqs = None
+    self._shm.close()
+    if unlink:
+      self._shm.unlink()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
+
+  def _device_index(self, event):
+    handle = event.device.handle
+    index = self._devices.get(handle)
+    if index is None:
+      index = self._devices[handle] = len(self._devices) & 0xff
+    return index
+
+  def _begin(self):
+    slot = self._head % self.capacity
+    self._seqs[slot] = 0
+    return slot, _HEADER_SIZE + slot * RECORD_DTYPE.itemsize
+
+  def _publish(self, slot):
+    self._head += 1
+    self._seqs[slot] = self._head
+    self._head_word[0] = self._head
+
+  def on_connected(self, event):
+    if self._stream_emg:
+      event.device.stream_emg(True)
+
+  def on_emg(self, event):
+    slot, offset = self._begin()
+    _EMG.pack_into(self._buf, offset + 8, event.timestamp,
+                   self._device_index(event), int(EventType.emg), *event.emg)
+    self._publish(slot)
+
+  def on_orientation(self, event):
+    o, a, g = event.orientation, event.acceleration, event.gyroscope
+    slot, offset = self._begin()
+    _IMU.pack_into(self._buf, offset + 8, event.timestamp,
+                   self._device_index(event), int(EventType.orientation),
+                   o.x, o.y, o.z, o.w, a.x, a.y, a.z, g.x, g.y, g.z)
+    self._publish(slot)
+
+
+def _attach(name):
+  if sys.version_info >= (3, 13):
+    return shared_memory.SharedMemory(name=name, create=False, track=False)
+  shm = shared_memory.SharedMemory(name=name, create=False)
+  # Before Python 3.13, attaching registers the segment with the resource
+  # tracker of this process, which would unlink it when the reader exits.
+  try:
+    from multiprocessing import resource_tracker
+    resource_tracker.unregister(shm._name, 'shared_memory')
+  except Exception:
+    pass
+  return shm
+
+
+class SharedMemoryReader(object):
+  """
+  Attaches to the ring buffer created by a #SharedMemoryWriter. The reader
+  keeps its own cursor; by default it starts at the oldest record still in
+  the buffer, with *latest* it only sees records written after attaching.
+  """
+
+  def __init__(self, name, latest=False):
+    self._shm = _attach(name)
+    magic, capacity, record_size, head = _HEADER.unpack_from(self._shm.buf, 0)
+    if magic != MAGIC:
+      raise ValueError('{!r} is not a myo shared memory stream'.format(name))
+    if record_size != RECORD_DTYPE.itemsize:
+      raise ValueError('record size mismatch ({} != {})'.format(
+        record_size, RECORD_DTYPE.itemsize))
+    self.capacity = capacity
+    self._records = np.ndarray((capacity,), dtype=RECORD_DTYPE,
+                               buffer=self._shm.buf, offset=_HEADER_SIZE)
+    self._records.flags.writeable = False
+    self._head_word = np.ndarray((1,), '<u8', self._shm.buf, _HEAD_OFFSET)
+    self._head_word.flags.writeable = False
+    self._cursor = head if latest else max(0, head - capacity)
+
+    #: The number of records this reader missed because the writer
+    #: overwrote them before they were read.
+    self.missed = 0
+
+  def close(self):
+    self._records = self._head_word = None
+    self._shm.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
+
+  @property
+  def head(self):
+    return int(self._head_word[0])
+
+  @property
+  def pending(self):
+    """
+    The number of records written but not yet read.
+    """
+
+    return self.head - self._cursor
+
+  @property
+  def lapped(self):
+    """
+    #True if the writer has overwritten records this reader did not read.
+    """
+
+    return self.head - self._cursor > self.capacity
+
+  def read(self, max_records=None, out=None):
+    """
+    Returns the records written since the last call as a structured array
+    of #RECORD_DTYPE. If *out* is given, the records are copied into it
+    (limited to its length) and a view of the filled part is returned, so a
+    polling loop can run without allocating. Records that are overwritten
+    before or while they are copied are skipped and counted in #missed.
+    """
+
+    head = self.head
+    cursor = self._cursor
+    capacity = self.capacity
+    if head - cursor > capacity:
+      self.missed += head - cursor - capacity
+      cursor = head - capacity
+    count = head - cursor
+    if max_records is not None:
+      count = min(count, max_records)
+    if out is not None:
+      count = min(count, len(out))
+    else:
+      out = np.empty(count, dtype=RECORD_DTYPE)
+    if count == 0:
+      self._cursor = cursor
+      return out[:0]
+
+    start = cursor % capacity
+    first = min(count, capacity - start)
+    out[:first] = self._records[start:start + first]
+    if first < count:
+      out[first:count] = self._records[:count - first]
+
+    # Validate against the sequence numbers: a mismatch means the writer
+    # overwrote (or was writing) the slot before we copied it. Slots the
+    # writer may have reached since then (including the one it may be
+    # writing right now) could be torn even if their sequence matched.
+    expected = np.arange(cursor + 1, cursor + count + 1, dtype=np.uint64)
+    valid = out['seq'][:count] == expected
+    oldest_safe = self.head + 2 - capacity
+    if oldest_safe > cursor + 1:
+      valid &= expected >= oldest_safe
+    if not valid.all():
+      last_invalid = np.flatnonzero(~valid)[-1]
+      self.missed += int(last_invalid) + 1
+      result = out[last_invalid + 1:count]
+    else:
+      result = out[:count]
+    self._cursor = cursor + count
+    return result
+
+
+def serve(name, capacity=1 << 16, hub=None, duration_ms=500):
+  """
+  Runs a hub in the current process and publishes its EMG and orientation
+  events into the shared memory ring buffer *name* until interrupted.
+  """
+
+  if hub is None:
+    hub = Hub()
+  with SharedMemoryWriter(name, capacity) as writer:
+    try:
+      hub.run_forever(writer, duration_ms)
+    except KeyboardInterrupt:
+      pass
+
+
+__all__ = ['RECORD_DTYPE', 'SharedMemoryWriter', 'SharedMemoryReader', 'serve']
@@ -0,0 +1,297 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015-2018 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+Supervised hub loop that keeps the data flowing.
+
+#Hub.run_forever() ends when the handler raises, and it does not notice when
+a device stops sending data. The #HubSupervisor runs the hub instead and
+
+* restarts the loop after a handler error, with exponential backoff,
+* enables EMG streaming whenever a device connects (also after a
+  reconnect),
+* detects stalls per device, both from gaps in the event timestamps and
+  from a watchdog that runs between two #Hub.run() calls, and re-issues
+  `stream_emg(True)` to a stalled device,
+* records the time from every outage (stall, disconnect, handler error) to
+  the next data event of the device.
+
+```python
+supervisor = myo.supervisor.HubSupervisor(hub, listener, stall_timeout=0.5)
+with supervisor.run_in_background():
+  ...
+print(supervisor.snapshot())
+```
+"""
+
+import contextlib
+import threading
+import time
+
+from ._ffi import EventType
+from .metrics import LogHistogram
+
+_DATA_EVENTS = (EventType.emg, EventType.orientation)
+
+
+class _DeviceState(object):
+
+  __slots__ = ('device', 'connected', 'last_time', 'last_timestamp',
+               'outage', 'outage_kind', 'stalls', 'reconnects')
+
+  def __init__(self, device):
+    self.device = device
+    self.connected = False
+    self.last_time = None
+    self.last_timestamp = None
+    self.outage = None        # clock time when the current outage started
+    self.outage_kind = None
+    self.stalls = 0
+    self.reconnects = 0
+
+
+class HubSupervisor(object):
+  """
+  Runs *handler* (a callable or #DeviceListener) on *hub* until #stop().
+
+  # Parameters
+  stall_timeout: Seconds without a data event (EMG or orientation) after
+    which a connected device counts as stalled.
+  stream_emg: Enable EMG streaming on every connect and re-issue it to
+    stalled devices.
+  backoff: `(initial, maximum)` delay in seconds before a restart after a
+    handler error. The delay doubles with every consecutive error and is
+    reset by a run that delivered events without error.
+  max_restarts: Give up and re-raise the handler error after this many
+    consecutive failed runs, or #None to never give up.
+  on_stall, on_recover: Called as `(device, kind)` when an outage starts
+    and as `(device, kind, seconds)` when the device delivers data again.
+    *kind* is `'stall'`, `'disconnect'` or `'error'`. Called on the hub
+    thread.
+
+  # Attributes
+  restarts: The number of restarts after handler errors.
+  last_error: The last handler error, or #None.
+  recovery: A #LogHistogram of the recovery times in seconds.
+  """
+
+  def __init__(self, hub, handler, stall_timeout=1.0, stream_emg=True,
+               backoff=(0.1, 5.0), max_restarts=None, duration_ms=100,
+               on_stall=None, on_recover=None, clock=time.perf_counter):
+    if not callable(handler):
+      if hasattr(handler, 'on_event'):
+        handler = handler.on_event
+      else:
+        raise TypeError('expected callable or DeviceListener')
+    self.hub = hub
+    self.handler = handler
+    self.stall_timeout = stall_timeout
+    self.stream_emg = stream_emg
+    self.backoff = backoff
+    self.max_restarts = max_restarts
+    self.duration_ms = duration_ms
+    self.on_stall = on_stall
+    self.on_recover = on_recover
+    self.clock = clock
+    self._lock = threading.Lock()
+    self._stop = threading.Event()
+    self._thread = None
+    self._devices = {}
+    self._error_time = None
+    self.restarts = 0
+    self.errors = 0
+    self.last_error = None
+    self.recovery = LogHistogram()
+
+  # Hub thread
+
+  def _on_event(self, event):
+    type = event.type
+    handle = event.device.handle
+    state = self._devices.get(handle)
+    if state is None:
+      state = self._devices[handle] = _DeviceState(event.device)
+    now = self.clock()
+
+    if type in _DATA_EVENTS:
+      timestamp = event.timestamp
+      if state.outage is not None:
+        self._recovered(state, now)
+      elif state.last_timestamp is not None and \
+          (timestamp - state.last_timestamp) * 1e-6 > self.stall_timeout:
+        # A gap that the watchdog did not see (e.g. within one run).
+        gap = (timestamp - state.last_timestamp) * 1e-6
+        state.stalls += 1
+        self._notify(self.on_stall, state.device, 'stall')
+        self._record(state, 'stall', gap)
+      state.last_time = now
+      state.last_timestamp = timestamp
+    elif type == EventType.connected:
+      if state.last_time is not None:
+        state.reconnects += 1
+      state.connected = True
+      state.last_time = now
+      if self.stream_emg:
+        event.device.stream_emg(True)
+    elif type == EventType.disconnected or type == EventType.unpaired:
+      state.connected = False
+      self._outage(state, 'disconnect', now)
+
+    if self._error_time is not None and type in _DATA_EVENTS:
+      seconds = now - self._error_time
+      self._error_time = None
+      self._notify(self.on_recover, event.device, 'error', seconds)
+      with self._lock:
+        self.recovery.record(seconds)
+
+    return self.handler(event)
+
+  def _outage(self, state, kind, now):
+    if state.outage is None:
+      state.outage = now
+      state.outage_kind = kind
+      self._notify(self.on_stall, state.device, kind)
+
+  def _recovered(self, state, now):
+    seconds = now - state.outage
+    kind = state.outage_kind
+    state.outage = state.outage_kind = None
+    self._record(state, kind, seconds)
+
+  def _record(self, state, kind, seconds):
+    with self._lock:
+      self.recovery.record(seconds)
+    self._notify(self.on_recover, state.device, kind, seconds)
+
+  def _notify(self, func, *args):
+    if func is not None:
+      func(*args)
+
+  def check(self):
+    """
+    The watchdog: marks connected devices without data for longer than
+    *stall_timeout* as stalled and re-issues `stream_emg(True)` to them.
+    Runs on the hub thread between two #Hub.run() calls.
+    """
+
+    now = self.clock()
+    for state in list(self._devices.values()):
+      if not state.connected or state.outage is not None or state.last_time is None:
+        continue
+      if now - state.last_time > self.stall_timeout:
+        state.stalls += 1
+        self._outage(state, 'stall', state.last_time)
+        if self.stream_emg:
+          try:
+            state.device.stream_emg(True)
+          except Exception:
+            pass  # The next check tries again.
+
+  def run(self):
+    """
+    Runs the supervised loop on the calling thread until #stop() is called
+    or the handler returns #HandlerResult.stop. Returns right away if
+    #stop() was called before; #start() clears that.
+    """
+
+    hub = self.hub
+    initial, maximum = self.backoff
+    delay = initial
+    failures = 0
+    while not self._stop.is_set():
+      try:
+        completed = hub.run(self._on_event, self.duration_ms)
+      except Exception as exc:
+        failures += 1
+        with self._lock:
+          self.errors += 1
+          self.last_error = exc
+        if self._error_time is None:
+          self._error_time = self.clock()
+        if self.max_restarts is not None and failures > self.max_restarts:
+          raise
+        if self._stop.wait(delay):
+          break
+        delay = min(delay * 2, maximum)
+        with self._lock:
+          self.restarts += 1
+        continue
+      if self._error_time is None:
+        failures = 0
+        delay = initial
+      if not completed and not self._stop.is_set():
+        # The handler returned HandlerResult.stop, or Hub.stop() was called
+        # by someone else.
+        break
+      if hub.commands.pending:
+        hub.commands.drain()
+      self.check()
+
+  def start(self):
+    # Not in run(): a stop() between here and the start of the thread
+    # would be lost.
+    self._stop.clear()
+    self._thread = threading.Thread(target=self.run, name='myo.supervisor.HubSupervisor')
+    self._thread.daemon = True
+    self._thread.start()
+    return self._thread
+
+  def stop(self, timeout=None):
+    self._stop.set()
+    self.hub.stop()
+    if self._thread is not None and self._thread is not threading.current_thread():
+      self._thread.join(timeout)
+      self._thread = None
+
+  @contextlib.contextmanager
+  def run_in_background(self):
+    thread = self.start()
+    try:
+      yield thread
+    finally:
+      self.stop()
+
+  def snapshot(self):
+    """
+    Returns `{'restarts', 'errors', 'last_error', 'recovery', 'devices'}`.
+    *recovery* is a #LogHistogram snapshot in seconds, *devices* a list of
+    `{'connected', 'stalled', 'stalls', 'reconnects'}` dictionaries in the
+    order the devices were first seen.
+    """
+
+    with self._lock:
+      result = {
+        'restarts': self.restarts,
+        'errors': self.errors,
+        'last_error': repr(self.last_error) if self.last_error is not None else None,
+        'recovery': self.recovery.copy().snapshot(),
+      }
+    result['devices'] = [{
+      'connected': s.connected,
+      'stalled': s.outage is not None,
+      'stalls': s.stalls,
+      'reconnects': s.reconnects,
+    } for s in list(self._devices.values())]
+    return result
+
+
+__all__ = ['HubSupervisor']
@@ -0,0 +1,457 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015-2018 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+"""
+Recording of the raw event stream of a #Hub into a compact binary trace and
+deterministic replay of such traces through any #DeviceListener.
+
+```python
+with open('session.myotrace', 'wb') as fp:
+  with myo.trace.TraceRecorder(fp, listener) as recorder:
+    hub.run_forever(recorder)
+
+myo.trace.TraceReplayer('session.myotrace').run(MyListener())
+```
+
+A trace starts with the 8 byte magic `MYOTRACE` and a 16-bit version,
+followed by one record per event: a 12 byte header (event type, device
+index, payload size, timestamp) and a type-specific payload.
+"""
+
+import six
+import struct
+import threading
+import time
+
+from ._ffi import (EventType, Pose, Arm, XDirection, WarmupState,
+  WarmupResult, VibrationType, UnlockType, UserActionType, HandlerResult,
+  InvalidOperation)
+from .macaddr import MacAddress
+from .math import Quaternion, Vector
+
+MAGIC = b'MYOTRACE'
+VERSION = 1
+
+_FILE_HEADER = struct.Struct('<8sH')
+_RECORD_HEADER = struct.Struct('<BBHQ')
+
+#: Payload layout for every event type that carries data. Event types not
+#: listed here are recorded with an empty payload.
+_PAYLOADS = {
+  EventType.paired: struct.Struct('<4HQ'),        # firmware version, mac address
+  EventType.connected: struct.Struct('<4HQ'),
+  EventType.arm_synced: struct.Struct('<BBBf'),   # arm, x direction, warmup state, rotation
+  EventType.warmup_completed: struct.Struct('<B'),
+  EventType.orientation: struct.Struct('<10f'),   # orientation, acceleration, gyroscope
+  EventType.pose: struct.Struct('<B'),
+  EventType.rssi: struct.Struct('<b'),
+  EventType.battery_level: struct.Struct('<B'),
+  EventType.emg: struct.Struct('<8b'),
+}
+
+
+def _encode_payload(event):
+  type = event.type
+  if type == EventType.emg:
+    return event.emg
+  elif type == EventType.orientation:
+    return tuple(event.orientation) + tuple(event.acceleration) + tuple(event.gyroscope)
+  elif type == EventType.paired or type == EventType.connected:
+    return tuple(event.firmware_version) + (event.mac_address.value,)
+  elif type == EventType.arm_synced:
+    return (int(event.arm), int(event.x_direction), int(event.warmup_state),
+            event.rotation_on_arm)
+  elif type == EventType.pose:
+    return (int(event.pose),)
+  elif type == EventType.rssi:
+    return (event.rssi,)
+  elif type == EventType.battery_level:
+    return (event.battery_level,)
+  elif type == EventType.warmup_completed:
+    return (int(event.warmup_result),)
+  return ()
+
+
+class TraceRecorder(object):
+  """
+  Records every event passed through it to the binary file object *fp*
+  and forwards the event to *handler* (a callable or #DeviceListener, may
+  be #None). Pass the recorder to #Hub.run() in place of the handler.
+
+  Records are buffered in memory and written whenever *buffer_size* bytes
+  have accumulated, on #flush() and on #close().
+  """
+
+  def __init__(self, fp, handler=None, buffer_size=64 * 1024):
+    if handler is not None and not callable(handler):
+      if hasattr(handler, 'on_event'):
+        handler = handler.on_event
+      else:
+        raise TypeError('expected callable or DeviceListener')
+    self._fp = fp
+    self._handler = handler
+    self._buffer_size = buffer_size
+    self._buffer = bytearray(_FILE_HEADER.pack(MAGIC, VERSION))
+    self._lock = threading.Lock()
+    self._devices = {}
+    self._closed = False
+    self.num_events = 0
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
+
+  def __call__(self, event):
+    self.record(event)
+    if self._handler is not None:
+      return self._handler(event)
+    return True
+
+  on_event = __call__
+
+  def record(self, event):
+    """
+    Appends *event* to the trace.
+    """
+
+    handle = event.device.handle
+    index = self._devices.get(handle)
+    if index is None:
+      index = len(self._devices)
+      if index > 255:
+        raise RuntimeError('a trace can record at most 256 devices')
+      self._devices[handle] = index
+
+    type = event.type
+    payload = _PAYLOADS.get(type)
+    with self._lock:
+      if self._closed:
+        raise RuntimeError('TraceRecorder is closed')
+      buf = self._buffer
+      if payload is None:
+        buf += _RECORD_HEADER.pack(type, index, 0, event.timestamp)
+      else:
+        buf += _RECORD_HEADER.pack(type, index, payload.size, event.timestamp)
+        buf += payload.pack(*_encode_payload(event))
+      self.num_events += 1
+      if len(buf) >= self._buffer_size:
+        self._fp.write(buf)
+        del buf[:]
+
+  def flush(self):
+    with self._lock:
+      if self._buffer:
+        self._fp.write(self._buffer)
+        del self._buffer[:]
+      self._fp.flush()
+
+  def close(self):
+    """
+    Flushes the remaining records. Does not close the underlying file.
+    """
+
+    if not self._closed:
+      self.flush()
+      self._closed = True
+
+
+class TraceDevice(object):
+  """
+  Stands in for a #Device during replay. Commands issued to the device are
+  not executed but appended to #commands as `(name, args)` tuples so they
+  can be checked in regression tests.
+  """
+
+  def __init__(self, index):
+    self.index = index
+    self.mac_address = None
+    self.firmware_version = None
+    self.commands = []
+
+  def __repr__(self):
+    return '<TraceDevice index={} mac_address={}>'.format(
+      self.index, self.mac_address)
+
+  @property
+  def handle(self):
+    return self.index
+
+  def vibrate(self, type=VibrationType.medium):
+    self.commands.append(('vibrate', (type,)))
+
+  def stream_emg(self, type):
+    self.commands.append(('stream_emg', (type,)))
+
+  def request_rssi(self):
+    self.commands.append(('request_rssi', ()))
+
+  def request_battery_level(self):
+    self.commands.append(('request_battery_level', ()))
+
+  def unlock(self, type=UnlockType.hold):
+    self.commands.append(('unlock', (type,)))
+
+  def lock(self):
+    self.commands.append(('lock', ()))
+
+  def notify_user_action(self, type=UserActionType.single):
+    self.commands.append(('notify_user_action', (type,)))
+
+
+class TraceEvent(object):
+  """
+  An event read from a trace. Provides the same properties as #Event,
+  including raising #InvalidOperation when a property is accessed on an
+  event of the wrong type.
+  """
+
+  __slots__ = ('type', 'timestamp', 'device', '_data')
+
+  def __init__(self, type, timestamp, device, data):
+    self.type = type
+    self.timestamp = timestamp
+    self.device = device
+    self._data = data
+
+  def __repr__(self):
+    return 'TraceEvent(type={!r}, timestamp={!r}, device={!r})'.format(
+      self.type, self.timestamp, self.device.index)
+
+  def _check(self, type):
+    if self.type != type:
+      raise InvalidOperation()
+
+  @property
+  def device_name(self):
+    return None
+
+  @property
+  def mac_address(self):
+    if self.type == EventType.emg:
+      return None
+    return self.device.mac_address
+
+  @property
+  def firmware_version(self):
+    return self.device.firmware_version
+
+  @property
+  def arm(self):
+    self._check(EventType.arm_synced)
+    return Arm(self._data[0])
+
+  @property
+  def x_direction(self):
+    self._check(EventType.arm_synced)
+    return XDirection(self._data[1])
+
+  @property
+  def warmup_state(self):
+    self._check(EventType.arm_synced)
+    return WarmupState(self._data[2])
+
+  @property
+  def rotation_on_arm(self):
+    self._check(EventType.arm_synced)
+    return self._data[3]
+
+  @property
+  def warmup_result(self):
+    self._check(EventType.warmup_completed)
+    return WarmupResult(self._data[0])
+
+  @property
+  def orientation(self):
+    self._check(EventType.orientation)
+    return Quaternion(*self._data[0:4])
+
+  @property
+  def acceleration(self):
+    self._check(EventType.orientation)
+    return Vector(*self._data[4:7])
+
+  @property
+  def gyroscope(self):
+    self._check(EventType.orientation)
+    return Vector(*self._data[7:10])
+
+  def orientation_into(self, quat):
+    self._check(EventType.orientation)
+    data = self._data
+    return quat.set(data[0], data[1], data[2], data[3])
+
+  def acceleration_into(self, vec):
+    self._check(EventType.orientation)
+    data = self._data
+    return vec.set(data[4], data[5], data[6])
+
+  def gyroscope_into(self, vec):
+    self._check(EventType.orientation)
+    data = self._data
+    return vec.set(data[7], data[8], data[9])
+
+  @property
+  def pose(self):
+    self._check(EventType.pose)
+    return Pose(self._data[0])
+
+  @property
+  def rssi(self):
+    self._check(EventType.rssi)
+    return self._data[0]
+
+  @property
+  def battery_level(self):
+    self._check(EventType.battery_level)
+    return self._data[0]
+
+  @property
+  def emg(self):
+    self._check(EventType.emg)
+    return list(self._data)
+
+  def emg_into(self, out):
+    self._check(EventType.emg)
+    out[:8] = self._data
+    return out
+
+
+def read_trace(fp, devices=None):
+  """
+  Reads a trace from the binary file object *fp* and yields #TraceEvent
+  objects. *devices* is a dictionary that maps device indices to
+  #TraceDevice objects and is filled as new devices appear in the trace.
+  Raises #ValueError if *fp* is not a trace, at a truncated record and at a
+  record whose payload size does not match its event type.
+  """
+
+  if devices is None:
+    devices = {}
+  data = fp.read()
+  if len(data) < _FILE_HEADER.size:
+    raise ValueError('not a myo trace (file too short)')
+  magic, version = _FILE_HEADER.unpack_from(data, 0)
+  if magic != MAGIC:
+    raise ValueError('not a myo trace (bad magic {!r})'.format(magic))
+  if version > VERSION:
+    raise ValueError('unsupported trace version {}'.format(version))
+
+  offset = _FILE_HEADER.size
+  header_size = _RECORD_HEADER.size
+  unpack_header = _RECORD_HEADER.unpack_from
+  end = len(data)
+  while offset + header_size <= end:
+    type, index, size, timestamp = unpack_header(data, offset)
+    offset += header_size
+    if offset + size > end:
+      raise ValueError('truncated trace record at offset {}'.format(offset - header_size))
+
+    device = devices.get(index)
+    if device is None:
+      device = devices[index] = TraceDevice(index)
+
+    type = EventType(type)
+    payload = _PAYLOADS.get(type)
+    if payload is None:
+      values = ()
+    elif size == payload.size:
+      values = payload.unpack_from(data, offset)
+    else:
+      raise ValueError('bad {} record at offset {} (payload of {} bytes, expected {})'
+                       .format(type.name, offset - header_size, size, payload.size))
+    offset += size
+
+    if type == EventType.paired or type == EventType.connected:
+      device.firmware_version = values[:4]
+      device.mac_address = MacAddress(values[4])
+
+    yield TraceEvent(type, timestamp, device, values)
+
+
+class TraceReplayer(object):
+  """
+  Pushes the events of a trace through a #DeviceListener or handler
+  function, with the same return value semantics as #Hub.run().
+
+  # Parameters
+  source: A filename, a binary file object or a list of #TraceEvent objects.
+  realtime: If #True, reproduce the original timing between events based on
+    their timestamps. Otherwise events are delivered as fast as possible.
+  speed: Playback speed factor for *realtime* replay.
+  """
+
+  def __init__(self, source, realtime=False, speed=1.0,
+               clock=time.perf_counter, sleep=time.sleep):
+    self.devices = {}
+    if isinstance(source, six.string_types):
+      with open(source, 'rb') as fp:
+        self.events = list(read_trace(fp, self.devices))
+    elif hasattr(source, 'read'):
+      self.events = list(read_trace(source, self.devices))
+    else:
+      self.events = list(source)
+      for event in self.events:
+        self.devices.setdefault(event.device.index, event.device)
+    if speed <= 0:
+      raise ValueError('speed must be positive')
+    self.realtime = realtime
+    self.speed = speed
+    self.clock = clock
+    self.sleep = sleep
+
+  def __len__(self):
+    return len(self.events)
+
+  def run(self, handler):
+    """
+    Delivers all events to *handler*. Returns #False if the handler asked
+    to stop, #True if the whole trace was replayed.
+    """
+
+    if not callable(handler):
+      if hasattr(handler, 'on_event'):
+        handler = handler.on_event
+      else:
+        raise TypeError('expected callable or DeviceListener')
+    if not self.events:
+      return True
+
+    clock, sleep = self.clock, self.sleep
+    realtime = self.realtime
+    scale = 1e-6 / self.speed
+    first_timestamp = self.events[0].timestamp
+    start = clock()
+    for event in self.events:
+      if realtime:
+        delay = start + (event.timestamp - first_timestamp) * scale - clock()
+        if delay > 0:
+          sleep(delay)
+      result = handler(event)
+      if result is False or (result is not None and result is not True
+                             and HandlerResult(result) == HandlerResult.stop):
+        return False
+    return True
+
+
+__all__ = ['TraceRecorder', 'TraceReplayer', 'TraceEvent', 'TraceDevice', 'read_trace']
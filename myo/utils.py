@@ -21,7 +21,11 @@
 # IN THE SOFTWARE.
 
 
+import heapq
+import itertools
+import threading
 import time
+import traceback
 
 
 class TimeInterval(object):
@@ -33,7 +37,7 @@ class TimeInterval(object):
     self.value = value
     self.value_on_reset = value_on_reset
     self.clock = clock or time.perf_counter
-    self.start = self.clock
+    self.start = self.clock()
 
   def check(self):
     """
@@ -92,3 +96,241 @@ class TimeoutManager(TimeInterval):
       return max_value
     else:
       return remainder
+
+
+class Task(object):
+  """
+  A task of a #Scheduler. Returned by #Scheduler.every() and
+  #Scheduler.after().
+
+  # Attributes
+  interval: The period in seconds, or #None for a one-shot task.
+  deadline: The #Scheduler.clock time of the next run.
+  runs: The number of completed runs.
+  overruns: The number of periods that were skipped because a run (or the
+    scheduler) was late by more than one period.
+  max_lateness: The largest delay between a deadline and the start of the
+    run, in seconds.
+  errors: The number of runs that raised an exception.
+  """
+
+  def __init__(self, scheduler, func, interval, deadline, name):
+    self._scheduler = scheduler
+    self.func = func
+    self.interval = interval
+    self.deadline = deadline
+    self.name = name or getattr(func, '__name__', repr(func))
+    self.cancelled = False
+    self.runs = 0
+    self.overruns = 0
+    self.max_lateness = 0.0
+    self.errors = 0
+
+  def __repr__(self):
+    return '<Task {!r} interval={!r} runs={}>'.format(self.name, self.interval, self.runs)
+
+  def cancel(self):
+    self._scheduler.cancel(self)
+
+
+class Scheduler(object):
+  """
+  Runs periodic and one-shot tasks on a single thread (or on an asyncio
+  event loop) instead of one `time.sleep()` loop per task.
+
+  The deadlines of a periodic task are `start + k * interval`, so they do
+  not drift when runs start late or take time. A run that ends after the
+  next deadline skips the periods it missed; they are counted in
+  #Task.overruns and reported to *on_overrun* as `(task, missed)`. An
+  exception in a task is passed to *on_error* as `(task, exc)` (the
+  default prints the traceback) and does not stop the task.
+
+  ```python
+  scheduler = myo.utils.Scheduler()
+  scheduler.every(1.0, lambda: hub.commands.submit(device, 'request_rssi'))
+  scheduler.every(1 / 30., view.update)
+  scheduler.start()
+  ```
+  """
+
+  def __init__(self, clock=time.perf_counter, on_overrun=None, on_error=None):
+    self.clock = clock
+    self.on_overrun = on_overrun
+    self.on_error = on_error
+    self._cond = threading.Condition()
+    self._heap = []
+    self._counter = itertools.count()
+    self._stop = False
+    self._thread = None
+    self._loop = None
+    self._handle = None
+
+  def every(self, interval, func, delay=None, name=None):
+    """
+    Runs *func* every *interval* seconds, the first time after *delay*
+    seconds (default *interval*).
+    """
+
+    if interval <= 0:
+      raise ValueError('interval must be positive')
+    if delay is None:
+      delay = interval
+    return self._add(Task(self, func, interval, self.clock() + delay, name))
+
+  def after(self, delay, func, name=None):
+    """
+    Runs *func* once after *delay* seconds.
+    """
+
+    return self._add(Task(self, func, None, self.clock() + delay, name))
+
+  def cancel(self, task):
+    with self._cond:
+      task.cancelled = True
+      self._cond.notify()
+
+  @property
+  def tasks(self):
+    with self._cond:
+      return [entry[2] for entry in sorted(self._heap) if not entry[2].cancelled]
+
+  def _add(self, task):
+    with self._cond:
+      heapq.heappush(self._heap, (task.deadline, next(self._counter), task))
+      self._cond.notify()
+    self._wakeup_loop()
+    return task
+
+  def next_deadline(self):
+    """
+    Returns the earliest deadline of the pending tasks, or #None.
+    """
+
+    with self._cond:
+      heap = self._heap
+      while heap and heap[0][2].cancelled:
+        heapq.heappop(heap)
+      return heap[0][0] if heap else None
+
+  def run_pending(self):
+    """
+    Runs all tasks whose deadline has passed, in the order of their
+    deadlines. Returns the number of seconds until the next deadline, or
+    #None if there are no tasks.
+    """
+
+    while True:
+      now = self.clock()
+      with self._cond:
+        heap = self._heap
+        while heap and heap[0][2].cancelled:
+          heapq.heappop(heap)
+        if not heap:
+          return None
+        if heap[0][0] > now:
+          return heap[0][0] - now
+        deadline, _, task = heapq.heappop(heap)
+      self._run(task, deadline, now)
+
+  def _run(self, task, deadline, now):
+    lateness = now - deadline
+    if lateness > task.max_lateness:
+      task.max_lateness = lateness
+    try:
+      task.func()
+    except Exception as exc:
+      task.errors += 1
+      if self.on_error is not None:
+        self.on_error(task, exc)
+      else:
+        traceback.print_exc()
+    task.runs += 1
+    if task.interval is None or task.cancelled:
+      return
+    deadline += task.interval
+    now = self.clock()
+    if deadline <= now:
+      missed = int((now - deadline) / task.interval) + 1
+      deadline += missed * task.interval
+      task.overruns += missed
+      if self.on_overrun is not None:
+        self.on_overrun(task, missed)
+    task.deadline = deadline
+    with self._cond:
+      heapq.heappush(self._heap, (deadline, next(self._counter), task))
+
+  def run(self):
+    """
+    Runs the tasks on the calling thread until #stop() is called. Returns
+    right away if #stop() was called before; #start() clears that.
+    """
+
+    while not self._stop:
+      self.run_pending()
+      with self._cond:
+        # Tasks added by other threads and stop() notify the condition.
+        while not self._stop:
+          heap = self._heap
+          while heap and heap[0][2].cancelled:
+            heapq.heappop(heap)
+          delay = None
+          if heap:
+            delay = heap[0][0] - self.clock()
+            if delay <= 0:
+              break
+          self._cond.wait(delay)
+        else:
+          return
+
+  def start(self):
+    """
+    Runs the tasks on a new daemon thread and returns the thread.
+    """
+
+    # Not in run(): a stop() between here and the start of the thread
+    # would be lost.
+    with self._cond:
+      self._stop = False
+    self._thread = threading.Thread(target=self.run, name='myo.utils.Scheduler')
+    self._thread.daemon = True
+    self._thread.start()
+    return self._thread
+
+  def stop(self, timeout=None):
+    with self._cond:
+      self._stop = True
+      self._cond.notify()
+    if self._thread is not None and self._thread is not threading.current_thread():
+      self._thread.join(timeout)
+      self._thread = None
+    if self._loop is not None:
+      self._loop.call_soon_threadsafe(self._detach)
+
+  def attach(self, loop):
+    """
+    Runs the tasks as callbacks of the asyncio event *loop* instead of on
+    a thread. Tasks may be added from any thread.
+    """
+
+    self._loop = loop
+    loop.call_soon_threadsafe(self._loop_tick)
+
+  def _wakeup_loop(self):
+    if self._loop is not None:
+      self._loop.call_soon_threadsafe(self._loop_tick)
+
+  def _loop_tick(self):
+    if self._loop is None:
+      return
+    if self._handle is not None:
+      self._handle.cancel()
+      self._handle = None
+    delay = self.run_pending()
+    if delay is not None:
+      self._handle = self._loop.call_later(delay, self._loop_tick)
+
+  def _detach(self):
+    if self._handle is not None:
+      self._handle.cancel()
+      self._handle = None
+    self._loop = None
@@ -34,8 +34,8 @@ setuptools.setup(
   package_dir = {'': '.'},
   include_package_data = True,
   install_requires = requirements,
-  extras_require = {},
-  tests_require = [],
+  extras_require = {'fusion': ['numpy >=1.13', 'numba >=0.40']},
+  tests_require = ['pytest', 'numpy >=1.13'],
   python_requires = '>=3.5.0,<4.0.0',
   data_files = [],
   entry_points = {},
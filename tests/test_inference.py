@@ -0,0 +1,49 @@
+import threading
+import time
+
+import numpy as np
+
+from myo.inference import InferenceServer
+
+
+class SumModel(object):
+
+  def predict(self, X):
+    return np.asarray(X).sum(axis=1)
+
+
+def test_keyed_resubmission_faster_than_max_delay():
+  # Every key is resubmitted every 2 ms, well within max_delay. The
+  # replacements must not push the deadline back, or nothing is served.
+  server = InferenceServer(max_delay=0.010)
+  model = SumModel()
+  results = []
+  lock = threading.Lock()
+
+  def callback(result):
+    with lock:
+      results.append(result)
+
+  with server.run_in_background():
+    end = time.perf_counter() + 0.5
+    i = 0
+    while time.perf_counter() < end:
+      for key in range(3):
+        server.submit(model, [i, key], key=key, callback=callback)
+      i += 1
+      time.sleep(0.002)
+
+  assert server.superseded > 0
+  # About one batch per max_delay: 0.5 s / 10 ms = 50 batches of 3 results.
+  assert len(results) >= 3 * 10
+
+
+def test_replacement_resolves_latest_features():
+  server = InferenceServer(max_delay=0.05)
+  model = SumModel()
+  with server.run_in_background():
+    old = server.submit(model, [1, 1], key='user')
+    new = server.submit(model, [2, 2], key='user')
+    assert new.result(timeout=1) == 4
+  assert old.cancelled()
+  assert server.superseded == 1